@@ -0,0 +1,92 @@
+"""
+Runs a game module headless, streaming what happens as JSON Lines.
+
+    python -m the_loom.run --module kismet_social --ticks 100 --seed 7 --population 500 > run.jsonl
+
+Every character of the module joins the Nexus, with a population spawned from one of its templates.
+Each tick, every Eidolon plays its best card (see The Daimon) and The Agon resolves the plays; the
+events of the tick (see The Pheme) are written as soon as it ends. The engine's own messages go to
+stderr, so stdout carries nothing but events.
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+from typing import List, Optional
+from the_loom.the_agon import TheAgon
+from the_loom.the_chorus import cast_characters, load_game_module
+from the_loom.the_chronicle import TheChronicle
+from the_loom.the_daimon import TheDaimon
+from the_loom.the_nexus import TheNexus
+from the_loom.the_pheme import EVENT_KINDS, ThePheme, write_jsonl
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m the_loom.run", description="Runs a game module headless, streaming events as JSON Lines.")
+    parser.add_argument("--module", default="kismet_social", help="game module name or path (default: kismet_social)")
+    parser.add_argument("--ticks", type=int, default=10, help="ticks to run (default: 10)")
+    parser.add_argument("--seed", type=int, default=0, help="master seed of The Tyche (default: 0)")
+    parser.add_argument("--population", type=int, default=100, help="Eidolons spawned from the template (default: 100)")
+    parser.add_argument("--template", help="character template to spawn the population from (default: the module's first)")
+    parser.add_argument("--events", default=",".join(EVENT_KINDS), help=f"comma-separated event kinds to write (default: {','.join(EVENT_KINDS)})")
+    parser.add_argument("--output", default="-", help="file to write the events to, or - for stdout (default: -)")
+    parser.add_argument("--budget", type=int, help="(card, target) pairs The Daimon scores per tick (default: no limit)")
+    parser.add_argument("--affinity", help="only consider targets the actor holds this affinity type towards")
+    parser.add_argument("--journal", help="also journal the run to this file, for replay (see The Chronicle)")
+    parser.add_argument("--checkpoint-every", type=int, default=100, help="ticks between journal checkpoints (default: 100)")
+    parser.add_argument("--validate", action="store_true", help="hold the module to The Canon before running")
+    parser.add_argument("--quiet", action="store_true", help="discard the engine's messages instead of writing them to stderr")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    kinds = [kind.strip() for kind in args.events.split(",") if kind.strip()]
+    chatter = open(os.devnull, "w") if args.quiet else sys.stderr
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(chatter):
+            alembic, moirai = load_game_module(args.module, validate=args.validate)
+            alembic.tyche.reseed(args.seed)
+            nexus = TheNexus()
+            cast_characters(alembic, nexus)
+            characters = alembic.loaded_hyle.get("characters", {})
+            template = args.template or next(
+                (character_id for character_id, definition in characters.items() if definition.get("generation_type") == "template"), None
+            )
+            if args.population > 0:
+                if template is None:
+                    raise ValueError(f"Game module '{args.module}' has no character template to spawn a population from.")
+                if template not in characters:
+                    raise ValueError(f"Character template '{template}' not found in The Hyle.")
+                alembic.spawn_batch(template, args.population, nexus=nexus)
+            agon = TheAgon(alembic, moirai)
+            agon.enable_hand_index(nexus.eidolons.values())
+            agon.attach(nexus)
+            TheDaimon(agon, top_k=1, affinity=args.affinity, budget=args.budget).attach(nexus)
+            chronicle = TheChronicle(nexus, args.journal, args.checkpoint_every) if args.journal else None
+            if chronicle is not None:
+                chronicle.start()
+            pheme = ThePheme(nexus, agon, kinds)
+            try:
+                written = write_jsonl(pheme.events(args.ticks), output)
+            finally:
+                if chronicle is not None:
+                    chronicle.stop()
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except BrokenPipeError: # The reader (e.g. `head`) stopped reading
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if chatter is not sys.stderr:
+            chatter.close()
+    print(f"{written} events over {args.ticks} ticks of {len(nexus.eidolons)} Eidolons in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,381 @@
+"""
+The Agon: The contest in which cards are played.
+This module resolves card plays (an actor playing a card, usually on a target) in a staged pipeline:
+the cost check, the challenge roll, the modifier tangle, the outcome tier and the application of the
+outcome's effects. Plays are queued and resolved in batches: a tick's plays are grouped by card and
+every stage runs once per group, evaluating its formulas for all of the group's plays at once (see
+TheMoirai.evaluate_formula_batch) instead of play by play.
+"""
+
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from the_loom.the_alembic import TheAlembic
+from the_loom.the_eidolon import Eidolon
+from the_loom.the_kleros import TheKleros
+from the_loom.the_moirai import TheMoirai
+from the_loom.the_tyche import TheTyche
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional; the stages fall back to pure Python without it.
+    np = None
+
+if TYPE_CHECKING:
+    from the_loom.the_nexus import TheNexus
+
+# How a play can end, worst to best. Cards define effects for any of the last four.
+OUTCOMES = ("unaffordable", "critical_failure", "failure", "success", "critical_success")
+# Outcome -> the outcome whose effects apply when a card defines none for it.
+OUTCOME_FALLBACKS = {"critical_success": "success", "critical_failure": "failure"}
+
+# Who an effect applies to.
+EFFECT_SUBJECTS = ("target", "actor")
+
+# Used when [game_rules] doesn't give default_dice_roll_range or default_challenge_difficulty.
+DEFAULT_DICE_ROLL_RANGE = (1, 10)
+DEFAULT_CHALLENGE_DIFFICULTY = 10
+
+_SUCCESS = OUTCOMES.index("success")
+_FAILURE = OUTCOMES.index("failure")
+_CRITICAL_SUCCESS = OUTCOMES.index("critical_success")
+_CRITICAL_FAILURE = OUTCOMES.index("critical_failure")
+
+class CardPlay:
+    """One play of a card and, once resolved, how it went."""
+
+    __slots__ = ("card_id", "actor", "target", "outcome", "roll", "total", "difficulty", "value")
+
+    def __init__(self, card_id: str, actor: Eidolon, target: Optional[Eidolon] = None):
+        self.card_id = card_id
+        self.actor = actor
+        self.target = target
+        self.outcome: Optional[str] = None
+        # The natural roll of the challenge, the total with the challenge attribute and modifiers, and what it had to reach
+        self.roll: Optional[int] = None
+        self.total: Optional[float] = None
+        self.difficulty: Optional[float] = None
+        # The value of the outcome's effect formula, as applied
+        self.value: Optional[float] = None
+
+    def __repr__(self):
+        on = f" on {self.target.name}" if self.target is not None else ""
+        return f"<CardPlay: {self.actor.name} plays {self.card_id}{on}: {self.outcome or 'queued'}>"
+
+
+class CardEffect:
+    """
+    One outcome of a card: the value of `formula` (times `scale`) is added to a numeric `attribute`
+    and/or to an `affinity` of the Eidolon it `affects` towards the other one, and the values in
+    `state` are set on it.
+    """
+
+    __slots__ = ("formula", "scale", "subject", "attribute", "affinity", "state")
+
+    def __init__(self, where: str, definition: Dict[str, Any], moirai: TheMoirai):
+        if "formula" not in definition:
+            raise ValueError(f"{where} has no 'formula'")
+        self.formula = moirai.ensure_formula(definition["formula"])
+        self.scale = definition.get("scale", 1)
+        self.subject = definition.get("affects", "target")
+        if self.subject not in EFFECT_SUBJECTS:
+            raise ValueError(f"{where}.affects must be one of {EFFECT_SUBJECTS}, not {self.subject!r}")
+        self.attribute = _numeric_slot(moirai, definition["attribute"], f"{where}.attribute") if "attribute" in definition else None
+        self.affinity: Optional[str] = definition.get("affinity")
+        # (tier, attribute, value) set on the affected Eidolon
+        self.state: List[Tuple[str, str, Any]] = []
+        for attribute, value in definition.get("state", {}).items():
+            slot = moirai.schema.slots.get(attribute)
+            if slot is None:
+                raise ValueError(f"{where}.state: unknown attribute '{attribute}'")
+            self.state.append((slot[0], attribute, value))
+
+
+class CompiledCard:
+    """A card definition with its formulas compiled into The Moirai and its attributes located in the schema."""
+
+    def __init__(self, card_id: str, definition: Dict[str, Any], moirai: TheMoirai):
+        where = f"Card '{card_id}'"
+        self.card_id = card_id
+        self.definition = definition
+        challenge = definition.get("challenge_attribute")
+        # (tier, attribute, offset) of the attribute added to the challenge roll, if any
+        self.challenge = _numeric_slot(moirai, challenge, f"{where} challenge_attribute") if challenge is not None else None
+        # (tier, attribute, offset, formula name or None, constant cost) of every cost
+        self.costs: List[Tuple[str, str, int, Optional[str], float]] = []
+        for attribute, cost in definition.get("costs", {}).items():
+            tier, attribute, offset = _numeric_slot(moirai, attribute, f"{where} cost")
+            if isinstance(cost, str):
+                self.costs.append((tier, attribute, offset, moirai.ensure_formula(cost), 0))
+            else:
+                self.costs.append((tier, attribute, offset, None, cost))
+        self.modifiers = [moirai.ensure_formula(modifier) for modifier in definition.get("modifiers", [])]
+        # A formula name, a number, or None for the game rules' default
+        difficulty = definition.get("difficulty")
+        self.difficulty = moirai.ensure_formula(difficulty) if isinstance(difficulty, str) else difficulty
+        self.effects: Dict[str, CardEffect] = {}
+        for outcome, effect in definition.get("effects", {}).items():
+            if outcome not in OUTCOMES[1:]:
+                raise ValueError(f"{where} has effects for unknown outcome '{outcome}'")
+            self.effects[outcome] = CardEffect(f"{where} effects.{outcome}", effect, moirai)
+
+        formulas = [formula for _, _, _, formula, _ in self.costs if formula is not None] + self.modifiers
+        formulas += [effect.formula for effect in self.effects.values()]
+        if isinstance(self.difficulty, str):
+            formulas.append(self.difficulty)
+        # Plays without a target can't evaluate target formulas, change a target, or hold an affinity
+        self.needs_target = any(moirai.compiled[formula].uses_target for formula in formulas) or any(
+            effect.subject == "target" or effect.affinity is not None for effect in self.effects.values()
+        )
+
+    def effect(self, outcome: str) -> Optional[CardEffect]:
+        effect = self.effects.get(outcome)
+        if effect is None and outcome in OUTCOME_FALLBACKS:
+            effect = self.effects.get(OUTCOME_FALLBACKS[outcome])
+        return effect
+
+
+def _numeric_slot(moirai: TheMoirai, attribute: str, where: str) -> Tuple[str, str, int]:
+    slot = moirai.schema.slots.get(attribute)
+    if slot is None or not slot[1]:
+        raise ValueError(f"{where} '{attribute}' is not a numeric attribute")
+    return slot[0], attribute, slot[2]
+
+
+def _column(agents: Sequence[Eidolon], offset: int) -> Any:
+    if np is not None:
+        return np.fromiter((agent._numbers[offset] for agent in agents), dtype=float, count=len(agents))
+    return [agent._numbers[offset] for agent in agents]
+
+
+class TheAgon:
+    def __init__(self, alembic: TheAlembic, moirai: TheMoirai, tyche: Optional[TheTyche] = None):
+        self.alembic = alembic
+        self.moirai = moirai
+        # Challenge rolls come from the stream ("agon", card id): its k-th draw is the k-th play of the card.
+        self.tyche = tyche if tyche is not None else alembic.tyche
+        self.queued: List[CardPlay] = []
+        self.compiled: Dict[str, CompiledCard] = {}
+        # card id -> plays of it resolved so far
+        self.plays_resolved: Dict[str, int] = {}
+        # Which Eidolons can pay for each card, if enabled (see enable_hand_index)
+        self.hands: Optional[TheKleros] = None
+
+    def card(self, card_id: str) -> CompiledCard:
+        """The compiled card, compiled again whenever its definition changes (e.g. reloaded by The Proteus)."""
+        definition = self.alembic.loaded_hyle.get("cards", {}).get(card_id)
+        if definition is None:
+            raise ValueError(f"Card '{card_id}' not found in The Hyle.")
+        compiled = self.compiled.get(card_id)
+        if compiled is None or compiled.definition is not definition:
+            compiled = self.compiled[card_id] = CompiledCard(card_id, definition, self.moirai)
+        return compiled
+
+    def enable_hand_index(self, eidolons: Iterable[Eidolon] = ()) -> TheKleros:
+        """Keeps the hand of every Eidolon given (and of those tracked later) up to date as they are written."""
+        if self.hands is None:
+            self.hands = TheKleros(self)
+        self.hands.track(eidolons)
+        return self.hands
+
+    def disable_hand_index(self):
+        if self.hands is not None:
+            self.hands.close()
+            self.hands = None
+
+    def _new_play(self, card_id: str, actor: Eidolon, target: Optional[Eidolon]) -> CardPlay:
+        if target is None and self.card(card_id).needs_target:
+            raise ValueError(f"Card '{card_id}' must be played on a target.")
+        return CardPlay(card_id, actor, target)
+
+    def queue(self, card_id: str, actor: Eidolon, target: Optional[Eidolon] = None) -> CardPlay:
+        """Queues a play for the next resolve_queued(); the returned play is filled in when it resolves."""
+        play = self._new_play(card_id, actor, target)
+        self.queued.append(play)
+        return play
+
+    def play(self, card_id: str, actor: Eidolon, target: Optional[Eidolon] = None) -> CardPlay:
+        """Resolves one play right away."""
+        return self.resolve([self._new_play(card_id, actor, target)])[0]
+
+    def resolve_queued(self) -> List[CardPlay]:
+        plays, self.queued = self.queued, []
+        return self.resolve(plays)
+
+    def attach(self, nexus: "TheNexus"):
+        """Resolves the plays queued during each tick of The Nexus's Horae, as one of its update phases."""
+        nexus.horae.add_phase("agon", lambda tick: self.resolve_queued())
+
+    def resolve(self, plays: Sequence[CardPlay]) -> List[CardPlay]:
+        """
+        Resolves plays in batches of the same card, in the order each card was first played. The
+        plays of a batch are simultaneous: each stage reads the world as the previous stage left it.
+        An actor playing the same card several times has its plays spread over successive batches,
+        so each one pays with what the one before left. Returns the plays, resolved.
+        """
+        batches: Dict[Tuple[str, bool], List[List[CardPlay]]] = {}
+        rounds: Dict[Tuple[str, bool, Eidolon], int] = {}
+        for play in plays:
+            key = (play.card_id, play.target is not None)
+            turn = rounds.get((*key, play.actor), 0)
+            rounds[(*key, play.actor)] = turn + 1
+            group = batches.setdefault(key, [])
+            if turn == len(group):
+                group.append([])
+            group[turn].append(play)
+
+        rules = self.moirai.constants.get("game_rules", {})
+        for (card_id, _), group in batches.items():
+            card = self.card(card_id)
+            for batch in group:
+                self._resolve_batch(card, batch, rules)
+        return list(plays)
+
+    def _evaluate(self, formula: str, actors: List[Eidolon], targets: Optional[List[Eidolon]]) -> Any:
+        values = self.moirai.evaluate_formula_batch(formula, actors, targets, pairwise=True)
+        return values.astype(float) if np is not None else values
+
+    def _resolve_batch(self, card: CompiledCard, plays: List[CardPlay], rules: Dict[str, Any]):
+        actors = [play.actor for play in plays]
+        targets = [play.target for play in plays] if plays[0].target is not None else None
+
+        # 1. The cost check: plays whose actor can't pay every cost end here; the others pay.
+        if card.costs:
+            costs = []
+            for tier, attribute, offset, formula, constant in card.costs:
+                values = self._evaluate(formula, actors, targets) if formula is not None else [constant] * len(plays)
+                costs.append((tier, attribute, offset, values.tolist() if np is not None and formula is not None else values))
+            if np is not None:
+                affordable = np.ones(len(plays), dtype=bool)
+                for _, _, offset, values in costs:
+                    affordable &= _column(actors, offset) >= np.asarray(values, dtype=float)
+                affordable = affordable.tolist()
+            else:
+                affordable = [
+                    all(actor._numbers[offset] >= values[i] for _, _, offset, values in costs)
+                    for i, actor in enumerate(actors)
+                ]
+            for tier, attribute, offset, values in costs:
+                for i, actor in enumerate(actors):
+                    if affordable[i]:
+                        actor._write(tier, attribute, actor._numbers[offset] - values[i])
+            if not all(affordable):
+                for play, can_pay in zip(plays, affordable):
+                    if not can_pay:
+                        play.outcome = "unaffordable"
+                kept = [i for i, can_pay in enumerate(affordable) if can_pay]
+                plays = [plays[i] for i in kept]
+                actors = [actors[i] for i in kept]
+                targets = [targets[i] for i in kept] if targets is not None else None
+                if not plays:
+                    return
+
+        # 2. The challenge roll: the die plus the challenge attribute.
+        low, high = rules.get("default_dice_roll_range", DEFAULT_DICE_ROLL_RANGE)
+        stream = self.tyche.stream("agon", card.card_id).seek(self.plays_resolved.get(card.card_id, 0))
+        rolls = stream.randints(low, high, len(plays))
+        self.plays_resolved[card.card_id] = stream.counter
+        if np is not None:
+            totals = rolls.astype(float)
+            if card.challenge is not None:
+                totals += _column(actors, card.challenge[2])
+        else:
+            totals = [float(roll) for roll in rolls]
+            if card.challenge is not None:
+                totals = [total + value for total, value in zip(totals, _column(actors, card.challenge[2]))]
+
+        # 3. The modifier tangle: every modifier formula of the card is added to the roll.
+        for modifier in card.modifiers:
+            values = self._evaluate(modifier, actors, targets)
+            totals = totals + values if np is not None else [total + value for total, value in zip(totals, values)]
+
+        # 4. The outcome tier: the highest and lowest rolls are critical; otherwise the total must reach the difficulty.
+        difficulty = card.difficulty
+        if difficulty is None:
+            difficulty = rules.get("default_challenge_difficulty", DEFAULT_CHALLENGE_DIFFICULTY)
+        elif isinstance(difficulty, str):
+            difficulty = self._evaluate(difficulty, actors, targets)
+        if np is not None:
+            codes = np.where(totals >= difficulty, _SUCCESS, _FAILURE)
+            codes[rolls == low] = _CRITICAL_FAILURE
+            codes[rolls == high] = _CRITICAL_SUCCESS
+            codes = codes.tolist()
+            rolls, totals = rolls.tolist(), totals.tolist()
+            difficulties = np.broadcast_to(difficulty, len(plays)).tolist()
+        else:
+            difficulties = difficulty if isinstance(difficulty, list) else [difficulty] * len(plays)
+            codes = [
+                _CRITICAL_SUCCESS if roll == high else _CRITICAL_FAILURE if roll == low
+                else _SUCCESS if total >= needed else _FAILURE
+                for roll, total, needed in zip(rolls, totals, difficulties)
+            ]
+        by_outcome: Dict[int, List[int]] = {}
+        for i, play in enumerate(plays):
+            play.outcome = OUTCOMES[codes[i]]
+            play.roll, play.total, play.difficulty = rolls[i], totals[i], difficulties[i]
+            by_outcome.setdefault(codes[i], []).append(i)
+
+        # 5. The effects of each outcome, evaluated for all of its plays at once.
+        minimum = rules.get("min_affinity_value")
+        maximum = rules.get("max_affinity_value")
+        for code, indices in by_outcome.items():
+            effect = card.effect(OUTCOMES[code])
+            if effect is None:
+                continue
+            outcome_actors = [actors[i] for i in indices]
+            outcome_targets = [targets[i] for i in indices] if targets is not None else None
+            values = self._evaluate(effect.formula, outcome_actors, outcome_targets)
+            values = (values * effect.scale).tolist() if np is not None else [value * effect.scale for value in values]
+            for i, value in zip(indices, values):
+                play = plays[i]
+                play.value = value
+                subject, other = (play.target, play.actor) if effect.subject == "target" else (play.actor, play.target)
+                if effect.attribute is not None:
+                    tier, attribute, offset = effect.attribute
+                    subject._write(tier, attribute, subject._numbers[offset] + value)
+                if effect.affinity is not None:
+                    affinity = subject.get_affinity(other.eid, effect.affinity) + value
+                    if minimum is not None:
+                        affinity = max(minimum, affinity)
+                    if maximum is not None:
+                        affinity = min(maximum, affinity)
+                    subject.update_affinity(other.eid, effect.affinity, affinity)
+                for tier, attribute, state in effect.state:
+                    subject._write(tier, attribute, state)
+
+# Example Usage (for testing purposes)
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import time
+    from the_loom.the_chorus import load_game_module
+    from the_loom.the_nexus import TheNexus
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        alembic, moirai = load_game_module("kismet_social", use_cache=False)
+        nexus = TheNexus()
+        gregor = alembic.create_eidolon("gregor_the_guard")
+        gossip = alembic.create_eidolon("town_gossip")
+        nexus.add_eidolons([gregor, gossip])
+    agon = TheAgon(alembic, moirai)
+    agon.attach(nexus)
+
+    for card_id in ("offer_a_gift", "tell_a_joke", "intimidate", "arcane_blast"):
+        play = agon.play(card_id, gregor, gossip)
+        print(f"{play!r}: rolled {play.roll}, total {play.total:.1f} against {play.difficulty}; effect {play.value}")
+    print(f"{gossip.name}: mood {gossip.dynamic_states['emotional_state']}, health {gossip.dynamic_states['health']}, "
+          f"affinities {gossip.affinities}; {gregor.name}'s social battery {gregor.dynamic_states['social_battery']:.1f}")
+
+    # A tick's worth of plays: a crowd telling jokes to one another, resolved in one batch per card
+    with contextlib.redirect_stdout(io.StringIO()):
+        crowd = alembic.spawn_batch("town_gossip", 2000, nexus=nexus)
+    for i, actor in enumerate(crowd):
+        agon.queue("tell_a_joke", actor, crowd[i - 1])
+        agon.queue("intimidate", actor, crowd[i - 2])
+    queued = list(agon.queued)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        nexus.advance_time(1) # The Agon's phase resolves the queue
+    elapsed = time.perf_counter() - start
+    counts: Dict[str, int] = {}
+    for play in queued:
+        counts[play.outcome] = counts.get(play.outcome, 0) + 1
+    print(f"Resolved {len(queued)} queued plays in {elapsed:.3f}s: {dict(sorted(counts.items()))}")
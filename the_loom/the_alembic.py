@@ -3,14 +3,420 @@ The Alembic: Distills The Hyle (TOML data) into living Eidolons and other game o
 This module handles the loading and instantiation of game entities based on their definitions.
 """
 
+import ast
+import copy
+import math
 import tomllib # Requires Python 3.11+
-import random
-from typing import Dict, Any, List, Optional
-from the_loom.the_eidolon import Eidolon
+from abc import ABC, abstractmethod
+from array import array
+from typing import TYPE_CHECKING, Dict, Any, List, Mapping, Optional, Tuple
+from the_loom.the_eidolon import DEFAULT_SCHEMA, Eidolon, EidolonSchema
+from the_loom.the_hermes import LazySection
+from the_loom.the_moirai import FORMULA_ROLES, compile_formula
+from the_loom.the_skein import TheSkein
+from the_loom.the_tyche import TheTyche, TycheStream
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional; bulk spawning falls back to pure Python without it.
+    np = None
+
+if TYPE_CHECKING:
+    from the_loom.the_nexus import TheNexus
+
+# The attribute tiers of a character definition.
+HYLE_TIERS = ("core", "personality", "dynamic_states", "ledger")
+
+class AttributeSampler(ABC):
+    """
+    Draws one procedural attribute of a character definition. Each sample uses `draws` consecutive
+    draws of the attribute's stream, so the k-th Eidolon spawned always gets the same value.
+
+    `context` holds the attributes known so far: fixed values and schema defaults, plus the
+    procedural attributes defined before this one (one value each in sample(), one column each
+    in sample_block()).
+    """
+
+    draws = 1
+
+    def __init__(self, attribute: str, definition: Dict[str, Any]):
+        self.attribute = attribute
+        # Optional clamp and rounding applied to every value drawn.
+        self.low: Optional[float] = definition.get("min")
+        self.high: Optional[float] = definition.get("max")
+        self.rounded = bool(definition.get("round", False))
+
+    @abstractmethod
+    def sample(self, stream: TycheStream, context: Dict[str, Any]) -> Any:
+        """One value."""
+
+    @abstractmethod
+    def sample_block(self, stream: TycheStream, n: int, context: Dict[str, Any]) -> Any:
+        """n samples at once (a NumPy array when NumPy is available), equal to n calls to sample()."""
+
+    def moments(self) -> Optional[Tuple[float, float]]:
+        """(mean, standard deviation) of the values drawn, if known; used to correlate other attributes with this one."""
+        return None
+
+    def finish(self, value: float) -> Any:
+        if self.low is not None and value < self.low:
+            value = self.low
+        if self.high is not None and value > self.high:
+            value = self.high
+        return round(value) if self.rounded else value
+
+    def finish_block(self, values: Any) -> Any:
+        if np is not None:
+            if self.low is not None or self.high is not None:
+                values = np.clip(values, self.low, self.high)
+            return np.round(values) if self.rounded else values
+        return [self.finish(value) for value in values]
+
+
+class UniformSampler(AttributeSampler):
+    """
+    type = "range": an integer drawn uniformly from [min, max].
+    type = "uniform": a float drawn uniformly from [min, max).
+    """
+
+    def __init__(self, attribute: str, definition: Dict[str, Any]):
+        super().__init__(attribute, definition)
+        self.integer = definition["type"] == "range"
+        self.low = definition.get("min", 0)
+        self.high = definition.get("max", 100 if self.integer else 1.0)
+        if self.high < self.low:
+            raise ValueError(f"Empty range [{self.low}, {self.high}]")
+
+    def sample(self, stream: TycheStream, context: Dict[str, Any]) -> Any:
+        if self.integer:
+            return stream.randint(self.low, self.high)
+        return stream.uniform(self.low, self.high)
+
+    def sample_block(self, stream: TycheStream, n: int, context: Dict[str, Any]) -> Any:
+        if self.integer:
+            return stream.randints(self.low, self.high, n)
+        return stream.uniforms(self.low, self.high, n)
+
+    def moments(self) -> Tuple[float, float]:
+        span = self.high - self.low
+        variance = ((span + 1) ** 2 - 1) / 12 if self.integer else span ** 2 / 12
+        return (self.low + self.high) / 2, math.sqrt(variance)
+
+
+class NormalSampler(AttributeSampler):
+    """type = "normal": mean and stddev, optionally clamped to [min, max] and rounded (round = true)."""
+
+    draws = 2
+
+    def __init__(self, attribute: str, definition: Dict[str, Any]):
+        super().__init__(attribute, definition)
+        self.mean = definition.get("mean", 0.0)
+        self.stddev = definition.get("stddev", 1.0)
+        if self.stddev < 0:
+            raise ValueError(f"Negative stddev {self.stddev}")
+
+    def sample(self, stream: TycheStream, context: Dict[str, Any]) -> Any:
+        return self.finish(stream.gauss(self.mean, self.stddev))
+
+    def sample_block(self, stream: TycheStream, n: int, context: Dict[str, Any]) -> Any:
+        return self.finish_block(stream.gausses(self.mean, self.stddev, n))
+
+    def moments(self) -> Tuple[float, float]:
+        return self.mean, self.stddev
+
+
+class WeightedListSampler(AttributeSampler):
+    """
+    type = "weighted_list": one of `options`, picked with probability proportional to `weights`
+    (equal weights if omitted). Picks take O(1) whatever the number of options, using Vose's alias
+    method: one draw chooses a column of the alias table, a second chooses between its two options.
+    """
+
+    draws = 2
+
+    def __init__(self, attribute: str, definition: Dict[str, Any]):
+        super().__init__(attribute, definition)
+        self.options = list(definition.get("options", []))
+        weights = list(definition.get("weights", [1] * len(self.options)))
+        if not self.options:
+            raise ValueError("No options given")
+        if len(weights) != len(self.options):
+            raise ValueError(f"{len(self.options)} options but {len(weights)} weights")
+        if any(weight < 0 for weight in weights) or sum(weights) <= 0:
+            raise ValueError("Weights must be non-negative with a positive sum")
+        self.weights = weights
+        self.probability, self.alias = self.alias_table(weights)
+        self.numeric = all(isinstance(option, (int, float)) and not isinstance(option, bool) for option in self.options)
+        if np is not None:
+            self._probability = np.array(self.probability)
+            self._alias = np.array(self.alias, dtype=np.int64)
+            self._options = np.array(self.options, dtype=float if self.numeric else object)
+
+    @staticmethod
+    def alias_table(weights: List[float]) -> Tuple[List[float], List[int]]:
+        """Vose's alias table: column i keeps option i with probability[i], otherwise gives option alias[i]."""
+        n = len(weights)
+        total = sum(weights)
+        scaled = [weight * n / total for weight in weights]
+        probability = [1.0] * n
+        alias = list(range(n))
+        small = [i for i, weight in enumerate(scaled) if weight < 1.0]
+        large = [i for i, weight in enumerate(scaled) if weight >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probability[less] = scaled[less]
+            alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        return probability, alias # Leftover columns (rounding error) keep probability 1
+
+    def sample(self, stream: TycheStream, context: Dict[str, Any]) -> Any:
+        column = int(stream.random() * len(self.options))
+        keep = stream.random() < self.probability[column]
+        return self.options[column if keep else self.alias[column]]
+
+    def sample_block(self, stream: TycheStream, n: int, context: Dict[str, Any]) -> Any:
+        draws = stream.randoms(2 * n)
+        if np is None:
+            return [
+                self.options[column if keep < self.probability[column] else self.alias[column]]
+                for column, keep in ((int(draws[i] * len(self.options)), draws[i + 1]) for i in range(0, 2 * n, 2))
+            ]
+        columns = (draws[0::2] * len(self.options)).astype(np.int64)
+        picks = np.where(draws[1::2] < self._probability[columns], columns, self._alias[columns])
+        values = self._options[picks]
+        return values if self.numeric else values.tolist()
+
+    def moments(self) -> Optional[Tuple[float, float]]:
+        if not self.numeric:
+            return None
+        total = sum(self.weights)
+        mean = sum(weight * option for weight, option in zip(self.weights, self.options)) / total
+        variance = sum(weight * (option - mean) ** 2 for weight, option in zip(self.weights, self.options)) / total
+        return mean, math.sqrt(variance)
+
+
+class CorrelatedSampler(NormalSampler):
+    """
+    type = "correlated": normally distributed (mean, stddev, optional min/max/round) with the given
+    `correlation` to the attribute named by `with`, which must be drawn earlier in the definition.
+    The other attribute's value is standardized with its sampler's mean and deviation, then mixed
+    with an independent normal draw.
+    """
+
+    def __init__(self, attribute: str, definition: Dict[str, Any], other: AttributeSampler):
+        super().__init__(attribute, definition)
+        self.other = other.attribute
+        self.correlation = definition.get("correlation", 0.0)
+        if not -1.0 <= self.correlation <= 1.0:
+            raise ValueError(f"Correlation {self.correlation} is outside [-1, 1]")
+        moments = other.moments()
+        if moments is None:
+            raise ValueError(f"'{other.attribute}' has no numeric mean to correlate with")
+        self.other_mean, self.other_stddev = moments
+        self.independence = math.sqrt(1.0 - self.correlation ** 2)
+
+    def _mix(self, other: Any, noise: Any) -> Any:
+        standard = (other - self.other_mean) / self.other_stddev if self.other_stddev else other * 0.0
+        return self.mean + self.stddev * (self.correlation * standard + self.independence * noise)
+
+    def sample(self, stream: TycheStream, context: Dict[str, Any]) -> Any:
+        return self.finish(self._mix(context[self.other], stream.gauss()))
+
+    def sample_block(self, stream: TycheStream, n: int, context: Dict[str, Any]) -> Any:
+        noise = stream.gausses(0.0, 1.0, n)
+        if np is not None:
+            return self.finish_block(self._mix(np.asarray(context[self.other], dtype=float), noise))
+        return self.finish_block([self._mix(other, z) for other, z in zip(context[self.other], noise)])
+
+
+class FormulaSampler(AttributeSampler):
+    """
+    type = "formula": the value of a Moirai `expression` over the Eidolon's own attributes (e.g.
+    "actor.core.resilience * 5 + 20"), optionally clamped and rounded. It may read fixed values and
+    the procedural attributes defined before it, and uses no draws of its own.
+    """
+
+    draws = 0
+
+    def __init__(self, attribute: str, definition: Dict[str, Any], schema: EidolonSchema, sampled: List[str], procedural: List[str]):
+        super().__init__(attribute, definition)
+        expression = definition.get("expression")
+        if not expression:
+            raise ValueError("Missing 'expression'")
+        self.formula = compile_formula(attribute, expression, schema=schema)
+        if self.formula.relations or any(
+            isinstance(node, ast.Name) and node.id in FORMULA_ROLES for node in ast.walk(self.formula.tree)
+        ):
+            raise ValueError("Template formulas may only read the Eidolon's own attributes")
+        self.inputs: List[str] = []
+        for slot in self.formula.vector_slots:
+            role, _, read = self.formula.reads[slot]
+            if role != "actor":
+                raise ValueError(f"Template formulas read the spawned Eidolon as 'actor', not '{role}'")
+            if read in procedural and read not in sampled:
+                raise ValueError(f"'{read}' is drawn after '{attribute}'")
+            self.inputs.append(read)
+        # Inputs that are columns (rather than single fixed values) in sample_block()
+        self.columns = [read in sampled for read in self.inputs]
+
+    def sample(self, stream: TycheStream, context: Dict[str, Any]) -> Any:
+        return self.finish(self.formula.slot_function(*(context[read] for read in self.inputs)))
+
+    def sample_block(self, stream: TycheStream, n: int, context: Dict[str, Any]) -> Any:
+        arguments = [context[read] for read in self.inputs]
+        if np is not None and self.formula.vector_function is not None:
+            arguments = [
+                np.array(argument, dtype=object) if column and isinstance(argument, list) else argument
+                for argument, column in zip(arguments, self.columns)
+            ] # Object columns (e.g. drawn from a weighted_list) as arrays, so comparisons apply per row
+            values = np.array(np.broadcast_to(self.formula.vector_function(*arguments), (n,)))
+            return self.finish_block(values) if values.dtype.kind in "biuf" else values.tolist()
+        if not self.inputs:
+            return [self.sample(stream, context)] * n
+        rows = zip(*(argument if column else [argument] * n for argument, column in zip(arguments, self.columns)))
+        return [self.finish(self.formula.slot_function(*row)) for row in rows]
+
+
+# Procedural attribute types of character definitions, e.g. { type = "range", min = 8, max = 12 }.
+# "correlated" and "formula" samplers depend on earlier attributes and are built by TemplateSampler.
+SAMPLER_TYPES = {
+    "range": UniformSampler,
+    "uniform": UniformSampler,
+    "normal": NormalSampler,
+    "weighted_list": WeightedListSampler,
+}
+
+
+class TemplateSampler:
+    """
+    A character definition compiled once: its fixed values already laid out by the schema, and one
+    sampler per procedural attribute.
+    """
+
+    def __init__(self, definition_id: str, definition: Dict[str, Any], schema: EidolonSchema):
+        self.definition_id = definition_id
+        self.name = definition.get("name", definition_id) # Use ID as name if not specified
+        self.generation_type = definition.get("generation_type", "static")
+        self.schema = schema
+        self.fixed: Dict[str, Any] = {}
+        procedural: Dict[str, Dict[str, Any]] = {}
+        for tier_name, tier_data in definition.items():
+            if tier_name not in HYLE_TIERS:
+                continue
+            for attr_name, attr_value_def in tier_data.items():
+                if isinstance(attr_value_def, dict) and "type" in attr_value_def:
+                    procedural[attr_name] = attr_value_def
+                else:
+                    self.fixed[attr_name] = attr_value_def
+
+        # Samplers in definition order, which is the order they are drawn in.
+        self.samplers: List[AttributeSampler] = []
+        # attribute -> why its definition was left out (see The Canon)
+        self.problems: Dict[str, str] = {}
+        by_attribute: Dict[str, AttributeSampler] = {}
+        for attr_name, attr_value_def in procedural.items():
+            try:
+                sampler = self._compile_sampler(attr_name, attr_value_def, by_attribute, list(procedural))
+            except ValueError as e:
+                self.problems[attr_name] = f"invalid procedural attribute: {e}"
+                print(f"Warning: Invalid procedural attribute '{attr_name}' in '{definition_id}': {e}")
+                continue
+            if sampler is None:
+                self.problems[attr_name] = f"unknown procedural type '{attr_value_def['type']}'"
+                print(f"Warning: Unknown procedural type '{attr_value_def['type']}' for '{attr_name}' in '{definition_id}'.")
+                continue
+            self.samplers.append(sampler)
+            by_attribute[attr_name] = sampler
+
+        # Value storage with the fixed values in place, copied for every Eidolon spawned in bulk.
+        self.numbers = array("d", schema.numeric_defaults)
+        self.objects = list(schema.object_defaults)
+        # Fixed values of attributes kept in the Skein (e.g. starting grievances)
+        self.relations: Dict[str, Any] = {}
+        for attribute, value in self.fixed.items():
+            slot = schema.slots.get(attribute)
+            if slot is None:
+                continue
+            tier, is_numeric, offset = slot
+            if attribute in schema.relations[tier]:
+                if value:
+                    self.relations[attribute] = value
+            elif is_numeric:
+                if not isinstance(value, (int, float)):
+                    self.problems[attribute] = f"expected a number, got {value!r}"
+                    print(f"Warning: Non-numeric value {value!r} for '{attribute}' in '{definition_id}'; keeping the default.")
+                    continue
+                self.numbers[offset] = value
+            else:
+                self.objects[offset] = value
+        self._mutable_offsets = [
+            offset for offset, value in enumerate(self.objects) if isinstance(value, (list, dict, set))
+        ]
+        # attribute -> its value before sampling (fixed or schema default), the starting context of every draw
+        self.context: Dict[str, Any] = {
+            attribute: (self.numbers if is_numeric else self.objects)[offset]
+            for attribute, (tier, is_numeric, offset) in schema.slots.items()
+            if attribute not in schema.relations[tier]
+        }
+
+    def _compile_sampler(
+        self, attribute: str, definition: Dict[str, Any], earlier: Dict[str, AttributeSampler], procedural: List[str],
+    ) -> Optional[AttributeSampler]:
+        kind = definition["type"]
+        if kind == "correlated":
+            other = earlier.get(definition.get("with"))
+            if other is None:
+                raise ValueError(f"'with' must name a procedural attribute defined before it, not {definition.get('with')!r}")
+            return CorrelatedSampler(attribute, definition, other)
+        if kind == "formula":
+            return FormulaSampler(attribute, definition, self.schema, list(earlier), procedural)
+        sampler_type = SAMPLER_TYPES.get(kind)
+        return sampler_type(attribute, definition) if sampler_type is not None else None
+
+    def stream(self, tyche: TheTyche, sampler: AttributeSampler, index: int) -> TycheStream:
+        """The stream of one attribute, positioned at the draws of the index-th Eidolon spawned."""
+        return tyche.stream("alembic", self.definition_id, sampler.attribute).seek(index * sampler.draws)
+
+    def draw(self, tyche: TheTyche, index: int) -> Dict[str, Any]:
+        """The procedural attribute values of the index-th Eidolon spawned from this definition."""
+        context = dict(self.context)
+        values = {}
+        for sampler in self.samplers:
+            values[sampler.attribute] = context[sampler.attribute] = sampler.sample(self.stream(tyche, sampler, index), context)
+        return values
+
+    def draw_block(self, tyche: TheTyche, start: int, n: int) -> Dict[str, Any]:
+        """The procedural attribute values of Eidolons start .. start + n - 1, one column per attribute."""
+        context = dict(self.context)
+        values = {}
+        for sampler in self.samplers:
+            values[sampler.attribute] = context[sampler.attribute] = sampler.sample_block(self.stream(tyche, sampler, start), n, context)
+        return values
+
+    def object_column(self, offset: int, n: int) -> List[Any]:
+        """n copies of one fixed object value (separate copies of lists and dicts)."""
+        value = self.objects[offset]
+        if offset not in self._mutable_offsets:
+            return [value] * n
+        if value == []:
+            return [[] for _ in range(n)]
+        if value == {}:
+            return [{} for _ in range(n)]
+        return [copy.deepcopy(value) for _ in range(n)]
+
 
 class TheAlembic:
     def __init__(self):
         self.loaded_hyle: Dict[str, Any] = {}
+        # The attribute layout of the Eidolons this Alembic creates (see EidolonSchema.from_hyle).
+        self.schema: EidolonSchema = DEFAULT_SCHEMA
+        # Procedural attributes are drawn from the stream ("alembic", definition id, attribute),
+        # at the position given by how many Eidolons of that definition were created before.
+        self.tyche = TheTyche()
+        self.spawn_counts: Dict[str, int] = {}
+        # definition id -> its compiled TemplateSampler
+        self.templates: Dict[str, TemplateSampler] = {}
 
     def load_hyle_file(self, hyle_path: str, section_name: str):
         """Loads a specific section (e.g., 'characters') from a TOML file into The Alembic's memory."""
@@ -18,7 +424,7 @@ class TheAlembic:
             with open(hyle_path, 'rb') as f: # tomllib requires binary mode
                 data = tomllib.load(f)
             if section_name in data:
-                self.loaded_hyle[section_name] = data[section_name]
+                self.load_hyle_section(section_name, data[section_name])
                 print(f"Successfully loaded '{section_name}' from {hyle_path}.")
             else:
                 print(f"Warning: Section '{section_name}' not found in {hyle_path}.")
@@ -27,45 +433,143 @@ class TheAlembic:
         except tomllib.TOMLDecodeError as e: # Updated exception name
             print(f"Error decoding TOML from {hyle_path}: {e}")
 
-    def create_eidolon(self, eidolon_id: str) -> Optional[Eidolon]:
-        """Creates an Eidolon instance based on a static or template definition from loaded Hyle."""
+    def load_hyle_section(self, section_name: str, section: Mapping[str, Any]):
+        """
+        Takes in an already read section (e.g. 'characters'). Parsed character definitions are all
+        compiled up front, so spawning never touches Hyle; a LazySection (see The Hermes) is left
+        lazy, and each definition is parsed and compiled when first used.
+        """
+        self.loaded_hyle[section_name] = section
+        if section_name == "characters":
+            self.templates.clear()
+            if not isinstance(section, LazySection):
+                for definition_id in section:
+                    self.compile_template(definition_id)
+
+    def compile_template(self, eidolon_id: str) -> Optional[TemplateSampler]:
+        """Returns the compiled sampler of a character definition, compiling it on first use."""
+        template = self.templates.get(eidolon_id)
+        if template is not None and template.schema is self.schema:
+            return template
         if "characters" not in self.loaded_hyle:
             print("Error: No character Hyle loaded. Please load a characters TOML file first.")
             return None
 
-        char_data = self.loaded_hyle["characters"].get(eidolon_id)
+        try:
+            char_data = self.loaded_hyle["characters"].get(eidolon_id)
+        except tomllib.TOMLDecodeError as e: # A lazy definition is only parsed now
+            print(f"Error decoding TOML of Eidolon definition '{eidolon_id}': {e}")
+            return None
         if not char_data:
             print(f"Error: Eidolon definition for '{eidolon_id}' not found in loaded Hyle.")
             return None
+        template = self.templates[eidolon_id] = TemplateSampler(eidolon_id, char_data, self.schema)
+        return template
+
+    def create_eidolon(self, eidolon_id: str) -> Optional[Eidolon]:
+        """Creates an Eidolon instance based on a static or template definition from loaded Hyle."""
+        template = self.compile_template(eidolon_id)
+        if template is None:
+            return None
 
-        name = char_data.get("name", eidolon_id) # Use ID as name if not specified
-        generation_type = char_data.get("generation_type", "static")
-
-        eidolon_kwargs = {"name": name}
-
-        # Process attributes based on generation type
-        for tier_name, tier_data in char_data.items():
-            if tier_name in ["core", "personality", "dynamic_states", "ledger"]:
-                for attr_name, attr_value_def in tier_data.items():
-                    if isinstance(attr_value_def, dict) and "type" in attr_value_def:
-                        # This is a procedural definition (e.g., range)
-                        if attr_value_def["type"] == "range":
-                            min_val = attr_value_def.get("min", 0)
-                            max_val = attr_value_def.get("max", 100)
-                            eidolon_kwargs[attr_name] = random.randint(min_val, max_val)
-                        # Add other procedural types here (e.g., weighted_list, formula)
-                    else:
-                        # This is a static value
-                        eidolon_kwargs[attr_name] = attr_value_def
+        spawn_index = self.spawn_counts.get(eidolon_id, 0)
+        self.spawn_counts[eidolon_id] = spawn_index + 1
+        # Fixed values the template rejected keep the schema default, as they do in spawn_batch()
+        eidolon_kwargs = {attribute: value for attribute, value in template.fixed.items() if attribute not in template.problems}
+        eidolon_kwargs.update(template.draw(self.tyche, spawn_index))
 
         # Instantiate Eidolon
-        eidolon = Eidolon(**eidolon_kwargs)
-        print(f"Created Eidolon: {eidolon.name} (Type: {generation_type})")
+        eidolon = Eidolon(template.name, schema=self.schema, **eidolon_kwargs)
+        print(f"Created Eidolon: {eidolon.name} (Type: {template.generation_type})")
         return eidolon
 
+    def spawn_batch(self, eidolon_id: str, n: int, seed: Optional[int] = None, nexus: Optional["TheNexus"] = None) -> List[Eidolon]:
+        """
+        Creates n Eidolons from one definition in a single call, named "<name> <k>" for the k-th one
+        spawned. Every procedural attribute is drawn for the whole batch at once, and the k-th Eidolon
+        gets the same values however the spawning is split into batches. With seed, values are drawn
+        from a Tyche with that master seed instead of this Alembic's. Given a Nexus, the Eidolons join
+        it directly (straight into its columns when it uses The Warp); otherwise the batch gets a Skein
+        of its own.
+        """
+        template = self.compile_template(eidolon_id)
+        if template is None or n <= 0:
+            return []
+        schema = self.schema
+        start = self.spawn_counts.get(eidolon_id, 0)
+        names = [f"{template.name} {k}" for k in range(start + 1, start + n + 1)]
+        if nexus is not None:
+            taken = [name for name in names if name in nexus.eidolons]
+            if taken:
+                raise ValueError(f"Eidolon with name {taken[0]} already exists in The Nexus.")
+        self.spawn_counts[eidolon_id] = start + n
+
+        tyche = self.tyche if seed is None else TheTyche(seed)
+        number_columns: Dict[int, Any] = {}
+        object_columns: Dict[int, Any] = {}
+        for attribute, values in template.draw_block(tyche, start, n).items():
+            slot = schema.slots.get(attribute)
+            if slot is None or attribute in schema.relations[slot[0]]:
+                continue
+            _, is_numeric, offset = slot
+            (number_columns if is_numeric else object_columns)[offset] = values
+
+        for offset in range(len(template.objects)):
+            if offset not in object_columns:
+                object_columns[offset] = template.object_column(offset, n)
+        skein = nexus.skein if nexus is not None else TheSkein()
+        ids = skein.register_many(names)
+        if nexus is not None and nexus.warp is not None:
+            # Straight into The Warp's columns; the Eidolons never get storage of their own.
+            for offset, value in enumerate(template.numbers):
+                number_columns.setdefault(offset, array("d", [value]) * n)
+            eidolons = [Eidolon.from_storage(name, skein, schema, None, None, eid) for name, eid in zip(names, ids)]
+            nexus.add_eidolons(eidolons, number_columns, object_columns)
+        else:
+            number_rows = self._number_rows(template, number_columns, n)
+            if object_columns:
+                object_rows = map(list, zip(*(object_columns[offset] for offset in range(len(template.objects)))))
+            else:
+                object_rows = ([] for _ in range(n))
+            eidolons = [
+                Eidolon.from_storage(name, skein, schema, numbers, objects, eid)
+                for name, eid, numbers, objects in zip(names, ids, number_rows, object_rows)
+            ]
+            if nexus is not None:
+                nexus.add_eidolons(eidolons)
+        for attribute, value in template.relations.items():
+            tier = schema.slots[attribute][0]
+            for eidolon in eidolons:
+                eidolon._write(tier, attribute, value)
+        return eidolons
+
+    @staticmethod
+    def _number_rows(template: TemplateSampler, columns: Dict[int, Any], n: int) -> List[array]:
+        """One numeric storage array per Eidolon: the template's fixed values with the drawn columns filled in."""
+        width = len(template.numbers)
+        if np is not None:
+            matrix = np.empty((n, width), dtype=float)
+            matrix[:] = np.frombuffer(template.numbers, dtype=float)
+            for offset, values in columns.items():
+                matrix[:, offset] = values
+            raw = matrix.tobytes()
+            step = width * 8
+            rows = []
+            for i in range(0, n * step, step):
+                row = array("d")
+                row.frombytes(raw[i:i + step])
+                rows.append(row)
+            return rows
+        rows = [array("d", template.numbers) for _ in range(n)]
+        for offset, values in columns.items():
+            for row, value in zip(rows, values):
+                row[offset] = value
+        return rows
+
 # Example Usage (for testing purposes)
 if __name__ == "__main__":
     alembic = TheAlembic()
+    alembic.tyche.reseed(7) # Same seed, same bandits
 
     # Create a dummy characters.toml file for testing
     dummy_characters_hyle_content = """
@@ -82,6 +586,14 @@ if __name__ == "__main__":
     core.strength = { type = "range", min = 8, max = 12 }
     core.agility = { type = "range", min = 10, max = 14 }
     personality.agreeableness = { type = "range", min = -20, max = 0 }
+    core.resilience = { type = "normal", mean = 10, stddev = 2, min = 4, max = 16, round = true }
+    core.composure = { type = "correlated", with = "resilience", correlation = 0.8, mean = 9, stddev = 3, min = 1, max = 20, round = true }
+    dynamic_states.emotional_state = { type = "weighted_list", options = ["neutral", "angry", "anxious"], weights = [5, 3, 2] }
+    dynamic_states.health = { type = "formula", expression = "50 + actor.core.resilience * 4", max = 100 }
+
+    [characters.boastful_bard]
+    name = "Boastful Bard"
+    core.charisma = "high"
     """
 
     with open("dummy_characters.toml", "w") as f:
@@ -109,5 +621,28 @@ if __name__ == "__main__":
         print(f"Bandit 2 Agility: {bandit2.core_attributes['agility']}")
         print(f"Bandit 2 Agreeableness: {bandit2.personality['agreeableness']}")
 
+    # Spawn a crowd of bandits in one call, continuing after the two created one at a time
+    crowd = alembic.spawn_batch("generic_bandit", 1000)
+    print(f"Spawned {len(crowd)} bandits; {crowd[0].name} strength: {crowd[0].core_attributes['strength']}")
+    print(f"Mean bandit agility: {sum(bandit.core_attributes['agility'] for bandit in crowd) / len(crowd):.2f}")
+    moods = [bandit.dynamic_states["emotional_state"] for bandit in crowd]
+    print(f"Bandit moods: {({mood: moods.count(mood) for mood in sorted(set(moods))})}")
+    if np is not None:
+        resilience = [bandit.core_attributes["resilience"] for bandit in crowd]
+        composure = [bandit.core_attributes["composure"] for bandit in crowd]
+        print(f"Resilience/composure correlation: {np.corrcoef(resilience, composure)[0, 1]:.2f}")
+    print(f"{crowd[0].name}: resilience {crowd[0].core_attributes['resilience']}, health {crowd[0].dynamic_states['health']}")
+
+    # Drawing one at a time gives the bandits spawned in bulk the same values
+    template = alembic.compile_template("generic_bandit")
+    single = template.draw(alembic.tyche, 2) # crowd[0] was the third bandit created
+    spawned = {attribute: getattr(crowd[0], alembic.schema.slots[attribute][0])[attribute] for attribute in single}
+    print(f"Bulk and single draws agree: {single == spawned}")
+
+    # A fixed value of the wrong type keeps the default, whichever way the Eidolon is spawned
+    bard = alembic.create_eidolon("boastful_bard")
+    bards = alembic.spawn_batch("boastful_bard", 1)
+    print(f"Bard charisma: {bard.core_attributes['charisma']} created, {bards[0].core_attributes['charisma']} spawned")
+
     import os
     os.remove("dummy_characters.toml")
@@ -0,0 +1,397 @@
+"""
+The Canon: The measure every piece of Hyle is held to before the world runs.
+This module validates a loaded game module in one pass: character definitions (unknown or
+misplaced attributes, values of the wrong type or outside their bounds, invalid procedural
+attributes), cards (challenge attributes, costs, and effect formulas that don't exist or don't
+compile) and the formulas themselves. The checks of each attribute are compiled once from the
+Eidolon schema into small validator functions. A module that passes is marked trusted, and The
+Moirai's hot path then skips its defensive checks.
+"""
+
+import difflib
+import math
+import re
+import tomllib # Requires Python 3.11+
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from the_loom.the_agon import EFFECT_SUBJECTS, OUTCOMES
+from the_loom.the_alembic import HYLE_TIERS, TheAlembic, UniformSampler, WeightedListSampler
+from the_loom.the_eidolon import HYLE_TIER_NAMES, EidolonSchema
+from the_loom.the_moirai import DerivedStats, TheMoirai, compile_formula
+
+# Keys of a character definition besides its attribute tiers.
+CHARACTER_FIELDS = {"name", "generation_type", "description"}
+GENERATION_TYPES = {"static", "template"}
+
+# Keys of a card definition, and of each of its effects (see The Agon).
+CARD_FIELDS = {"name", "icon", "type", "description", "challenge_attribute", "modifiers", "difficulty", "utility", "effects", "costs"}
+EFFECT_FIELDS = {"description", "formula", "scale", "affects", "attribute", "affinity", "state"}
+
+# Schema tier -> the name The Hyle uses for it (e.g. "core_attributes" -> "core").
+TIER_HYLE_NAMES = {tier: hyle_tier for hyle_tier, tier in HYLE_TIER_NAMES.items() if hyle_tier in HYLE_TIERS}
+
+_FORMULA_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# A validator returns what is wrong with a value, or None if it is valid.
+Validator = Callable[[Any], Optional[str]]
+
+class CanonError(ValueError):
+    """Raised when a game module's Hyle breaks The Canon; `problems` lists every violation found."""
+
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__(f"{len(problems)} problem(s) in The Hyle:\n" + "\n".join(f"  - {problem}" for problem in problems))
+
+
+def _describe(value: Any) -> str:
+    return f"{type(value).__name__} {value!r}"
+
+def compile_validator(default: Any, bounds: Optional[Tuple[float, float]] = None, relation: bool = False) -> Validator:
+    """Compiles the check of one attribute from its schema default: numbers within bounds, other values of the default's type."""
+    if relation: # e.g. grievances: {other Eidolon's name: amount}
+        def validate_relation(value: Any) -> Optional[str]:
+            if not isinstance(value, dict):
+                return f"expected a table of names to numbers, got {_describe(value)}"
+            for name, amount in value.items():
+                if type(amount) not in (int, float):
+                    return f"expected a number for '{name}', got {_describe(amount)}"
+            return None
+        return validate_relation
+    if isinstance(default, (int, float)) and not isinstance(default, bool):
+        low, high = bounds if bounds is not None else (-math.inf, math.inf)
+        def validate_number(value: Any) -> Optional[str]:
+            if type(value) not in (int, float):
+                return f"expected a number, got {_describe(value)}"
+            if not low <= value <= high: # NaN fails too
+                return f"{value} is outside [{low}, {high}]"
+            return None
+        return validate_number
+    if default is None:
+        return lambda value: None
+    expected = type(default)
+    def validate_object(value: Any) -> Optional[str]:
+        if not isinstance(value, expected):
+            return f"expected {expected.__name__}, got {_describe(value)}"
+        return None
+    return validate_object
+
+
+class TheCanon:
+    def __init__(self, schema: EidolonSchema, moirai: Optional[TheMoirai] = None, bounds: Optional[Dict[str, Any]] = None):
+        self.schema = schema
+        self.moirai = moirai
+        constants = moirai.constants if moirai is not None else {}
+        # [attribute_bounds] of game_config.toml: {attribute or Hyle tier: [min, max]}
+        if bounds is None:
+            bounds = constants.get("attribute_bounds", {})
+        # Card types the module declares ([card_types]), lower-cased; any type is accepted if none are.
+        self.card_types = {card_type.lower() for card_type in constants.get("card_types", {})}
+        # attribute -> (low, high) for numeric attributes with bounds
+        self.bounds: Dict[str, Tuple[float, float]] = {}
+        # attribute -> its compiled validator
+        self.validators: Dict[str, Validator] = {}
+        for tier, attributes in schema.tiers.items():
+            for attribute, default in attributes.items():
+                limits = bounds.get(attribute, bounds.get(TIER_HYLE_NAMES.get(tier, tier)))
+                if limits is not None:
+                    if len(limits) != 2 or limits[0] > limits[1]:
+                        raise ValueError(f"Invalid bounds {limits!r} for '{attribute}' in attribute_bounds.")
+                    self.bounds[attribute] = (limits[0], limits[1])
+                self.validators[attribute] = compile_validator(
+                    default, self.bounds.get(attribute), attribute in schema.relations[tier],
+                )
+
+    def is_numeric(self, attribute: str) -> bool:
+        slot = self.schema.slots.get(attribute)
+        return slot is not None and slot[1]
+
+    def _unknown(self, attribute: str) -> str:
+        close = difflib.get_close_matches(attribute, self.schema.slots, n=1)
+        return f"unknown attribute '{attribute}'" + (f" (did you mean '{close[0]}'?)" if close else "")
+
+    # --- Characters ---
+
+    def validate_characters(self, section: Mapping[str, Any], alembic: Optional[TheAlembic] = None) -> List[str]:
+        """Checks every character definition; with an Alembic, its procedural attributes are compiled (and kept) too."""
+        problems: List[str] = []
+        for definition_id in section:
+            where = f"characters.{definition_id}"
+            try:
+                definition = section[definition_id]
+            except tomllib.TOMLDecodeError as e:
+                problems.append(f"{where}: invalid TOML: {e}")
+                continue
+            if not isinstance(definition, dict):
+                problems.append(f"{where}: expected a table, got {_describe(definition)}")
+                continue
+            for key, value in definition.items():
+                if key in HYLE_TIERS:
+                    if isinstance(value, dict):
+                        problems.extend(self._validate_tier(f"{where}.{key}", key, value))
+                    else:
+                        problems.append(f"{where}.{key}: expected a table of attributes, got {_describe(value)}")
+                elif key not in CHARACTER_FIELDS:
+                    problems.append(f"{where}: unknown field '{key}'")
+            if definition.get("generation_type", "static") not in GENERATION_TYPES:
+                problems.append(f"{where}.generation_type: expected one of {sorted(GENERATION_TYPES)}, got {definition['generation_type']!r}")
+            if alembic is not None:
+                template = alembic.compile_template(definition_id)
+                if template is not None:
+                    # Fixed values were checked above; the template adds what only compiling reveals
+                    problems.extend(
+                        f"{where}.{attribute}: {problem}" for attribute, problem in template.problems.items()
+                        if attribute not in template.fixed
+                    )
+                    problems.extend(self._validate_samplers(where, template.samplers))
+        return problems
+
+    def _validate_tier(self, where: str, hyle_tier: str, attributes: Dict[str, Any]) -> List[str]:
+        problems = []
+        tier = HYLE_TIER_NAMES[hyle_tier]
+        for attribute, value in attributes.items():
+            slot = self.schema.slots.get(attribute)
+            if slot is None:
+                problems.append(f"{where}: {self._unknown(attribute)}")
+            elif slot[0] != tier:
+                problems.append(f"{where}: '{attribute}' belongs in '{TIER_HYLE_NAMES[slot[0]]}', not '{hyle_tier}'")
+            elif isinstance(value, dict) and "type" in value:
+                if value["type"] not in ("weighted_list",) and not slot[1]:
+                    problems.append(f"{where}.{attribute}: '{value['type']}' draws numbers, but '{attribute}' is not numeric")
+            else:
+                message = self.validators[attribute](value)
+                if message is not None:
+                    problems.append(f"{where}.{attribute}: {message}")
+        return problems
+
+    def _validate_samplers(self, where: str, samplers: List[Any]) -> List[str]:
+        """Range sanity of compiled procedural attributes: every value they can draw must pass the attribute's validator."""
+        problems = []
+        for sampler in samplers:
+            attribute = sampler.attribute
+            if isinstance(sampler, WeightedListSampler):
+                for option in sampler.options:
+                    message = self.validators[attribute](option)
+                    if message is not None:
+                        problems.append(f"{where}.{attribute}: option {message}")
+                        break
+                continue
+            bounds = self.bounds.get(attribute)
+            if bounds is None or not self.is_numeric(attribute):
+                continue
+            low, high = sampler.low, sampler.high
+            if isinstance(sampler, UniformSampler) and not sampler.integer:
+                high = math.nextafter(high, -math.inf) # [min, max)
+            if low is None or high is None:
+                problems.append(f"{where}.{attribute}: unbounded values may fall outside {list(bounds)}; add 'min' and 'max'")
+            elif low < bounds[0] or high > bounds[1]:
+                problems.append(f"{where}.{attribute}: draws in [{low}, {high}], outside {list(bounds)}")
+        return problems
+
+    # --- Cards ---
+
+    def validate_cards(self, section: Mapping[str, Any]) -> List[str]:
+        """Checks every card; formulas embedded as expressions are compiled into The Moirai on the way."""
+        problems: List[str] = []
+        for card_id in section:
+            where = f"cards.{card_id}"
+            try:
+                card = section[card_id]
+            except tomllib.TOMLDecodeError as e:
+                problems.append(f"{where}: invalid TOML: {e}")
+                continue
+            for key in card:
+                if key not in CARD_FIELDS:
+                    problems.append(f"{where}: unknown field '{key}'")
+            if "name" not in card:
+                problems.append(f"{where}: missing 'name'")
+            card_type = card.get("type")
+            if self.card_types and (not isinstance(card_type, str) or card_type.lower() not in self.card_types):
+                problems.append(f"{where}.type: expected one of {sorted(self.card_types)}, got {card_type!r}")
+            challenge = card.get("challenge_attribute")
+            if challenge is not None:
+                if challenge not in self.schema.slots:
+                    problems.append(f"{where}.challenge_attribute: {self._unknown(challenge)}")
+                elif not self.is_numeric(challenge):
+                    problems.append(f"{where}.challenge_attribute: '{challenge}' is not numeric")
+            effects = card.get("effects", {})
+            if not isinstance(effects, dict):
+                problems.append(f"{where}.effects: expected a table of outcomes, got {_describe(effects)}")
+                effects = {}
+            modifiers = card.get("modifiers", [])
+            if not isinstance(modifiers, list):
+                problems.append(f"{where}.modifiers: expected a list of formulas, got {_describe(modifiers)}")
+                modifiers = []
+            for i, modifier in enumerate(modifiers):
+                problems.extend(self._validate_reference(f"{where}.modifiers[{i}]", modifier))
+            difficulty = card.get("difficulty")
+            if isinstance(difficulty, str):
+                problems.extend(self._validate_reference(f"{where}.difficulty", difficulty))
+            elif difficulty is not None and (type(difficulty) not in (int, float) or not math.isfinite(difficulty)):
+                problems.append(f"{where}.difficulty: expected a number or a formula, got {_describe(difficulty)}")
+            if "utility" in card:
+                problems.extend(self._validate_reference(f"{where}.utility", card["utility"]))
+            for outcome, effect in effects.items():
+                if outcome not in OUTCOMES[1:]:
+                    problems.append(f"{where}.effects: unknown outcome '{outcome}', expected one of {list(OUTCOMES[1:])}")
+                if not isinstance(effect, dict) or "formula" not in effect:
+                    problems.append(f"{where}.effects.{outcome}: missing 'formula'")
+                    continue
+                problems.extend(self._validate_effect(f"{where}.effects.{outcome}", effect))
+            costs = card.get("costs", {})
+            if not isinstance(costs, dict):
+                problems.append(f"{where}.costs: expected a table of attributes, got {_describe(costs)}")
+                costs = {}
+            for attribute, cost in costs.items():
+                if attribute not in self.schema.slots:
+                    problems.append(f"{where}.costs: {self._unknown(attribute)}")
+                elif not self.is_numeric(attribute):
+                    problems.append(f"{where}.costs.{attribute}: '{attribute}' is not numeric")
+                elif isinstance(cost, str):
+                    problems.extend(self._validate_reference(f"{where}.costs.{attribute}", cost))
+                elif type(cost) not in (int, float) or not math.isfinite(cost):
+                    problems.append(f"{where}.costs.{attribute}: expected a number or a formula, got {_describe(cost)}")
+        return problems
+
+    def _validate_effect(self, where: str, effect: Dict[str, Any]) -> List[str]:
+        problems = self._validate_reference(f"{where}.formula", effect["formula"])
+        for key in effect:
+            if key not in EFFECT_FIELDS:
+                problems.append(f"{where}: unknown field '{key}'")
+        scale = effect.get("scale", 1)
+        if type(scale) not in (int, float) or not math.isfinite(scale):
+            problems.append(f"{where}.scale: expected a number, got {_describe(scale)}")
+        if effect.get("affects", "target") not in EFFECT_SUBJECTS:
+            problems.append(f"{where}.affects: expected one of {list(EFFECT_SUBJECTS)}, got {effect['affects']!r}")
+        attribute = effect.get("attribute")
+        if attribute is not None:
+            if attribute not in self.schema.slots:
+                problems.append(f"{where}.attribute: {self._unknown(attribute)}")
+            elif not self.is_numeric(attribute):
+                problems.append(f"{where}.attribute: '{attribute}' is not numeric")
+        if "affinity" in effect and not isinstance(effect["affinity"], str):
+            problems.append(f"{where}.affinity: expected an affinity type, got {_describe(effect['affinity'])}")
+        state = effect.get("state", {})
+        if not isinstance(state, dict):
+            problems.append(f"{where}.state: expected a table of attributes, got {_describe(state)}")
+            state = {}
+        for attribute, value in state.items():
+            if attribute not in self.schema.slots:
+                problems.append(f"{where}.state: {self._unknown(attribute)}")
+                continue
+            message = self.validators[attribute](value)
+            if message is not None:
+                problems.append(f"{where}.state.{attribute}: {message}")
+        return problems
+
+    def _validate_reference(self, where: str, reference: Any) -> List[str]:
+        """A formula name or an inline expression, as cards give them."""
+        if not isinstance(reference, str):
+            return [f"{where}: expected a formula name or expression, got {_describe(reference)}"]
+        moirai = self.moirai
+        if moirai is None or reference in moirai.compiled:
+            return []
+        if reference in moirai.formulas:
+            return [f"{where}: formula '{reference}' does not compile"]
+        if _FORMULA_NAME.match(reference):
+            close = difflib.get_close_matches(reference, moirai.formulas, n=1)
+            return [f"{where}: undefined formula '{reference}'" + (f" (did you mean '{close[0]}'?)" if close else "")]
+        try:
+            moirai.ensure_formula(reference) # Compiled now rather than at its first play
+        except ValueError as e:
+            return [f"{where}: {e}"]
+        return []
+
+    # --- Formulas ---
+
+    def validate_formulas(self) -> List[str]:
+        """Every formula and derived stat of The Moirai must compile."""
+        moirai = self.moirai
+        if moirai is None:
+            return []
+        problems = []
+        for formula_name, expression in moirai.formulas.items():
+            if formula_name in moirai.compiled:
+                continue
+            try:
+                compile_formula(formula_name, expression, moirai.compiled.get, moirai.constants, moirai.schema)
+            except ValueError as e:
+                problems.append(f"formulas.{formula_name}: {e}")
+            else: # Compiles alone, so something it references doesn't
+                problems.append(f"formulas.{formula_name}: references a formula that does not compile")
+        declarations = moirai.constants.get("derived_stats")
+        if declarations is not None:
+            try:
+                DerivedStats(moirai).load(declarations)
+            except ValueError as e:
+                problems.append(f"derived_stats: {e}")
+        return problems
+
+    # --- Whole modules ---
+
+    def validate(self, alembic: TheAlembic) -> List[str]:
+        """Every problem in the module loaded into the Alembic (and this Canon's Moirai)."""
+        return (
+            self.validate_formulas()
+            + self.validate_characters(alembic.loaded_hyle.get("characters", {}), alembic)
+            + self.validate_cards(alembic.loaded_hyle.get("cards", {}))
+        )
+
+    def enforce(self, alembic: TheAlembic):
+        """Raises CanonError listing every problem found; otherwise marks The Moirai trusted."""
+        problems = self.validate(alembic)
+        if problems:
+            if self.moirai is not None:
+                self.moirai.trusted = False
+            raise CanonError(problems)
+        if self.moirai is not None:
+            self.moirai.trusted = True
+
+# Example Usage (for testing purposes)
+if __name__ == "__main__":
+    from the_loom.the_chorus import load_game_module
+
+    alembic, moirai = load_game_module("kismet_social", use_cache=False)
+    canon = TheCanon(alembic.schema, moirai)
+    canon.enforce(alembic)
+    print(f"kismet_social follows The Canon; The Moirai is trusted: {moirai.trusted}")
+
+    # A careless balancing pass
+    broken_characters = tomllib.loads("""
+    [characters.sir_typo]
+    name = "Sir Typo"
+    generation_type = "static"
+    core.strenght = 12
+    core.charisma = "high"
+    personality.resilience = 4
+    dynamic_states.health = 250
+
+    [characters.wild_template]
+    generation_type = "template"
+    core.agility = { type = "normal", mean = 10, stddev = 3 }
+    core.perception = { type = "range", min = 0, max = 99 }
+    dynamic_states.emotional_state = { type = "weighted_list", options = ["calm", 3], weights = [1, 1] }
+    """)["characters"]
+    broken_cards = tomllib.loads("""
+    [cards.shout]
+    name = "Shout"
+    type = "Action"
+    challenge_attribute = "volume"
+
+    [cards.shout.effects.success]
+    formula = "affinity_change_platonic_sucess"
+
+    [cards.shout.effects.failure]
+    formula = "actor.core.charisma *"
+    affects = "everyone"
+    state = { emotional_state = 3 }
+
+    [cards.shout.costs]
+    social_battery = "social_battery_drain_light"
+    emotional_state = 1
+    """)["cards"]
+    alembic.load_hyle_section("characters", broken_characters)
+    alembic.load_hyle_section("cards", broken_cards)
+    try:
+        canon.enforce(alembic)
+    except CanonError as e:
+        print(e)
+    print(f"The Moirai is trusted: {moirai.trusted}")
@@ -0,0 +1,181 @@
+"""
+The Chorus: Runs many independent performances of the same game module side by side.
+This module loads a game module without The Loomwright, plays seeded simulations of it in fresh
+Nexus instances, and fans an ensemble of them out over a process pool (e.g. for balance testing),
+streaming each run's summary back as soon as it finishes.
+"""
+
+import contextlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+from the_loom.the_alembic import TheAlembic
+from the_loom.the_canon import TheCanon
+from the_loom.the_eidolon import EidolonSchema
+from the_loom.the_hermes import CONFIG_FILE, TheHermes
+from the_loom.the_mnemosyne import TheMnemosyne
+from the_loom.the_moirai import TheMoirai
+from the_loom.the_nexus import TheNexus
+
+# Where game modules named by their directory name (e.g. "kismet_social") are found.
+GAME_MODULES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "game_modules"))
+
+# setup(nexus, moirai, seed) prepares a run (e.g. registers Horae phases) before time advances.
+Setup = Callable[[TheNexus, TheMoirai, int], Any]
+# summarize(nexus, moirai) returns the values reported for a finished run.
+Summarize = Callable[[TheNexus, TheMoirai], Dict[str, Any]]
+
+def resolve_game_module(module: str) -> str:
+    """Returns the directory of a game module given its name or a path to it."""
+    if os.path.isdir(module):
+        return os.path.abspath(module)
+    path = os.path.join(GAME_MODULES_DIR, module)
+    if not os.path.isdir(path):
+        raise ValueError(f"Game module '{module}' not found at {path}")
+    return path
+
+def load_game_module(
+    module: str, use_cache: bool = True, validate: bool = False, derived_stats: bool = True,
+) -> Tuple[TheAlembic, TheMoirai]:
+    """
+    Loads a game module's Hyle into a new Alembic and Moirai (see load_game_module_into).
+    """
+    alembic = TheAlembic()
+    moirai = TheMoirai()
+    load_game_module_into(alembic, moirai, resolve_game_module(module), use_cache, validate, derived_stats)
+    return alembic, moirai
+
+def load_game_module_into(
+    alembic: TheAlembic, moirai: TheMoirai, path: str, use_cache: bool = True, validate: bool = False, derived_stats: bool = True,
+):
+    """
+    Loads the Hyle of the game module at path into an Alembic and a Moirai, as The Loomwright does:
+    every TOML file is read concurrently, with character and card definitions parsed on first use
+    (see The Hermes). Unless use_cache is False, an unchanged module is loaded from its Hyle cache
+    instead (see The Mnemosyne). With validate, the module is held to The Canon, which raises
+    CanonError listing every problem or leaves The Moirai trusted. Unless derived_stats is False,
+    The Moirai tracks the derived stats the module declares. Raises ValueError for a game
+    configuration that can't be read or laid out.
+    """
+    mnemosyne = TheMnemosyne(path) if use_cache else None
+    if mnemosyne is None or not mnemosyne.recall(alembic, moirai):
+        hermes = TheHermes(path)
+        hyle = hermes.load()
+        game_config = hyle.get(CONFIG_FILE)
+        if game_config is not None:
+            try:
+                schema = EidolonSchema.from_hyle(game_config)
+            except ValueError as e:
+                raise ValueError(f"Error in {CONFIG_FILE}: {e}") from None
+            alembic.schema = schema
+            moirai.constants = game_config
+            moirai.set_schema(schema)
+        elif os.path.exists(os.path.join(path, CONFIG_FILE)):
+            raise ValueError(f"{CONFIG_FILE} of game module {path} could not be read.") # The error was reported by The Hermes
+        else:
+            print(f"Warning: {CONFIG_FILE} not found in {path}")
+        sections = hermes.sections(hyle)
+        if "formulas" not in sections:
+            print(f"Warning: No 'formulas' section found in {path}.")
+        moirai.load_formulas(sections.get("formulas", {}), path)
+        for section_name in ("characters", "cards"):
+            if section_name in sections:
+                alembic.load_hyle_section(section_name, sections[section_name])
+            else:
+                print(f"Warning: Section '{section_name}' not found in {path}.")
+        if mnemosyne is not None:
+            mnemosyne.remember(alembic, moirai)
+    if derived_stats and "derived_stats" in moirai.constants:
+        moirai.enable_derived_stats()
+    if validate:
+        TheCanon(alembic.schema, moirai).enforce(alembic)
+
+def cast_characters(alembic: TheAlembic, nexus: TheNexus):
+    """Adds one Eidolon of every character the game module defines to the Nexus."""
+    for character_id in alembic.loaded_hyle.get("characters", {}):
+        eidolon = alembic.create_eidolon(character_id)
+        if eidolon is not None:
+            nexus.add_eidolon(eidolon)
+
+def summarize_attributes(nexus: TheNexus, moirai: TheMoirai) -> Dict[str, Any]:
+    """The default run summary: the mean of every numeric attribute across the Nexus's Eidolons."""
+    summary: Dict[str, Any] = {}
+    eidolons = list(nexus.get_all_eidolons().values())
+    if not eidolons:
+        return summary
+    for attribute, (tier, is_numeric, offset) in moirai.schema.slots.items():
+        if is_numeric:
+            summary[f"mean_{attribute}"] = sum(eidolon._numbers[offset] for eidolon in eidolons) / len(eidolons)
+    return summary
+
+def run_simulation(
+    module: str,
+    seed: int,
+    ticks: int,
+    setup: Optional[Setup] = None,
+    summarize: Optional[Summarize] = None,
+    quiet: bool = False,
+    trusted: bool = False,
+) -> Dict[str, Any]:
+    """
+    Plays one seeded run of a game module in a fresh Nexus: every character it defines is created,
+    setup runs, then time advances `ticks` ticks. Returns the run's summary. Pass trusted if the
+    module was already held to The Canon (as run_ensemble does), so formulas skip their checks.
+    """
+    output = io.StringIO() if quiet else None
+    with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+        alembic, moirai = load_game_module(module)
+        try:
+            moirai.trusted = trusted
+            alembic.tyche.reseed(seed)
+            nexus = TheNexus()
+            cast_characters(alembic, nexus)
+            if setup is not None:
+                setup(nexus, moirai, seed)
+            events_fired = nexus.advance_time(ticks)
+            nexus.calculate_derived_stats(moirai)
+            summary: Dict[str, Any] = {"seed": seed, "ticks": nexus.time, "eidolons": len(nexus.eidolons), "events_fired": events_fired}
+            summary.update((summarize or summarize_attributes)(nexus, moirai))
+        finally: # Unhook the run's derived stats from its schema even when setup or a tick fails
+            moirai.disable_derived_stats()
+    return summary
+
+def run_ensemble(
+    module: str,
+    seeds: Iterable[int],
+    ticks: int,
+    workers: Optional[int] = None,
+    setup: Optional[Setup] = None,
+    summarize: Optional[Summarize] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Runs one simulation per seed over a pool of `workers` processes and yields each run's summary
+    as it completes (not in seed order). A run that fails yields {"seed": ..., "error": ...}.
+    setup and summarize must be module-level functions so they can be sent to the workers.
+    The module is held to The Canon once, before any worker starts (raising CanonError), and the
+    runs then trust it.
+    """
+    module = resolve_game_module(module)
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_game_module(module, validate=True, derived_stats=False)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        runs = {
+            pool.submit(run_simulation, module, seed, ticks, setup, summarize, True, True): seed
+            for seed in seeds
+        }
+        for run in as_completed(runs):
+            error = run.exception()
+            if error is not None:
+                yield {"seed": runs[run], "error": repr(error)}
+            else:
+                yield run.result()
+
+# Example Usage (for testing purposes)
+if __name__ == "__main__":
+    summaries = sorted(run_ensemble("kismet_social", seeds=range(4), ticks=10, workers=2), key=lambda summary: summary["seed"])
+    for summary in summaries:
+        print(f"Seed {summary['seed']}: {summary['eidolons']} Eidolons after {summary['ticks']} ticks, "
+              f"mean charisma {summary['mean_charisma']:.2f}, mean reputation {summary['mean_reputation']:.2f}")
+    repeat = run_simulation("kismet_social", seed=2, ticks=10, quiet=True)
+    print(f"Seed 2 reproduces: {repeat == summaries[2]}")
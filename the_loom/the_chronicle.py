@@ -0,0 +1,434 @@
+"""
+The Chronicle: Writes down everything that befalls the Eidolons of a Nexus, so it can be told again.
+This module keeps an append-only binary journal of a running Nexus: every attribute written to one
+of its Eidolons, every relationship (affinity or grievance) written in its Skein, every Eidolon
+joining or leaving it, and the tick each of them happened on. Every `checkpoint_every` ticks the
+journal also holds a full checkpoint of the Nexus, so that the state at any tick is rebuilt by
+loading the nearest checkpoint before it and replaying only the records written since, rather
+than simulating again from tick 0.
+
+The journal is a sequence of records, each a type byte and a fixed-layout body. Names (of
+Eidolons, tiers, attributes, relationship types, string values) are written once per segment and
+referred to by number afterwards; a checkpoint starts a new segment, so replay can begin at any
+checkpoint. The offsets of the checkpoints are also appended to an index file next to the journal.
+"""
+
+import mmap
+import os
+import pickle
+import struct
+from array import array
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+from the_loom.the_eidolon import Eidolon, EidolonSchema
+from the_loom.the_nexus import TheNexus
+from the_loom.the_skein import TheSkein, split_edge_key
+
+_MAGIC = b"LOOMCHRN"
+JOURNAL_FORMAT = 1
+
+# Record types
+_NAME = b"N"        # name number, length, UTF-8 name
+_SCHEMA = b"S"      # schema number, length, pickled EidolonSchema
+_TICK = b"T"        # the tick the records after it happened on
+_WRITE = b"W"       # Eidolon, tier, attribute (name numbers), value
+_RELATION = b"R"    # source, target, relationship type (name numbers), value (absent: removed)
+_EIDOLON = b"E"     # Eidolon (name number), schema number, length, pickled (numbers, objects)
+_DEPART = b"D"      # Eidolon (name number) that left the Nexus
+_CHECKPOINT = b"C"  # tick, length, pickled snapshot of the Nexus
+
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_WRITE_HEAD = struct.Struct("<III")
+_RELATION_HEAD = struct.Struct("<III")
+_EIDOLON_HEAD = struct.Struct("<III")
+_CHECKPOINT_HEAD = struct.Struct("<qI")
+_INDEX_ENTRY = struct.Struct("<qQ")
+
+# Value tags
+_FLOAT, _INT, _STRING, _OBJECT, _REMOVED = b"d", b"q", b"s", b"o", b"x"
+
+class TheChronicle:
+    def __init__(self, nexus: TheNexus, path: str, checkpoint_every: int = 100):
+        self.nexus = nexus
+        self.path = path
+        self.index_path = f"{path}.index"
+        self.checkpoint_every = checkpoint_every
+        self.file: Optional[BinaryIO] = None
+        # The Skein whose relationships are recorded: the Nexus's when recording started
+        self.skein: Optional[TheSkein] = None
+        # The numbers names and schemas were given in the current segment
+        self.names: Dict[str, int] = {}
+        self.schemas: Dict[int, Tuple[int, EidolonSchema]] = {}
+        # The Eidolons the journal knows to be in the Nexus, by name
+        self.known: Dict[str, Eidolon] = {}
+        self.tick: Optional[int] = None
+        self.records = 0
+
+    # --- Writing ---
+
+    def start(self):
+        """Opens the journal for appending, writes a first checkpoint and starts recording."""
+        if self.file is not None:
+            return
+        new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self.file = open(self.path, "ab")
+        if new:
+            self.file.write(_MAGIC + bytes([JOURNAL_FORMAT]))
+        self.checkpoint()
+        self.nexus.add_write_observer(self.on_write)
+        self.skein = self.nexus.skein
+        self.skein.add_relation_observer(self.on_relation)
+        self.nexus.horae.add_phase("chronicle", self._end_of_tick)
+
+    def stop(self):
+        if self.file is None:
+            return
+        self.nexus.remove_write_observer(self.on_write)
+        self.skein.remove_relation_observer(self.on_relation)
+        self.nexus.horae.remove_phase("chronicle")
+        self.file.close()
+        self.file = None
+
+    def _name(self, name: str) -> int:
+        number = self.names.get(name)
+        if number is None:
+            number = self.names[name] = len(self.names)
+            encoded = name.encode("utf-8")
+            self.file.write(_NAME + _U32.pack(number) + _U32.pack(len(encoded)) + encoded)
+        return number
+
+    def _schema(self, schema: EidolonSchema) -> int:
+        entry = self.schemas.get(id(schema))
+        if entry is None:
+            entry = self.schemas[id(schema)] = (len(self.schemas), schema)
+            data = pickle.dumps(schema, protocol=pickle.HIGHEST_PROTOCOL)
+            self.file.write(_SCHEMA + _U32.pack(entry[0]) + _U32.pack(len(data)) + data)
+        return entry[0]
+
+    def _value(self, value: Any) -> bytes:
+        kind = type(value)
+        if kind is float:
+            return _FLOAT + _F64.pack(value)
+        if kind is int and -2 ** 63 <= value < 2 ** 63:
+            return _INT + _I64.pack(value)
+        if kind is str:
+            return _STRING + _U32.pack(self._name(value))
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        return _OBJECT + _U32.pack(len(data)) + data
+
+    def _mark_tick(self):
+        tick = self.nexus.horae.tick
+        if tick != self.tick:
+            self.tick = tick
+            self.file.write(_TICK + _I64.pack(tick))
+
+    def _eidolon(self, eidolon: Eidolon):
+        """Writes down a whole Eidolon (one that joined the Nexus, or was written whole)."""
+        self._mark_tick()
+        data = pickle.dumps((list(eidolon._numbers), list(eidolon._objects)), protocol=pickle.HIGHEST_PROTOCOL)
+        self.file.write(_EIDOLON + _EIDOLON_HEAD.pack(self._name(eidolon.name), self._schema(eidolon.schema), len(data)) + data)
+        self.known[eidolon.name] = eidolon
+        self.records += 1
+
+    def on_write(self, eidolon: Eidolon, tier: Optional[str], key: Optional[str], value: Any):
+        """Write observer: records writes to the Nexus's Eidolons (relationships are recorded by on_relation)."""
+        if self.known.get(eidolon.name) is not eidolon:
+            if self.nexus.eidolons.get(eidolon.name) is eidolon:
+                self._eidolon(eidolon) # Joined since the last tick
+            return
+        if tier is None:
+            self._eidolon(eidolon)
+            return
+        if tier == "affinities" or key in eidolon.schema.relations.get(tier, ()):
+            return
+        self._mark_tick()
+        self.file.write(_WRITE + _WRITE_HEAD.pack(self._name(eidolon.name), self._name(tier), self._name(key)) + self._value(value))
+        self.records += 1
+
+    def on_relation(self, skein: TheSkein, source_id: int, target_id: int, affinity_type: str, value: Any):
+        """Relation observer: records the relationships written in the Nexus's Skein."""
+        if skein is not self.nexus.skein:
+            return
+        source, target = skein.name_of(source_id), skein.name_of(target_id)
+        if source is None or target is None:
+            return
+        self._mark_tick()
+        head = _RELATION_HEAD.pack(self._name(source), self._name(target), self._name(affinity_type))
+        self.file.write(_RELATION + head + (_REMOVED if value is None else self._value(value)))
+        self.records += 1
+
+    def _end_of_tick(self, tick: int):
+        """Horae phase: records the tick, Eidolons that joined or left without being written, and checkpoints."""
+        self._mark_tick()
+        eidolons = self.nexus.eidolons
+        for name, eidolon in eidolons.items():
+            if self.known.get(name) is not eidolon:
+                self._eidolon(eidolon)
+        if len(self.known) != len(eidolons):
+            for name in [name for name in self.known if name not in eidolons]:
+                self.file.write(_DEPART + _U32.pack(self._name(name)))
+                del self.known[name]
+                self.records += 1
+        if self.checkpoint_every and tick % self.checkpoint_every == 0:
+            self.checkpoint()
+        self.file.flush()
+
+    def checkpoint(self):
+        """Writes the whole Nexus down and starts a new segment."""
+        nexus = self.nexus
+        skein = nexus.skein
+        schemas: List[EidolonSchema] = []
+        numbers: Dict[int, int] = {}
+        for eidolon in nexus.eidolons.values():
+            if id(eidolon.schema) not in numbers:
+                numbers[id(eidolon.schema)] = len(schemas)
+                schemas.append(eidolon.schema)
+        snapshot = {
+            "schemas": schemas,
+            "eidolons": [
+                (eidolon.name, numbers[id(eidolon.schema)], list(eidolon._numbers), list(eidolon._objects))
+                for eidolon in nexus.eidolons.values()
+            ],
+            "relations": {
+                kind: [
+                    (skein.name_of(source), skein.name_of(target), value)
+                    for (source, target), value in zip(map(split_edge_key, edges), edges.values())
+                    if skein.name_of(source) is not None and skein.name_of(target) is not None
+                ]
+                for kind, edges in skein.edges.items() if edges
+            },
+        }
+        data = pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+        tick = nexus.horae.tick
+        self.file.flush()
+        offset = self.file.tell()
+        self.file.write(_CHECKPOINT + _CHECKPOINT_HEAD.pack(tick, len(data)) + data)
+        self.file.flush()
+        with open(self.index_path, "ab") as index:
+            index.write(_INDEX_ENTRY.pack(tick, offset))
+        self.names = {}
+        self.schemas = {id(schema): (i, schema) for i, schema in enumerate(schemas)}
+        self.known = dict(nexus.eidolons)
+        self.tick = tick
+        self.records += 1
+
+    # --- Reading ---
+
+    @staticmethod
+    def checkpoints(path: str) -> List[Tuple[int, int]]:
+        """The (tick, offset) of every checkpoint of a journal, from its index or, without one, by reading it."""
+        index_path = f"{path}.index"
+        if os.path.exists(index_path):
+            with open(index_path, "rb") as index:
+                data = index.read()
+            usable = len(data) - len(data) % _INDEX_ENTRY.size
+            return [_INDEX_ENTRY.unpack_from(data, i) for i in range(0, usable, _INDEX_ENTRY.size)]
+        return [(record[1], offset) for offset, record in TheChronicle.read(path) if record[0] == "checkpoint"]
+
+    @staticmethod
+    def read(path: str, offset: Optional[int] = None) -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+        """
+        Yields (offset, record) for every record of a journal from offset (a checkpoint's) to its end, decoded:
+        ("tick", tick), ("write", eidolon, tier, attribute, value), ("relation", source, target, type, value),
+        ("eidolon", name, schema, numbers, objects), ("depart", name) or ("checkpoint", tick, snapshot).
+        A record cut short (e.g. by a crash while writing) ends the journal.
+        """
+        with open(path, "rb") as f:
+            header = f.read(len(_MAGIC) + 1)
+            if header[:len(_MAGIC)] != _MAGIC or len(header) <= len(_MAGIC):
+                raise ValueError(f"{path} is not a journal of The Chronicle.")
+            if header[len(_MAGIC)] != JOURNAL_FORMAT:
+                raise ValueError(f"{path} has journal format {header[len(_MAGIC)]}, expected {JOURNAL_FORMAT}.")
+            # Mapped rather than read: a journal can be far larger than the part replayed
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield from TheChronicle._records(path, data, len(_MAGIC) + 1 if offset is None else offset)
+
+    @staticmethod
+    def _records(path: str, data: Any, position: int) -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+        names: List[str] = []
+        schemas: List[EidolonSchema] = []
+
+        def value(at: int) -> Tuple[Any, int]:
+            tag = data[at:at + 1]
+            at += 1
+            if tag == _FLOAT:
+                return _F64.unpack_from(data, at)[0], at + 8
+            if tag == _INT:
+                return _I64.unpack_from(data, at)[0], at + 8
+            if tag == _STRING:
+                return names[_U32.unpack_from(data, at)[0]], at + 4
+            if tag == _REMOVED:
+                return None, at
+            length = _U32.unpack_from(data, at)[0]
+            return pickle.loads(data[at + 4:at + 4 + length]), at + 4 + length
+
+        try:
+            while position < len(data):
+                start = position
+                kind = data[position:position + 1]
+                position += 1
+                if kind == _WRITE:
+                    eidolon, tier, key = _WRITE_HEAD.unpack_from(data, position)
+                    written, position = value(position + _WRITE_HEAD.size)
+                    record = ("write", names[eidolon], names[tier], names[key], written)
+                elif kind == _RELATION:
+                    source, target, relation = _RELATION_HEAD.unpack_from(data, position)
+                    written, position = value(position + _RELATION_HEAD.size)
+                    record = ("relation", names[source], names[target], names[relation], written)
+                elif kind == _TICK:
+                    record = ("tick", _I64.unpack_from(data, position)[0])
+                    position += 8
+                elif kind == _NAME or kind == _SCHEMA:
+                    number, length = _U32.unpack_from(data, position)[0], _U32.unpack_from(data, position + 4)[0]
+                    body = data[position + 8:position + 8 + length]
+                    if len(body) < length:
+                        raise struct.error("truncated record")
+                    position += 8 + length
+                    table, item = (names, body.decode("utf-8")) if kind == _NAME else (schemas, pickle.loads(body))
+                    table[number:] = [item]
+                    continue
+                elif kind == _EIDOLON:
+                    name, schema, length = _EIDOLON_HEAD.unpack_from(data, position)
+                    position += _EIDOLON_HEAD.size
+                    numbers, objects = pickle.loads(data[position:position + length])
+                    position += length
+                    record = ("eidolon", names[name], schemas[schema], numbers, objects)
+                elif kind == _DEPART:
+                    record = ("depart", names[_U32.unpack_from(data, position)[0]])
+                    position += 4
+                elif kind == _CHECKPOINT:
+                    tick, length = _CHECKPOINT_HEAD.unpack_from(data, position)
+                    position += _CHECKPOINT_HEAD.size
+                    snapshot = pickle.loads(data[position:position + length])
+                    position += length
+                    names, schemas = [], list(snapshot["schemas"])
+                    record = ("checkpoint", tick, snapshot)
+                else:
+                    raise ValueError(f"{path}: unknown record type {kind!r} at offset {start}")
+                yield start, record
+        except (struct.error, IndexError, EOFError, pickle.UnpicklingError):
+            return # The last record was cut short
+
+    @staticmethod
+    def replay(path: str, tick: Optional[int] = None) -> TheNexus:
+        """
+        Rebuilds the Nexus as it was at the end of a tick (the last one journaled, by default) from the
+        nearest checkpoint at or before it. Values are put straight into storage: no observer sees them.
+        """
+        checkpoints = TheChronicle.checkpoints(path)
+        usable = [(at, offset) for at, offset in checkpoints if tick is None or at <= tick]
+        if not usable:
+            raise ValueError(f"{path} has no checkpoint at or before tick {tick}.")
+        nexus = None
+        for _, record in TheChronicle.read(path, usable[-1][1]):
+            kind = record[0]
+            if kind == "checkpoint":
+                if nexus is not None:
+                    break # Only written after the tick sought (or the index missed it)
+                nexus = TheChronicle._restore(record[1], record[2])
+            elif kind == "tick":
+                if tick is not None and record[1] > tick:
+                    break
+                nexus.horae.tick = record[1]
+            elif kind == "write":
+                _, name, tier, key, value = record
+                eidolon = nexus.eidolons[name]
+                is_numeric, offset = eidolon.schema.layout[tier][key]
+                if is_numeric:
+                    eidolon._numbers[offset] = value
+                else:
+                    eidolon._objects[offset] = value
+            elif kind == "relation":
+                _, source, target, relation, value = record
+                skein = nexus.skein
+                if value is None:
+                    skein.remove(skein.resolve(source), skein.resolve(target), relation)
+                else:
+                    skein.set(skein.resolve(source), skein.resolve(target), relation, value)
+            elif kind == "eidolon":
+                _, name, schema, numbers, objects = record
+                TheChronicle._place(nexus, name, schema, numbers, objects)
+            elif kind == "depart":
+                nexus.remove_eidolon(record[1])
+        if nexus is None:
+            raise ValueError(f"{path} has no readable checkpoint at offset {usable[-1][1]}.")
+        return nexus
+
+    @staticmethod
+    def _restore(tick: int, snapshot: Dict[str, Any]) -> TheNexus:
+        nexus = TheNexus()
+        nexus.horae.tick = tick
+        schemas = snapshot["schemas"]
+        for name, schema, numbers, objects in snapshot["eidolons"]:
+            TheChronicle._place(nexus, name, schemas[schema], numbers, objects)
+        skein = nexus.skein
+        for kind, edges in snapshot["relations"].items():
+            if edges:
+                sources, targets, values = zip(*edges)
+                skein.set_many(kind, [skein.resolve(s) for s in sources], [skein.resolve(t) for t in targets], values)
+        return nexus
+
+    @staticmethod
+    def _place(nexus: TheNexus, name: str, schema: EidolonSchema, numbers: List[float], objects: List[Any]):
+        eidolon = nexus.eidolons.get(name)
+        if eidolon is not None:
+            eidolon._numbers[:] = array("d", numbers)
+            eidolon._objects[:] = objects
+            return
+        eidolon = Eidolon.from_storage(name, nexus.skein, schema, array("d", numbers), list(objects))
+        nexus.eidolons[name] = eidolon
+
+# Example Usage (for testing purposes)
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import tempfile
+    import time
+    from the_loom.the_agon import TheAgon
+    from the_loom.the_chorus import load_game_module
+    from the_loom.the_daimon import TheDaimon
+
+    def state(nexus: TheNexus) -> Dict[str, Any]:
+        """Every attribute and relationship of a Nexus, by name."""
+        skein = nexus.skein
+        return {
+            "eidolons": {name: (list(e._numbers), list(e._objects)) for name, e in nexus.eidolons.items()},
+            "relations": {
+                (kind, skein.name_of(source), skein.name_of(target)): value
+                for kind, edges in skein.edges.items() for (source, target), value in zip(map(split_edge_key, edges), edges.values())
+            },
+        }
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        alembic, moirai = load_game_module("kismet_social", use_cache=False)
+        nexus = TheNexus()
+        crowd = alembic.spawn_batch("town_gossip", 300, nexus=nexus)
+    agon = TheAgon(alembic, moirai)
+    agon.enable_hand_index(crowd)
+    agon.attach(nexus)
+    TheDaimon(agon, top_k=1).attach(nexus)
+
+    path = os.path.join(tempfile.mkdtemp(), "run.chronicle")
+    chronicle = TheChronicle(nexus, path, checkpoint_every=10)
+    chronicle.start()
+    seen = {}
+    nexus.horae.add_phase("witness", lambda tick: seen.__setitem__(tick, state(nexus)) if tick in (7, 23, 40) else None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        nexus.advance_time(30)
+        newcomers = alembic.spawn_batch("town_gossip", 20, nexus=nexus) # Joining mid-run
+        agon.enable_hand_index(newcomers)
+        nexus.remove_eidolon(crowd[0].name)
+        nexus.advance_time(10)
+    chronicle.stop()
+    size = os.path.getsize(path)
+    print(f"Journaled {chronicle.records} records over 40 ticks in {size / 1024:.0f} KiB ({size / chronicle.records:.1f} bytes each); "
+          f"checkpoints at ticks {[tick for tick, _ in TheChronicle.checkpoints(path)]}")
+
+    for tick in (7, 23, 40):
+        start = time.perf_counter()
+        replayed = TheChronicle.replay(path, tick)
+        print(f"Replayed to tick {replayed.time} in {(time.perf_counter() - start) * 1000:.0f}ms; "
+              f"same as the run: {state(replayed) == seen[tick]}")
+    os.remove(f"{path}.index") # Without its index, the journal is scanned for checkpoints
+    print(f"Without the index: same as the run: {state(TheChronicle.replay(path)) == seen[40]}")
@@ -0,0 +1,367 @@
+"""
+The Daimon: The inner voice that tells each Eidolon what to do next.
+This module chooses, for every Eidolon, the best (card, target) actions by utility. A card's utility
+is its `utility` formula (or, without one, the formula of its success effect), compiled once. Rather
+than scoring every card against every possible target one formula call at a time:
+
+- only the cards in the Eidolon's hand are considered, when The Agon keeps a hand index;
+- targets can be pruned to the Eidolon's strongest relationships of one affinity type (see
+  TheSkein.strongest);
+- utility formulas are split by their read-sets into terms reading only the actor, only the target,
+  or both. When no term reads both, the utility is actor part + target part: the target part is
+  scored once per tick for the whole population, and every Eidolon's best targets are the first ones
+  in that ranking, with no pair scored at all. Other utilities are scored over the candidate targets
+  in bulk (see TheMoirai.evaluate_formula_batch).
+
+A budget caps the (card, target) pairs scored per tick (one Eidolon is served however many its cards
+need); Eidolons left over are served first on the next tick.
+"""
+
+import ast
+import heapq
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+from the_loom.the_agon import CompiledCard, TheAgon
+from the_loom.the_eidolon import Eidolon
+from the_loom.the_moirai import FORMULA_ROLES, CompiledFormula, TheMoirai, translate_ternary
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional; pairs are then scored with Python lists.
+    np = None
+
+if TYPE_CHECKING:
+    from the_loom.the_nexus import TheNexus
+
+# Rows of the actor x target grids scored at once for non-separable utilities.
+GRID_ROWS = 256
+
+class Action:
+    """A card an Eidolon could play, on whom, and how much it would like to."""
+
+    __slots__ = ("card_id", "target", "score")
+
+    def __init__(self, card_id: str, target: Optional[Eidolon], score: float):
+        self.card_id = card_id
+        self.target = target
+        self.score = score
+
+    def __repr__(self):
+        on = f" on {self.target.name}" if self.target is not None else ""
+        return f"<Action: {self.card_id}{on} ({self.score:.2f})>"
+
+
+def formula_roles(compiled: CompiledFormula) -> set:
+    """The roles ("actor", "target") a compiled formula reads anything of."""
+    roles = set()
+    for node in ast.walk(compiled.tree):
+        if not isinstance(node, ast.Name):
+            continue
+        if node.id in compiled.reads:
+            roles.add(compiled.reads[node.id][0])
+        elif node.id in compiled.relations:
+            owner, _, other = compiled.relations[node.id]
+            roles.update(role for role in (owner, other) if role is not None)
+        elif node.id in FORMULA_ROLES:
+            roles.add(node.id)
+    return roles
+
+
+class UtilityPlan:
+    """
+    How one card's utility is scored: the whole formula, and, when none of its terms reads both
+    the actor and the target, the formula of the actor's part and of the target's part.
+    """
+
+    def __init__(self, card: CompiledCard, moirai: TheMoirai):
+        self.card = card
+        reference = card.definition.get("utility")
+        if reference is None:
+            success = card.effects.get("success")
+            reference = success.formula if success is not None else None
+        self.formula = moirai.ensure_formula(reference) if reference is not None else None
+        self.actor_part: Optional[str] = None
+        self.target_part: Optional[str] = None
+        self.separable = False
+        if self.formula is None:
+            return
+        self.targeted = card.needs_target or moirai.compiled[self.formula].uses_target
+        parts: Dict[str, List[str]] = {"actor": [], "target": [], "pair": []}
+        for sign, term in self._terms(moirai, self.formula, 1):
+            expression = ast.unparse(term)
+            roles = formula_roles(moirai.compiled[moirai.ensure_formula(expression)])
+            kind = "pair" if len(roles) > 1 else "target" if roles == {"target"} else "actor"
+            parts[kind].append(f"{'-' if sign < 0 else '+'} ({expression})")
+        if parts["pair"] or not self.targeted:
+            return
+        self.separable = True
+        for kind in ("actor", "target"):
+            if parts[kind]:
+                expression = " ".join(parts[kind]).lstrip("+ ")
+                setattr(self, f"{kind}_part", moirai.ensure_formula(expression))
+
+    def _terms(self, moirai: TheMoirai, reference: str, sign: int) -> Iterable[Tuple[int, ast.AST]]:
+        """The signed terms of a sum, following formulas named in it into their own sums."""
+        expression = moirai.formulas.get(reference, reference)
+        yield from self._split(moirai, ast.parse(translate_ternary(expression.strip()), mode="eval").body, sign)
+
+    def _split(self, moirai: TheMoirai, node: ast.AST, sign: int) -> Iterable[Tuple[int, ast.AST]]:
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Sub)):
+            yield from self._split(moirai, node.left, sign)
+            yield from self._split(moirai, node.right, sign if isinstance(node.op, ast.Add) else -sign)
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            yield from self._split(moirai, node.operand, -sign)
+        elif isinstance(node, ast.Name) and node.id in moirai.formulas:
+            yield from self._terms(moirai, node.id, sign)
+        else:
+            yield sign, node
+
+
+class TheDaimon:
+    def __init__(
+        self,
+        agon: TheAgon,
+        top_k: int = 3,
+        affinity: Optional[str] = None,
+        candidates: int = 8,
+        budget: Optional[int] = None,
+    ):
+        if budget is not None and budget < 1:
+            raise ValueError(f"The Daimon's budget must be at least 1 pair per tick, got {budget}.")
+        self.agon = agon
+        self.moirai = agon.moirai
+        # Actions returned per Eidolon.
+        self.top_k = top_k
+        # With an affinity type, targets are the `candidates` Eidolons each one holds the strongest
+        # affinity of that type towards (everyone, for Eidolons holding none).
+        self.affinity = affinity
+        self.candidates = candidates
+        # (card, target) pairs scored per tick at most; None for no limit.
+        self.budget = budget
+        self.plans: Dict[str, UtilityPlan] = {}
+        # Eidolons still to be served, carried over when a tick runs out of budget
+        self.pending: Deque[Eidolon] = deque()
+        self.pairs_scored = 0
+
+    def plan(self, card_id: str) -> UtilityPlan:
+        card = self.agon.card(card_id)
+        plan = self.plans.get(card_id)
+        if plan is None or plan.card is not card or (plan.formula is not None and plan.formula not in self.moirai.compiled):
+            plan = self.plans[card_id] = UtilityPlan(card, self.moirai)
+        return plan
+
+    def hand(self, eidolon: Eidolon) -> Iterable[str]:
+        hands = self.agon.hands
+        if hands is not None and eidolon in hands.unmet:
+            return hands.hand(eidolon)
+        return self.agon.alembic.loaded_hyle.get("cards", {})
+
+    def choose(self, actors: Sequence[Eidolon], population: Sequence[Eidolon]) -> Dict[Eidolon, List[Action]]:
+        """
+        The top_k actions of each actor, with targets from population. Stops before the first actor
+        whose pairs would overrun the budget (the first actor is always served); the actors not
+        served are left out of the result.
+        """
+        population = list(population)
+        position = {eidolon: i for i, eidolon in enumerate(population)}
+        by_id = {eidolon.eid: eidolon for eidolon in population}
+        actors = list(actors)
+        card_ids = list(dict.fromkeys(card_id for actor in actors for card_id in self.hand(actor)))
+        plans = {}
+        for card_id in card_ids:
+            try:
+                plan = self.plan(card_id)
+            except ValueError as e:
+                print(f"Warning: The Daimon ignores card '{card_id}': {e}")
+                continue
+            if plan.formula is not None:
+                plans[card_id] = plan
+
+        # Target parts of separable utilities, ranked once for everyone
+        rankings: Dict[str, Tuple[Any, List[int]]] = {}
+        for card_id, plan in plans.items():
+            if plan.separable:
+                if plan.target_part is None:
+                    scores = [0.0] * len(population)
+                else:
+                    scores = self._scores(plan.target_part, population, population)
+                    self.pairs_scored += len(population)
+                order = sorted(range(len(population)), key=scores.__getitem__, reverse=True)
+                rankings[card_id] = (scores, order)
+
+        chosen: Dict[Eidolon, List[Action]] = {}
+        spent = 0
+        for start in range(0, len(actors), GRID_ROWS):
+            block = actors[start:start + GRID_ROWS]
+            served = []
+            for actor in block:
+                cost = self._cost(actor, plans, population)
+                if self.budget is not None and spent + cost > self.budget and (chosen or served):
+                    break # The first actor is served whatever it costs, so every tick makes progress
+                served.append(actor)
+                spent += cost
+            actions: Dict[Eidolon, List[Action]] = {actor: [] for actor in served}
+            hands = {actor: set(self.hand(actor)) for actor in served}
+            for card_id, plan in plans.items():
+                players = [actor for actor in served if card_id in hands[actor]]
+                if not players:
+                    continue
+                if not plan.targeted:
+                    scores = self._scores(plan.formula, players, None)
+                    for actor, score in zip(players, scores):
+                        actions[actor].append(Action(card_id, None, score))
+                elif plan.separable:
+                    self._choose_separable(card_id, plan, players, population, position, by_id, rankings[card_id], actions)
+                else:
+                    self._choose_pairs(card_id, plan, players, population, position, by_id, actions)
+            for actor in served:
+                chosen[actor] = heapq.nlargest(self.top_k, actions[actor], key=lambda action: action.score)
+            if len(served) < len(block):
+                break
+        self.pairs_scored += spent
+        return chosen
+
+    def _cost(self, actor: Eidolon, plans: Dict[str, UtilityPlan], population: Sequence[Eidolon]) -> int:
+        """The pairs scored to serve one actor: top_k for separable utilities, every candidate otherwise."""
+        hand = self.hand(actor)
+        targets = len(self._candidate_ids(actor)) if self.affinity is not None else len(population) - 1
+        return sum(
+            1 if not plan.targeted else self.top_k if plan.separable else max(targets, 1)
+            for card_id, plan in plans.items() if card_id in hand
+        )
+
+    def _candidate_ids(self, actor: Eidolon) -> List[int]:
+        return [other for other, _ in actor.skein.strongest(actor.eid, self.affinity, self.candidates)]
+
+    def _candidates(self, actor: Eidolon, population: Sequence[Eidolon], by_id: Dict[int, Eidolon]) -> Optional[List[Eidolon]]:
+        """The targets considered for an actor, or None for everyone."""
+        if self.affinity is None:
+            return None
+        candidates = [by_id[other] for other in self._candidate_ids(actor) if other in by_id]
+        return candidates or None
+
+    def _scores(self, formula: str, actors: Sequence[Eidolon], targets: Optional[Sequence[Eidolon]]) -> List[float]:
+        scores = self.moirai.evaluate_formula_batch(formula, actors, targets, pairwise=targets is not None)
+        return scores.tolist() if np is not None else list(scores)
+
+    def _choose_separable(self, card_id, plan, players, population, position, by_id, ranking, actions):
+        target_scores, order = ranking
+        actor_scores = self._scores(plan.actor_part, players, None) if plan.actor_part is not None else [0.0] * len(players)
+        for actor, actor_score in zip(players, actor_scores):
+            candidates = self._candidates(actor, population, by_id)
+            if candidates is not None:
+                ranked = sorted((position[target] for target in candidates), key=target_scores.__getitem__, reverse=True)
+            else:
+                ranked = order
+            picked = 0
+            for index in ranked:
+                target = population[index]
+                if target is actor:
+                    continue
+                actions[actor].append(Action(card_id, target, actor_score + target_scores[index]))
+                picked += 1
+                if picked == self.top_k:
+                    break
+
+    def _choose_pairs(self, card_id, plan, players, population, position, by_id, actions):
+        everyone = []
+        for actor in players:
+            candidates = self._candidates(actor, population, by_id)
+            if candidates is None:
+                everyone.append(actor)
+                continue
+            candidates = [target for target in candidates if target is not actor]
+            if candidates:
+                scores = self._scores(plan.formula, [actor] * len(candidates), candidates)
+                best = heapq.nlargest(self.top_k, zip(scores, range(len(candidates))))
+                actions[actor].extend(Action(card_id, candidates[i], score) for score, i in best)
+        if not everyone or len(population) < 2:
+            return
+        # Every actor against the whole population, as one grid
+        grid = self.moirai.evaluate_formula_batch(plan.formula, everyone, population)
+        if np is not None:
+            grid = np.array(grid, dtype=float)
+            for row, actor in enumerate(everyone):
+                if actor in position:
+                    grid[row, position[actor]] = -np.inf
+            k = min(self.top_k, len(population) - 1)
+            best = np.argpartition(-grid, k - 1, axis=1)[:, :k]
+            for row, actor in enumerate(everyone):
+                actions[actor].extend(Action(card_id, population[i], float(grid[row, i])) for i in best[row].tolist())
+        else:
+            for actor, scores in zip(everyone, grid):
+                best = heapq.nlargest(self.top_k + 1, zip(scores, range(len(population))))
+                picks = [(score, i) for score, i in best if population[i] is not actor][:self.top_k]
+                actions[actor].extend(Action(card_id, population[i], score) for score, i in picks)
+
+    def tick(self, population: Sequence[Eidolon]) -> Dict[Eidolon, List[Action]]:
+        """Serves the Eidolons waiting longest first, as many as the budget allows."""
+        members = set(population)
+        if any(eidolon not in members for eidolon in self.pending): # Some left since the last tick
+            self.pending = deque(eidolon for eidolon in self.pending if eidolon in members)
+        if not self.pending:
+            self.pending.extend(population)
+        chosen = self.choose(list(self.pending), population)
+        for _ in range(len(chosen)):
+            self.pending.popleft()
+        return chosen
+
+    def attach(self, nexus: "TheNexus"):
+        """Every tick, queues in The Agon the best action of each Eidolon served (before The Agon's phase, if attached)."""
+        def decide(tick: int):
+            for actor, actions in self.tick(list(nexus.eidolons.values())).items():
+                if actions:
+                    self.agon.queue(actions[0].card_id, actor, actions[0].target)
+
+        names = [name for name, _ in nexus.horae.phases]
+        nexus.horae.add_phase("daimon", decide, before="agon" if "agon" in names else None)
+
+# Example Usage (for testing purposes)
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import time
+    from the_loom.the_chorus import load_game_module
+    from the_loom.the_nexus import TheNexus
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        alembic, moirai = load_game_module("kismet_social", use_cache=False)
+        nexus = TheNexus()
+        crowd = alembic.spawn_batch("town_gossip", 2000, nexus=nexus)
+    agon = TheAgon(alembic, moirai)
+    agon.enable_hand_index(crowd)
+    daimon = TheDaimon(agon, top_k=3)
+    for card_id in ("offer_a_gift", "tell_a_joke", "intimidate", "arcane_blast"):
+        plan = daimon.plan(card_id)
+        print(f"{card_id}: utility '{plan.formula}' is {'separable' if plan.separable else 'scored pair by pair'}")
+
+    def naive(actor: Eidolon) -> List[Action]:
+        """Every card of the hand against every target, one formula call each."""
+        actions = [
+            Action(card_id, target, moirai.evaluate_formula(daimon.plan(card_id).formula, actor, target))
+            for card_id in agon.hands.hand(actor) for target in crowd if target is not actor
+        ]
+        return heapq.nlargest(3, actions, key=lambda action: action.score)
+
+    sample = crowd[:20]
+    start = time.perf_counter()
+    expected = {actor: naive(actor) for actor in sample}
+    naive_time = (time.perf_counter() - start) / len(sample) * len(crowd)
+    start = time.perf_counter()
+    chosen = daimon.choose(crowd, crowd)
+    print(f"Chose for {len(chosen)} Eidolons in {time.perf_counter() - start:.2f}s "
+          f"(one pair at a time: about {naive_time:.1f}s); {crowd[0].name}: {chosen[crowd[0]]}")
+    print(f"Same best scores as scoring every pair: "
+          f"{all([round(a.score, 6) for a in chosen[actor]] == [round(a.score, 6) for a in expected[actor]] for actor in sample)}")
+
+    # Pruned to affinities, with a budget, driving the simulation
+    for i, actor in enumerate(crowd):
+        for j in (1, 7, 31):
+            actor.update_affinity(crowd[(i + j) % len(crowd)].eid, "platonic", (i * j) % 50)
+    daimon = TheDaimon(agon, top_k=1, affinity="platonic", candidates=3, budget=2000)
+    agon.attach(nexus)
+    daimon.attach(nexus)
+    with contextlib.redirect_stdout(io.StringIO()):
+        nexus.advance_time(1)
+    print(f"Tick 1 served {len(crowd) - len(daimon.pending)} Eidolons within a budget of {daimon.budget} pairs; "
+          f"{len(daimon.pending)} wait for the next tick")
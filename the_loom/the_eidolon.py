@@ -3,80 +3,413 @@ The Eidolon: Represents an Agent within the AnimaLoom engine.
 This module defines the core structure for any character or entity that can act and be acted upon.
 """
 
+import copy
+import weakref
+from array import array
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from the_loom.the_skein import DEFAULT_SKEIN, GRIEVANCE, TheSkein
+
+# Called as observer(eidolon, tier, key, value) after every write made through the Eidolon update_*
+# methods (e.g. The Moirai's memo uses this to drop stale results). For affinities the tier is
+# "affinities" and the key is the affinity type. A new Eidolon is announced with tier and key None:
+# every one of its attributes counts as written. Observers are kept by the schema (see
+# EidolonSchema.add_write_observer), so a world only hears about its own Eidolons.
+WriteObserver = Callable[["Eidolon", Optional[str], Optional[str], Any], None]
+
+# Called as observer(eidolons, tier, key, values) when a column store writes one attribute of many
+# Eidolons at once (values[i] is eidolons[i]'s; None rows are released and skipped), so an observer
+# can handle the whole column in one call.
+ColumnObserver = Callable[[Sequence[Optional["Eidolon"]], str, str, Sequence[Any]], None]
+
+# The attribute tiers every Eidolon has, in order.
+TIERS = ("core_attributes", "personality", "dynamic_states", "ledger")
+
+# Maps the tier names used in The Hyle to the Eidolon tiers.
+HYLE_TIER_NAMES = {
+    "core": "core_attributes",
+    "core_attributes": "core_attributes",
+    "personality": "personality",
+    "dynamic_states": "dynamic_states",
+    "ledger": "ledger",
+}
+
+# Attributes whose values are relationships kept in the Eidolon's Skein rather than in the Eidolon,
+# mapped to the relationship type they are stored under.
+RELATION_ATTRIBUTES = {("ledger", "grievances"): GRIEVANCE}
+
+class EidolonSchema:
+    """
+    The attribute layout shared by every Eidolon of a game module: which attributes each tier has,
+    their defaults, and the fixed offset each value is stored at. Numeric attributes are packed into
+    one array of doubles per Eidolon; everything else (strings, lists, dicts) into one list.
+    """
+
+    def __init__(self, tiers: Dict[str, Dict[str, Any]]):
+        self.tiers: Dict[str, Dict[str, Any]] = {tier: dict(tiers.get(tier, {})) for tier in TIERS}
+        # tier -> {attribute: (is_numeric, offset)}
+        self.layout: Dict[str, Dict[str, Tuple[bool, int]]] = {tier: {} for tier in TIERS}
+        # attribute -> (tier, is_numeric, offset); attribute names are unique across tiers.
+        self.slots: Dict[str, Tuple[str, bool, int]] = {}
+        # tier -> {attribute: relationship type} for attributes stored in the Skein
+        self.relations: Dict[str, Dict[str, str]] = {tier: {} for tier in TIERS}
+        numeric_defaults: List[float] = []
+        self.object_defaults: List[Any] = []
+        for tier in TIERS:
+            for attribute, default in self.tiers[tier].items():
+                if attribute in self.slots:
+                    raise ValueError(f"Attribute '{attribute}' is defined in both '{self.slots[attribute][0]}' and '{tier}'.")
+                relation_type = RELATION_ATTRIBUTES.get((tier, attribute))
+                if relation_type is not None:
+                    self.relations[tier][attribute] = relation_type
+                    default = None # The value lives in the Skein; its slot stays empty
+                is_numeric = isinstance(default, (int, float)) and not isinstance(default, bool)
+                if is_numeric:
+                    offset = len(numeric_defaults)
+                    numeric_defaults.append(default)
+                else:
+                    offset = len(self.object_defaults)
+                    self.object_defaults.append(default)
+                self.layout[tier][attribute] = (is_numeric, offset)
+                self.slots[attribute] = (tier, is_numeric, offset)
+        self.numeric_defaults = array("d", numeric_defaults)
+        # Offsets of defaults that must be copied so Eidolons don't share one list or dict.
+        self._mutable_offsets = [
+            offset for offset, default in enumerate(self.object_defaults) if isinstance(default, (list, dict, set))
+        ]
+        self._init_hooks()
+
+    def _init_hooks(self):
+        # The hooks of the world these Eidolons live in (a game module loads its own schema). They
+        # belong to the running process, so they are left out when the schema is pickled.
+        self.write_observers: List[WriteObserver] = []
+        # write observer -> its column observer, for those that handle column writes in bulk
+        self.column_observers: Dict[WriteObserver, ColumnObserver] = {}
+        # Set by The Moirai when a game module declares derived stats; Eidolon.calculate_derived_stats
+        # then defers to it instead of the built-in rules.
+        self.derived_stats_refresher: Optional[Callable[["Eidolon"], Any]] = None
+
+    @classmethod
+    def from_hyle(cls, game_config: Dict[str, Any]) -> "EidolonSchema":
+        """Builds the schema from a game module's [default_eidolon_attributes] (game_config.toml)."""
+        defaults = game_config.get("default_eidolon_attributes", {})
+        tiers: Dict[str, Dict[str, Any]] = {}
+        for tier_name, attributes in defaults.items():
+            tier = HYLE_TIER_NAMES.get(tier_name)
+            if tier is None:
+                raise ValueError(f"Unknown attribute tier '{tier_name}' in default_eidolon_attributes.")
+            tiers[tier] = attributes
+        return cls(tiers)
+
+    def __reduce_ex__(self, protocol: Any) -> Any:
+        # The default layout unpickles as itself, so identity checks against it still hold.
+        if self is DEFAULT_SCHEMA:
+            return "DEFAULT_SCHEMA"
+        return super().__reduce_ex__(protocol)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        del state["write_observers"], state["column_observers"], state["derived_stats_refresher"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._init_hooks()
+
+    def add_write_observer(self, observer: WriteObserver, column_observer: Optional[ColumnObserver] = None):
+        """Registers an observer of writes; column writes go to column_observer if given, else to observer row by row."""
+        if observer not in self.write_observers:
+            self.write_observers.append(observer)
+        if column_observer is not None:
+            self.column_observers[observer] = column_observer
+
+    def remove_write_observer(self, observer: WriteObserver):
+        if observer in self.write_observers:
+            self.write_observers.remove(observer)
+            self.column_observers.pop(observer, None)
+
+    def notify_write(self, eidolon: "Eidolon", tier: Optional[str], key: Optional[str], value: Any):
+        for observer in self.write_observers:
+            observer(eidolon, tier, key, value)
+
+    def notify_column_write(self, eidolons: Sequence[Optional["Eidolon"]], tier: str, key: str, values: Sequence[Any]):
+        for observer in self.write_observers:
+            column_observer = self.column_observers.get(observer)
+            if column_observer is not None:
+                column_observer(eidolons, tier, key, values)
+                continue
+            for eidolon, value in zip(eidolons, values):
+                if eidolon is not None:
+                    observer(eidolon, tier, key, value)
+
+    def new_objects(self) -> List[Any]:
+        objects = list(self.object_defaults)
+        for offset in self._mutable_offsets:
+            objects[offset] = copy.deepcopy(objects[offset])
+        return objects
+
+    def has_attribute(self, tier: str, attribute: str) -> bool:
+        return attribute in self.layout.get(tier, {})
+
+
+# The layout used when no game module provides one.
+DEFAULT_SCHEMA = EidolonSchema({
+    # Tier 1: Core Attributes (The Foundation)
+    "core_attributes": {
+        "strength": 0, "agility": 0, "intellect": 0, "charisma": 0,
+        "resilience": 0, "passion": 0, "perception": 0, "composure": 0,
+    },
+    # Tier 2: Personality & Disposition (The Psyche)
+    # Using OCEAN model as a base, values can be -100 to 100 or similar range
+    "personality": {
+        "openness": 0, "conscientiousness": 0, "extraversion": 0, "agreeableness": 0, "neuroticism": 0,
+    },
+    # Tier 3: Dynamic States & Resources (The Moment)
+    "dynamic_states": {
+        "health": 100,
+        "stamina": 100,
+        "social_battery": 100,
+        "emotional_state": "neutral", # e.g., "joyful", "sad", "angry"
+        "sanity": 100, # Derived, but can be directly set for testing
+    },
+    # Tier 4: History & Relationships (The Ledger)
+    # Hidden ledger stats
+    "ledger": {
+        "trauma": 0,
+        "secrets": [], # List of secret IDs or descriptions
+        "grievances": {}, # {target_eidolon_id: grievance_score}
+        "reputation": 0, # Derived, but can be directly set for testing
+    },
+})
+
+
+class RelationView(Mapping):
+    """
+    Read-only {other_name: value} view of one type of relationship an Eidolon holds in its Skein,
+    e.g. eidolon.ledger["grievances"]. Write through Eidolon.update_grievance (or by assigning a
+    whole new dictionary to the ledger entry).
+    """
+
+    __slots__ = ("_eidolon", "_type")
+
+    def __init__(self, eidolon: "Eidolon", relation_type: str):
+        self._eidolon = eidolon
+        self._type = relation_type
+
+    def __getitem__(self, other: Union[str, int]) -> Any:
+        eidolon = self._eidolon
+        other_id = eidolon.skein.find(other)
+        if other_id is not None:
+            value = eidolon.skein.get(eidolon.eid, other_id, self._type, None)
+            if value is not None:
+                return value
+        raise KeyError(other)
+
+    def __iter__(self) -> Iterator[str]:
+        skein = self._eidolon.skein
+        for other_id, _, _ in skein.outgoing(self._eidolon.eid, self._type):
+            yield skein.name_of(other_id)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._eidolon.skein.outgoing(self._eidolon.eid, self._type))
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class TierView(MutableMapping):
+    """Dictionary-style access to one tier of an Eidolon, e.g. eidolon.core_attributes["strength"]."""
+
+    __slots__ = ("_eidolon", "_tier", "_layout", "_relations")
+
+    def __init__(self, eidolon: "Eidolon", tier: str):
+        self._eidolon = eidolon
+        self._tier = tier
+        self._layout = eidolon.schema.layout[tier]
+        self._relations = eidolon.schema.relations[tier]
+
+    def __getitem__(self, attribute: str) -> Any:
+        if attribute in self._relations:
+            return RelationView(self._eidolon, self._relations[attribute])
+        is_numeric, offset = self._layout[attribute]
+        return self._eidolon._numbers[offset] if is_numeric else self._eidolon._objects[offset]
+
+    def __setitem__(self, attribute: str, value: Any):
+        if attribute not in self._layout:
+            raise KeyError(attribute)
+        self._eidolon._write(self._tier, attribute, value)
+
+    def __delitem__(self, attribute: str):
+        raise TypeError("Eidolon attributes are fixed by the schema and can't be deleted.")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._layout)
+
+    def __len__(self) -> int:
+        return len(self._layout)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
 class Eidolon:
-    def __init__(self, name: str, **kwargs):
+    __slots__ = ("name", "eid", "skein", "schema", "_numbers", "_objects", "__weakref__")
+
+    def __init__(self, name: str, skein: Optional[TheSkein] = None, schema: Optional[EidolonSchema] = None, **kwargs):
         self.name = name
+        # Affinities live in a Skein, indexed by integer ids rather than names.
+        self.skein = skein if skein is not None else DEFAULT_SKEIN
+        self.eid = self.skein.register(name)
+        if skein is None:
+            # The default Skein outlives the Eidolons that never join a Nexus; forget them once they are gone.
+            weakref.finalize(self, DEFAULT_SKEIN.release, self.eid).atexit = False
 
-        # Tier 1: Core Attributes (The Foundation)
-        self.core_attributes = {
-            "strength": kwargs.get("strength", 0),
-            "agility": kwargs.get("agility", 0),
-            "intellect": kwargs.get("intellect", 0),
-            "charisma": kwargs.get("charisma", 0),
-            "resilience": kwargs.get("resilience", 0),
-            "passion": kwargs.get("passion", 0),
-            "perception": kwargs.get("perception", 0),
-            "composure": kwargs.get("composure", 0),
-        }
-
-        # Tier 2: Personality & Disposition (The Psyche)
-        # Using OCEAN model as a base, values can be -100 to 100 or similar range
-        self.personality = {
-            "openness": kwargs.get("openness", 0),
-            "conscientiousness": kwargs.get("conscientiousness", 0),
-            "extraversion": kwargs.get("extraversion", 0),
-            "agreeableness": kwargs.get("agreeableness", 0),
-            "neuroticism": kwargs.get("neuroticism", 0),
-        }
-
-        # Tier 3: Dynamic States & Resources (The Moment)
-        self.dynamic_states = {
-            "health": kwargs.get("health", 100),
-            "stamina": kwargs.get("stamina", 100),
-            "social_battery": kwargs.get("social_battery", 100),
-            "emotional_state": kwargs.get("emotional_state", "neutral"), # e.g., "joyful", "sad", "angry"
-            "sanity": kwargs.get("sanity", 100), # Derived, but can be directly set for testing
-        }
-
-        # Tier 4: History & Relationships (The Ledger)
-        # Affinity will be a dictionary of dictionaries: {target_eidolon_id: {affinity_type: value}}
-        self.affinities = {}
-        # Hidden ledger stats
-        self.ledger = {
-            "trauma": kwargs.get("trauma", 0),
-            "secrets": kwargs.get("secrets", []), # List of secret IDs or descriptions
-            "grievances": kwargs.get("grievances", {}), # {target_eidolon_id: grievance_score}
-            "reputation": kwargs.get("reputation", 0), # Derived, but can be directly set for testing
-        }
+        # Attribute values are stored at the fixed offsets given by the schema (see EidolonSchema).
+        self.schema = schema if schema is not None else DEFAULT_SCHEMA
+        self._numbers = array("d", self.schema.numeric_defaults)
+        self._objects = self.schema.new_objects()
+        slots = self.schema.slots
+        for attribute, value in kwargs.items():
+            slot = slots.get(attribute)
+            if slot is None:
+                continue
+            if attribute in self.schema.relations[slot[0]]:
+                self._write(slot[0], attribute, value)
+            elif slot[1]:
+                self._set_number(attribute, slot[2], value)
+            else:
+                self._objects[slot[2]] = value
+        if self.schema.write_observers:
+            self.schema.notify_write(self, None, None, None)
+
+    @classmethod
+    def from_storage(
+        cls, name: str, skein: TheSkein, schema: EidolonSchema, numbers: Any, objects: Any, eid: Optional[int] = None,
+    ) -> "Eidolon":
+        """
+        Creates an Eidolon around ready-made value storage laid out by the schema (used for bulk
+        spawning). numbers and objects may be None when a store such as The Warp will provide them.
+        eid may be an id already registered for the name (see TheSkein.register_many).
+        """
+        eidolon = cls.__new__(cls)
+        eidolon.name = name
+        eidolon.skein = skein
+        eidolon.eid = skein.register(name) if eid is None else eid
+        eidolon.schema = schema
+        eidolon._numbers = numbers
+        eidolon._objects = objects
+        if schema.write_observers:
+            schema.notify_write(eidolon, None, None, None)
+        return eidolon
+
+    # Tier views: the four tiers read and write like dictionaries.
+    @property
+    def core_attributes(self) -> TierView:
+        return TierView(self, "core_attributes")
+
+    @property
+    def personality(self) -> TierView:
+        return TierView(self, "personality")
+
+    @property
+    def dynamic_states(self) -> TierView:
+        return TierView(self, "dynamic_states")
+
+    @property
+    def ledger(self) -> TierView:
+        return TierView(self, "ledger")
+
+    def _set_number(self, attribute: str, offset: int, value: Any):
+        try:
+            self._numbers[offset] = value
+        except TypeError:
+            raise ValueError(f"Attribute '{attribute}' expects a number, got {value!r}") from None
+
+    def _write(self, tier: str, attribute: str, value: Any):
+        relation_type = self.schema.relations[tier].get(attribute)
+        if relation_type is not None:
+            self._replace_relations(relation_type, dict(value))
+            value = RelationView(self, relation_type)
+        else:
+            is_numeric, offset = self.schema.layout[tier][attribute]
+            if is_numeric:
+                self._set_number(attribute, offset, value)
+            else:
+                self._objects[offset] = value
+        if self.schema.write_observers:
+            self.schema.notify_write(self, tier, attribute, value)
+
+    def _replace_relations(self, relation_type: str, values: Dict[Union[str, int], Any]):
+        """Replaces every relationship of one type this Eidolon holds with {other: value}."""
+        skein = self.skein
+        for other_id, _, _ in list(skein.outgoing(self.eid, relation_type)):
+            skein.remove(self.eid, other_id, relation_type)
+        for other, value in values.items():
+            skein.set(self.eid, skein.resolve(other), relation_type, value)
 
     def __repr__(self):
         return f"<Eidolon: {self.name}>"
 
     def update_core_attribute(self, attribute: str, value: int):
-        if attribute in self.core_attributes:
-            self.core_attributes[attribute] = value
+        if attribute in self.schema.layout["core_attributes"]:
+            self._write("core_attributes", attribute, value)
         else:
             raise ValueError(f"Core attribute '{attribute}' not found.")
 
     def update_dynamic_state(self, state: str, value):
-        if state in self.dynamic_states:
-            self.dynamic_states[state] = value
+        if state in self.schema.layout["dynamic_states"]:
+            self._write("dynamic_states", state, value)
         else:
             raise ValueError(f"Dynamic state '{state}' not found.")
 
-    def update_affinity(self, target_eidolon_id: str, affinity_type: str, value: int):
-        if target_eidolon_id not in self.affinities:
-            self.affinities[target_eidolon_id] = {}
-        self.affinities[target_eidolon_id][affinity_type] = value
+    def update_ledger(self, entry: str, value):
+        if entry in self.schema.layout["ledger"]:
+            self._write("ledger", entry, value)
+        else:
+            raise ValueError(f"Ledger entry '{entry}' not found.")
+
+    def update_affinity(self, target_eidolon_id: Union[str, int], affinity_type: str, value: int):
+        self.skein.set(self.eid, self.skein.resolve(target_eidolon_id), affinity_type, value)
+        if self.schema.write_observers:
+            self.schema.notify_write(self, "affinities", affinity_type, value)
+
+    def get_affinity(self, target_eidolon_id: Union[str, int], affinity_type: str):
+        target_id = self.skein.find(target_eidolon_id)
+        if target_id is None:
+            return 0
+        return self.skein.get(self.eid, target_id, affinity_type)
+
+    def update_grievance(self, target_eidolon_id: Union[str, int], value: int):
+        self.skein.set(self.eid, self.skein.resolve(target_eidolon_id), GRIEVANCE, value)
+        if self.schema.write_observers:
+            self.schema.notify_write(self, "ledger", "grievances", value)
+
+    def get_grievance(self, target_eidolon_id: Union[str, int]):
+        target_id = self.skein.find(target_eidolon_id)
+        if target_id is None:
+            return 0
+        return self.skein.get(self.eid, target_id, GRIEVANCE)
 
-    def get_affinity(self, target_eidolon_id: str, affinity_type: str):
-        return self.affinities.get(target_eidolon_id, {}).get(affinity_type, 0)
+    @property
+    def affinities(self) -> Dict[str, Dict[str, int]]:
+        """A snapshot of this Eidolon's affinities as {target_name: {affinity_type: value}}."""
+        snapshot: Dict[str, Dict[str, int]] = {}
+        for target_id, affinity_type, value in self.skein.outgoing(self.eid):
+            if affinity_type != GRIEVANCE:
+                snapshot.setdefault(self.skein.name_of(target_id), {})[affinity_type] = value
+        return snapshot
 
-    # Placeholder for derived stat calculation (e.g., Sanity, Reputation)
     def calculate_derived_stats(self):
-        # Example: Sanity calculation
-        self.dynamic_states["sanity"] = (self.core_attributes["resilience"] + self.core_attributes["composure"]) / 2
-        # Example: Reputation calculation (simplified)
-        self.ledger["reputation"] = self.core_attributes["charisma"] + self.personality["extraversion"] - sum(self.ledger["grievances"].values())
+        """
+        Brings derived stats (e.g. Sanity, Reputation) up to date. With derived stats declared in
+        The Hyle (see TheMoirai.enable_derived_stats) only the stats whose inputs changed since the
+        last call are recomputed; otherwise the built-in rules below are applied.
+        """
+        refresher = self.schema.derived_stats_refresher
+        if refresher is not None:
+            refresher(self)
+            return
+        self.update_dynamic_state("sanity", (self.core_attributes["resilience"] + self.core_attributes["composure"]) / 2)
+        self.update_ledger("reputation", self.core_attributes["charisma"] + self.personality["extraversion"] - self.skein.total(self.eid, GRIEVANCE))
 
     # More methods will be added here for actions, interactions, etc.
@@ -0,0 +1,256 @@
+"""
+The Heddles: Split the Eidolons of a large world across worker processes.
+Each shard's numeric attribute columns live in one block of shared memory, which the shard's
+worker and the coordinator both map. Each tick, every worker runs the registered systems over its
+own columns in parallel. The coordinator then waits for all of them (a barrier) and routes the
+messages they sent each other (cross-shard interactions) in one batch per shard, delivered at the
+start of the next tick.
+"""
+
+import multiprocessing
+from array import array
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from the_loom.the_eidolon import DEFAULT_SCHEMA, Eidolon, EidolonSchema
+from the_loom.the_warp import _RowView
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional for The Loom, but The Heddles need it for shared columns.
+    np = None
+
+# A message from one Eidolon's system to another Eidolon: (target id, kind, payload).
+Message = Tuple[int, str, Any]
+
+class ShardView:
+    """
+    What a system sees of its shard: the numeric columns of its Eidolons (NumPy views into shared
+    memory, one row per Eidolon) and an outbox for messages to Eidolons in any shard.
+    """
+
+    def __init__(self, index: int, schema: EidolonSchema, numbers: Any, eids: Sequence[int]):
+        self.index = index
+        self.schema = schema
+        # numbers[offset] is the column of the numeric attribute at that schema offset.
+        self.numbers = numbers
+        self.eids = np.asarray(eids, dtype=np.int64)
+        self.row_of: Dict[int, int] = {eid: row for row, eid in enumerate(eids)}
+        self.outbox: List[Message] = []
+
+    def __len__(self) -> int:
+        return len(self.eids)
+
+    def column(self, tier: str, attribute: str) -> Any:
+        is_numeric, offset = self.schema.layout[tier][attribute]
+        if not is_numeric:
+            raise ValueError(f"Only numeric attributes are shared between processes, not '{attribute}'.")
+        return self.numbers[offset]
+
+    def rows(self, eids: Sequence[int]) -> Any:
+        """The rows of the given Eidolon ids in this shard's columns."""
+        return np.fromiter((self.row_of[eid] for eid in eids), dtype=np.int64, count=len(eids))
+
+    def send(self, target_eid: int, kind: str, payload: Any = None):
+        self.outbox.append((target_eid, kind, payload))
+
+
+# A system runs once per tick in every shard: system(view, tick).
+System = Callable[[ShardView, int], Any]
+# A handler receives one tick's messages of one kind for its shard: handler(view, messages).
+Handler = Callable[[ShardView, List[Message]], Any]
+
+def _shard_worker(
+    connection: Any,
+    index: int,
+    memory_name: str,
+    shape: Tuple[int, int],
+    schema: EidolonSchema,
+    eids: List[int],
+    systems: List[System],
+    handlers: Dict[str, Handler],
+):
+    """Worker process loop: runs one shard's tick each time the coordinator asks."""
+    memory = shared_memory.SharedMemory(name=memory_name)
+    try:
+        view = ShardView(index, schema, np.ndarray(shape, dtype=np.float64, buffer=memory.buf), eids)
+        while True:
+            command = connection.recv()
+            if command[0] == "stop":
+                break
+            _, tick, inbox = command
+            try:
+                by_kind: Dict[str, List[Message]] = {}
+                for message in inbox:
+                    by_kind.setdefault(message[1], []).append(message)
+                for kind, messages in by_kind.items():
+                    handler = handlers.get(kind)
+                    if handler is not None:
+                        handler(view, messages)
+                for system in systems:
+                    system(view, tick)
+            except Exception as e:
+                view.outbox = []
+                connection.send(("error", f"Shard {index} failed at tick {tick}: {e!r}"))
+                continue
+            outbox, view.outbox = view.outbox, []
+            connection.send(("done", outbox))
+    finally:
+        view = None # Release the NumPy view before closing the mapping it points into
+        memory.close()
+
+
+class TheHeddles:
+    def __init__(self, schema: EidolonSchema = DEFAULT_SCHEMA, shards: Optional[int] = None):
+        if np is None:
+            raise ImportError("The Heddles need NumPy for shared attribute columns.")
+        self.schema = schema
+        self.shards = shards or multiprocessing.cpu_count()
+        self.systems: List[System] = []
+        self.handlers: Dict[str, Handler] = {}
+        # shard -> its Eidolons, in row order
+        self.members: List[List[Eidolon]] = [[] for _ in range(self.shards)]
+        # Eidolon id -> shard
+        self.shard_of: Dict[int, int] = {}
+        self.tick = 0
+        self.messages_routed = 0
+        self._memories: List[shared_memory.SharedMemory] = []
+        self._columns: List[Any] = []
+        self._workers: List[Any] = []
+        self._connections: List[Any] = []
+        # shard -> messages to deliver at the start of its next tick
+        self._inboxes: List[List[Message]] = [[] for _ in range(self.shards)]
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def add_system(self, system: System):
+        """Registers a per-tick system. Systems (and handlers) must be module-level functions so they can be sent to workers."""
+        if self.running:
+            raise ValueError("Systems must be added before The Heddles start.")
+        self.systems.append(system)
+
+    def add_handler(self, kind: str, handler: Handler):
+        if self.running:
+            raise ValueError("Handlers must be added before The Heddles start.")
+        self.handlers[kind] = handler
+
+    def adopt(self, eidolons: Sequence[Eidolon]):
+        """Assigns Eidolons to shards round-robin. Their values move into shared memory on start()."""
+        if self.running:
+            raise ValueError("Eidolons must be adopted before The Heddles start.")
+        for eidolon in eidolons:
+            if eidolon.schema is not self.schema:
+                raise ValueError(f"Eidolon {eidolon.name} uses a different schema than The Heddles.")
+            if eidolon.eid in self.shard_of:
+                raise ValueError(f"Eidolon {eidolon.name} is already in The Heddles.")
+            shard = len(self.shard_of) % self.shards
+            self.shard_of[eidolon.eid] = shard
+            self.members[shard].append(eidolon)
+
+    def start(self):
+        """Moves every adopted Eidolon's numeric values into shared memory and starts one worker per shard."""
+        if self.running:
+            return
+        width = len(self.schema.numeric_defaults)
+        context = multiprocessing.get_context()
+        for index, members in enumerate(self.members):
+            shape = (width, max(len(members), 1))
+            memory = shared_memory.SharedMemory(create=True, size=max(shape[0] * shape[1] * 8, 1))
+            columns = np.ndarray(shape, dtype=np.float64, buffer=memory.buf)
+            for row, eidolon in enumerate(members):
+                columns[:, row] = eidolon._numbers[:width] if isinstance(eidolon._numbers, array) else [
+                    eidolon._numbers[offset] for offset in range(width)
+                ]
+            # The coordinator keeps reading and writing its Eidolons through the shared columns
+            # (as memoryviews, so values read back as plain floats).
+            shared = [memoryview(column) for column in columns]
+            for row, eidolon in enumerate(members):
+                eidolon._numbers = _RowView(shared, row)
+            self._memories.append(memory)
+            self._columns.append(columns)
+            parent, child = context.Pipe()
+            worker = context.Process(
+                target=_shard_worker,
+                args=(child, index, memory.name, shape, self.schema, [e.eid for e in members], self.systems, self.handlers),
+                daemon=True,
+            )
+            worker.start()
+            self._workers.append(worker)
+            self._connections.append(parent)
+
+    def advance(self, steps: int = 1):
+        """Runs `steps` ticks. Each tick ends when every shard has finished (the barrier)."""
+        if not self.running:
+            self.start()
+        for _ in range(steps):
+            self.tick += 1
+            for connection, inbox in zip(self._connections, self._inboxes):
+                connection.send(("tick", self.tick, inbox))
+            self._inboxes = [[] for _ in range(self.shards)]
+            errors = []
+            for connection in self._connections:
+                status, result = connection.recv()
+                if status == "error":
+                    errors.append(result)
+                    continue
+                for message in result:
+                    shard = self.shard_of.get(message[0])
+                    if shard is not None: # Messages to Eidolons outside The Heddles are dropped
+                        self._inboxes[shard].append(message)
+                        self.messages_routed += 1
+            if errors:
+                raise RuntimeError("; ".join(errors))
+
+    def column(self, tier: str, attribute: str) -> List[Any]:
+        """One attribute's shared column per shard (read between ticks, e.g. for statistics)."""
+        is_numeric, offset = self.schema.layout[tier][attribute]
+        if not is_numeric:
+            raise ValueError(f"'{attribute}' is not a numeric attribute.")
+        return [columns[offset][:len(members)] for columns, members in zip(self._columns, self.members)]
+
+    def close(self):
+        """Stops the workers and copies every Eidolon's values back into its own storage."""
+        for connection in self._connections:
+            connection.send(("stop",))
+        for worker in self._workers:
+            worker.join()
+        for columns, members in zip(self._columns, self.members):
+            for row, eidolon in enumerate(members):
+                eidolon._numbers = array("d", columns[:, row].tolist())
+        self._columns = []
+        for memory in self._memories:
+            memory.close()
+            memory.unlink()
+        self._memories, self._workers, self._connections = [], [], []
+
+    def __enter__(self) -> "TheHeddles":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Example systems (module-level so worker processes can receive them)
+def _drain_and_cheer(view: ShardView, tick: int):
+    battery = view.column("dynamic_states", "social_battery")
+    battery -= 1
+    # Every Eidolon cheers on the Eidolon with the next id, which usually lives in another shard.
+    for eid in view.eids.tolist():
+        view.send(eid + 1, "cheer", 3)
+
+def _receive_cheers(view: ShardView, messages: List[Message]):
+    battery = view.column("dynamic_states", "social_battery")
+    np.add.at(battery, view.rows([target for target, _, _ in messages]), [payload for _, _, payload in messages])
+
+# Example Usage (for testing purposes)
+if __name__ == "__main__":
+    crowd = [Eidolon(f"Villager {i}", social_battery=50) for i in range(8)]
+    with TheHeddles(shards=2) as heddles:
+        heddles.adopt(crowd)
+        heddles.add_system(_drain_and_cheer)
+        heddles.add_handler("cheer", _receive_cheers)
+        heddles.advance(3)
+        print(f"Shards: {[len(members) for members in heddles.members]}; messages routed: {heddles.messages_routed}")
+        print(f"Villager 0 social battery: {crowd[0].dynamic_states['social_battery']}")
+        print(f"Villager 5 social battery: {crowd[5].dynamic_states['social_battery']}")
+    print(f"After closing, Villager 5 social battery: {crowd[5].dynamic_states['social_battery']}")
@@ -0,0 +1,230 @@
+"""
+The Hermes: Carries The Hyle of a game module from disk to The Loom, swiftly.
+This module discovers every TOML file of a game module and reads them concurrently in a thread (or
+process) pool. Large sections such as [characters] are not parsed up front: each file is split into
+the tables of every entry, and an entry is parsed only when it is first looked up (e.g. by
+TheAlembic.create_eidolon), so the time to the first interaction stays flat as modules grow.
+"""
+
+import os
+import re
+import tomllib # Requires Python 3.11+
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# The game module file whose top-level tables are the game configuration rather than sections.
+CONFIG_FILE = "game_config.toml"
+
+# Sections whose entries are parsed on first lookup.
+LAZY_SECTIONS = ("characters", "cards")
+
+# Any line opening a table, and a table header made of bare keys, e.g. [characters.gregor.core].
+_ANY_HEADER = re.compile(r"^[ \t]*\[", re.MULTILINE)
+_BARE_HEADER = re.compile(
+    r"^[ \t]*\[[ \t]*([A-Za-z0-9_-]+)[ \t]*(?:\.[ \t]*([A-Za-z0-9_-]+)[ \t]*)?(?:\.[ \t]*[A-Za-z0-9_-]+[ \t]*)*\][ \t]*(?:#[^\n]*)?$",
+    re.MULTILINE,
+)
+
+def discover_hyle_files(module_path: str) -> List[str]:
+    """The TOML files of a game module, by name, in a stable order."""
+    return sorted(
+        name for name in os.listdir(module_path)
+        if name.endswith(".toml") and not name.startswith(".") and os.path.isfile(os.path.join(module_path, name))
+    )
+
+
+class LazySection(Mapping):
+    """
+    One section of The Hyle (e.g. characters) as a read-only mapping of entry id -> definition.
+    Every entry keeps the TOML source of its tables until it is first looked up, then is parsed
+    once. Listing, counting and membership tests parse nothing.
+    """
+
+    def __init__(self, name: str, sources: Dict[str, str]):
+        self.name = name
+        # entry id -> the TOML text of its tables, in definition order
+        self.sources = sources
+        # entry id -> parsed definition, for the entries looked up so far
+        self.entries: Dict[str, Any] = {}
+
+    def __getitem__(self, entry_id: str) -> Any:
+        entry = self.entries.get(entry_id)
+        if entry is None:
+            data = tomllib.loads(self.sources[entry_id])
+            entry = self.entries[entry_id] = data[self.name][entry_id]
+        return entry
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.sources)
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def __contains__(self, entry_id: object) -> bool:
+        return entry_id in self.sources
+
+    def parse_all(self) -> int:
+        """Parses every entry not parsed yet; entries that fail to parse stay unparsed. Returns the number that failed."""
+        failed = 0
+        for entry_id in self.sources:
+            try:
+                self[entry_id]
+            except tomllib.TOMLDecodeError:
+                failed += 1
+        return failed
+
+    def merge(self, other: "LazySection"):
+        """Adds the entries of the same section from another file; its definitions replace ours."""
+        self.sources.update(other.sources)
+        for entry_id in other.sources:
+            self.entries.pop(entry_id, None)
+        self.entries.update(other.entries)
+
+    def __repr__(self):
+        return f"<LazySection: {self.name} ({len(self.entries)}/{len(self.sources)} parsed)>"
+
+
+def split_section(text: str, section: str) -> Optional[Tuple[Dict[str, str], str]]:
+    """
+    Splits a TOML document into the tables of each entry of `section` (e.g. [characters.gregor] and
+    [characters.gregor.core]) and the rest of the document. Returns None if the document can't be
+    split safely by its table headers (multi-line strings, arrays of tables, quoted keys).
+    """
+    if '"""' in text or "'''" in text:
+        return None
+    headers = list(_BARE_HEADER.finditer(text))
+    if len(headers) != len(_ANY_HEADER.findall(text)): # Arrays of tables or quoted keys
+        return None
+    starts = [header.start() for header in headers] + [len(text)]
+    sources: Dict[str, List[str]] = {}
+    rest = [text[:starts[0]]]
+    for i, header in enumerate(headers):
+        table, entry_id = header.group(1, 2)
+        block = text[starts[i]:starts[i + 1]]
+        if table != section:
+            rest.append(block)
+        elif entry_id is None: # [characters] itself, with its entries as dotted keys
+            return None
+        elif entry_id in sources:
+            sources[entry_id].append(block)
+        else:
+            sources[entry_id] = [block]
+    return {entry_id: "".join(blocks) for entry_id, blocks in sources.items()}, "".join(rest)
+
+def read_hyle_file(path: str, lazy_sections: Sequence[str] = LAZY_SECTIONS) -> Dict[str, Any]:
+    """
+    Reads one TOML file into {top-level key: value}, with the given sections as LazySections when
+    the file allows it. Raises tomllib.TOMLDecodeError for invalid TOML outside the lazy sections;
+    errors inside a lazy entry surface when that entry is looked up.
+    """
+    with open(path, "rb") as f: # tomllib requires binary mode
+        original = f.read().decode("utf-8")
+    text = original
+    lazy: Dict[str, LazySection] = {}
+    for section in lazy_sections:
+        if not re.search(rf"^[ \t]*\[[ \t]*{re.escape(section)}[ \t]*\.", text, re.MULTILINE):
+            continue
+        split = split_section(text, section)
+        if split is None:
+            return tomllib.loads(original)
+        sources, text = split
+        lazy[section] = LazySection(section, sources)
+    data = tomllib.loads(text)
+    if any(section in data for section in lazy): # Entries also defined outside their own tables
+        return tomllib.loads(original)
+    data.update(lazy)
+    return data
+
+
+class TheHermes:
+    def __init__(
+        self,
+        module_path: str,
+        workers: Optional[int] = None,
+        processes: bool = False,
+        lazy_sections: Sequence[str] = LAZY_SECTIONS,
+    ):
+        self.module_path = module_path
+        self.workers = workers
+        # Parse in worker processes rather than threads (worth it for many large eager files).
+        self.processes = processes
+        self.lazy_sections = tuple(lazy_sections)
+
+    def discover(self) -> List[str]:
+        return discover_hyle_files(self.module_path)
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Reads every TOML file of the module concurrently. Returns file name -> its data; files that fail are reported and left out."""
+        names = self.discover()
+        pool_type = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+        with pool_type(max_workers=self.workers) as pool:
+            reads = {
+                name: pool.submit(read_hyle_file, os.path.join(self.module_path, name), self.lazy_sections)
+                for name in names
+            }
+        hyle: Dict[str, Dict[str, Any]] = {}
+        for name, read in reads.items():
+            try:
+                hyle[name] = read.result()
+            except tomllib.TOMLDecodeError as e:
+                print(f"Error decoding TOML from {os.path.join(self.module_path, name)}: {e}")
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Error reading Hyle file {os.path.join(self.module_path, name)}: {e}")
+        return hyle
+
+    @staticmethod
+    def sections(hyle: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merges the sections of every file but the game configuration, in file order: e.g. the
+        [characters] of characters.toml and of extra_characters.toml become one section.
+        """
+        merged: Dict[str, Any] = {}
+        for name, data in hyle.items():
+            if name == CONFIG_FILE:
+                continue
+            for section, value in data.items():
+                existing = merged.get(section)
+                if existing is None or not isinstance(value, Mapping):
+                    merged[section] = value
+                elif isinstance(existing, LazySection) and isinstance(value, LazySection):
+                    existing.merge(value)
+                else:
+                    combined = dict(existing) # Mixing parsed and lazy entries parses the lazy ones
+                    combined.update(value)
+                    merged[section] = combined
+        return merged
+
+# Example Usage (for testing purposes)
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+    import time
+
+    def write_module(characters: int) -> str:
+        module_path = tempfile.mkdtemp()
+        with open(os.path.join(module_path, "game_config.toml"), "w") as f:
+            f.write("[game_rules]\nmax_affinity_value = 100\n")
+        with open(os.path.join(module_path, "characters.toml"), "w") as f:
+            for i in range(characters):
+                f.write(f'[characters.villager_{i}]\nname = "Villager {i}"\ngeneration_type = "static"\n\n'
+                        f'[characters.villager_{i}.core]\nstrength = {i % 20}\ncharisma = {i % 7}\n\n')
+        with open(os.path.join(module_path, "more_characters.toml"), "w") as f:
+            f.write('[characters.villager_0]\nname = "Elder Villager"\n')
+        return module_path
+
+    for characters in (2_000, 20_000):
+        module_path = write_module(characters)
+        start = time.perf_counter()
+        hermes = TheHermes(module_path)
+        sections = hermes.sections(hermes.load())
+        first = sections["characters"]["villager_7"]
+        lazy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        with open(os.path.join(module_path, "characters.toml"), "rb") as f:
+            tomllib.load(f)
+        eager_time = time.perf_counter() - start
+        print(f"{characters} characters: first definition after {lazy_time:.3f}s lazily, full parse {eager_time:.3f}s; "
+              f"{sections['characters']!r}")
+        print(f"  villager_7 strength: {first['core']['strength']}; villager_0 is now: {sections['characters']['villager_0']['name']}")
+        shutil.rmtree(module_path)
@@ -0,0 +1,189 @@
+"""
+The Horae: Keep the hours of The Nexus.
+This module schedules everything that happens as time advances: update phases run every tick, and
+one-off or recurring timed events (including sleeping Eidolons waking up) wait in a priority queue
+ordered by due tick. A tick costs O(phases + events due), never O(all Eidolons), and stretches of
+ticks with no phases and no events due are skipped outright.
+"""
+
+import heapq
+from itertools import count
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from the_loom.the_eidolon import Eidolon
+
+class TimedEvent:
+    """A pending call made when its tick comes (and every `every` ticks after that, if set)."""
+
+    __slots__ = ("tick", "callback", "args", "every", "cancelled")
+
+    def __init__(self, tick: int, callback: Callable[..., Any], args: Tuple[Any, ...], every: Optional[int]):
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+        self.every = every
+        self.cancelled = False
+
+    def __repr__(self):
+        return f"<TimedEvent: {getattr(self.callback, '__name__', self.callback)} at tick {self.tick}>"
+
+
+class TheHorae:
+    def __init__(self, tick: int = 0):
+        self.tick = tick
+        # (name, update) in the order they run each tick; update is called as update(tick).
+        self.phases: List[Tuple[str, Callable[[int], Any]]] = []
+        # Heap of (due tick, sequence, event); the sequence keeps events due together in scheduling order.
+        self._queue: List[Tuple[int, int, TimedEvent]] = []
+        self._sequence = count()
+        # Eidolon id -> the event that wakes it
+        self.sleeping: Dict[int, TimedEvent] = {}
+        self.pending = 0 # Scheduled events not yet fired or cancelled
+
+    def __len__(self) -> int:
+        return self.pending
+
+    # --- Update phases ---
+
+    def add_phase(self, name: str, update: Callable[[int], Any], before: Optional[str] = None):
+        """Registers a system's per-tick update, run after the existing phases (or just before `before`)."""
+        if any(existing == name for existing, _ in self.phases):
+            raise ValueError(f"Phase '{name}' is already registered with The Horae.")
+        position = len(self.phases)
+        if before is not None:
+            names = [existing for existing, _ in self.phases]
+            if before not in names:
+                raise ValueError(f"Phase '{before}' is not registered with The Horae.")
+            position = names.index(before)
+        self.phases.insert(position, (name, update))
+
+    def remove_phase(self, name: str):
+        self.phases = [(existing, update) for existing, update in self.phases if existing != name]
+
+    # --- Timed events ---
+
+    def schedule(self, delay: int, callback: Callable[..., Any], *args: Any, every: Optional[int] = None) -> TimedEvent:
+        """Calls callback(*args) `delay` ticks from now, then every `every` ticks if given."""
+        return self.schedule_at(self.tick + delay, callback, *args, every=every)
+
+    def schedule_at(self, tick: int, callback: Callable[..., Any], *args: Any, every: Optional[int] = None) -> TimedEvent:
+        if tick <= self.tick:
+            raise ValueError(f"Events must be scheduled after the current tick ({self.tick}), not at {tick}.")
+        if every is not None and every < 1:
+            raise ValueError(f"Recurring events need a period of at least one tick, not {every}.")
+        event = TimedEvent(tick, callback, args, every)
+        heapq.heappush(self._queue, (tick, next(self._sequence), event))
+        self.pending += 1
+        return event
+
+    def cancel(self, event: TimedEvent):
+        """Cancels an event (a recurring one stops recurring). It is dropped from the queue when due."""
+        if not event.cancelled:
+            event.cancelled = True
+            self.pending -= 1
+
+    def next_due(self) -> Optional[int]:
+        """The tick of the next event that will fire, or None if nothing is scheduled."""
+        queue = self._queue
+        while queue and queue[0][2].cancelled:
+            heapq.heappop(queue)
+        return queue[0][0] if queue else None
+
+    # --- Sleeping Eidolons ---
+
+    def sleep(self, eidolon: "Eidolon", ticks: int, on_wake: Optional[Callable[["Eidolon"], Any]] = None):
+        """Puts an Eidolon to sleep for `ticks` ticks, calling on_wake(eidolon) when it wakes up."""
+        previous = self.sleeping.pop(eidolon.eid, None)
+        if previous is not None:
+            self.cancel(previous)
+        self.sleeping[eidolon.eid] = self.schedule(ticks, self._wake, eidolon, on_wake)
+
+    def is_asleep(self, eidolon: "Eidolon") -> bool:
+        return eidolon.eid in self.sleeping
+
+    def wake(self, eidolon: "Eidolon", notify: bool = True):
+        """Wakes an Eidolon early; on_wake is only called if notify is True."""
+        event = self.sleeping.get(eidolon.eid)
+        if event is None:
+            return
+        self.cancel(event)
+        if notify:
+            self._wake(eidolon, event.args[1])
+        else:
+            del self.sleeping[eidolon.eid]
+
+    def _wake(self, eidolon: "Eidolon", on_wake: Optional[Callable[["Eidolon"], Any]]):
+        del self.sleeping[eidolon.eid]
+        if on_wake is not None:
+            on_wake(eidolon)
+
+    # --- Advancing time ---
+
+    def advance(self, steps: int = 1) -> int:
+        """Advances time by `steps` ticks, running phases and firing due events. Returns the number of events fired."""
+        end = self.tick + steps
+        fired = 0
+        if not self.phases:
+            # Nothing runs every tick, so jump straight from one due event to the next.
+            while True:
+                due = self.next_due()
+                if due is None or due > end:
+                    break
+                self.tick = due
+                fired += self._fire_due()
+            self.tick = end
+            return fired
+        while self.tick < end:
+            self.tick += 1
+            fired += self._fire_due()
+            for _, update in list(self.phases):
+                update(self.tick)
+        return fired
+
+    def _fire_due(self) -> int:
+        """Fires every event due at or before the current tick, in due order."""
+        fired = 0
+        queue = self._queue
+        while queue and queue[0][0] <= self.tick:
+            _, _, event = heapq.heappop(queue)
+            if event.cancelled:
+                continue
+            if event.every is not None:
+                event.tick += event.every
+                heapq.heappush(queue, (event.tick, next(self._sequence), event))
+            else:
+                event.cancelled = True # Fired; cancelling it later is a no-op
+                self.pending -= 1
+            event.callback(*event.args)
+            fired += 1
+        return fired
+
+# Example Usage (for testing purposes)
+if __name__ == "__main__":
+    import time
+    from the_loom.the_eidolon import Eidolon
+
+    horae = TheHorae()
+    alice = Eidolon("Alice")
+
+    horae.schedule(3, print, "A market opens at tick 3")
+    harvest = horae.schedule(2, lambda: print(f"Harvest at tick {horae.tick}"), every=4)
+    horae.sleep(alice, 5, on_wake=lambda eidolon: print(f"{eidolon.name} wakes up at tick {horae.tick}"))
+    print(f"Alice asleep: {horae.is_asleep(alice)}; events pending: {len(horae)}")
+
+    fired = horae.advance(10)
+    print(f"Tick {horae.tick}: {fired} events fired; Alice asleep: {horae.is_asleep(alice)}")
+    horae.cancel(harvest)
+
+    # A mostly idle world: one recurring event and no per-tick phases
+    horae.schedule(1, lambda: None, every=1000)
+    start = time.perf_counter()
+    fired = horae.advance(10_000)
+    print(f"10,000 idle ticks fired {fired} events in {time.perf_counter() - start:.4f}s")
+
+    # Per-tick phases run in registration order, after the events due that tick
+    horae.add_phase("regeneration", lambda tick: None)
+    horae.add_phase("perception", lambda tick: print(f"Perception phase at tick {tick}"), before="regeneration")
+    horae.advance(2)
+    print(f"Phases: {[name for name, _ in horae.phases]}")
@@ -0,0 +1,280 @@
+"""
+The Kleros: Allots to every Eidolon the cards it can play.
+This module keeps an index of which tracked Eidolons can pay the costs of each card, so that an
+Eidolon's hand ("which cards can Gregor play?") and a card's players ("who can play Intimidate right
+now?") are lookups rather than a check of every cost of every card against every Eidolon.
+
+Fixed costs are thresholds: for every attribute paid with, the distinct costs on it are kept sorted,
+and each Eidolon is bucketed by how many of them its value reaches. A write to the attribute (seen as
+a write observer) moves the Eidolon to another bucket only when its value crosses a threshold, and
+then updates just the cards whose thresholds it crossed. Costs given by formulas of the actor are
+checked again for an Eidolon when the cost attribute or any attribute the formula reads is written.
+Costs reading the target can't be known before a target is chosen; they are left to The Agon's cost
+check.
+"""
+
+from bisect import bisect_right
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from the_loom.the_eidolon import Eidolon, EidolonSchema
+from the_loom.the_moirai import ANY_KEY
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional; Eidolons are then tracked one by one.
+    np = None
+
+if TYPE_CHECKING:
+    from the_loom.the_agon import TheAgon
+
+class TheKleros:
+    def __init__(self, agon: "TheAgon"):
+        self.agon = agon
+        # The cards section the index was built from; a reload replaces it (see The Proteus).
+        self.section: Any = None
+        self.card_ids: List[str] = []
+        # (tier, attribute) -> distinct fixed costs on it, ascending, and the cards costing each
+        self.levels: Dict[Tuple[str, str], List[float]] = {}
+        self.cards_at: Dict[Tuple[str, str], List[List[str]]] = {}
+        self.offsets: Dict[Tuple[str, str], int] = {}
+        # (tier, attribute) -> Eidolon -> the number of its levels the Eidolon's value reaches
+        self.buckets: Dict[Tuple[str, str], Dict[Eidolon, int]] = {}
+        # (card id, attribute offset, formula name) of every cost given by a formula of the actor
+        self.formula_costs: List[Tuple[str, int, str]] = []
+        # The compiled formula of each, to notice when it is recompiled
+        self.cost_formulas: List[Any] = []
+        # (tier, key) written -> indexes of the formula costs to check again
+        self.triggers: Dict[Tuple[str, str], List[int]] = {}
+        # formula cost index -> Eidolon -> whether it can pay it
+        self.formula_met: List[Dict[Eidolon, bool]] = []
+        # Eidolon -> card id -> the number of its costs the Eidolon can't pay
+        self.unmet: Dict[Eidolon, Dict[str, int]] = {}
+        self.hands: Dict[Eidolon, Set[str]] = {}
+        self.players: Dict[str, Set[Eidolon]] = {}
+        self.crossings = 0
+        # The schemas of the tracked Eidolons, whose writes this index observes
+        self.schemas: List[EidolonSchema] = []
+        self.rebuild()
+
+    def rebuild(self):
+        """Indexes the costs of every card of The Hyle again, and places every tracked Eidolon anew."""
+        agon = self.agon
+        self.section = agon.alembic.loaded_hyle.get("cards", {})
+        self.card_ids = []
+        fixed: Dict[Tuple[str, str], Dict[float, List[str]]] = {}
+        self.offsets = {}
+        self.formula_costs = []
+        self.cost_formulas = []
+        self.triggers = {}
+        for card_id in self.section:
+            try:
+                card = agon.card(card_id)
+            except ValueError as e:
+                print(f"Warning: Card '{card_id}' is left out of every hand: {e}")
+                continue
+            self.card_ids.append(card_id)
+            for tier, attribute, offset, formula, constant in card.costs:
+                if formula is None:
+                    fixed.setdefault((tier, attribute), {}).setdefault(constant, []).append(card_id)
+                    self.offsets[(tier, attribute)] = offset
+                    continue
+                compiled = agon.moirai.compiled[formula]
+                if compiled.uses_target:
+                    continue
+                index = len(self.formula_costs)
+                self.formula_costs.append((card_id, offset, formula))
+                self.cost_formulas.append(compiled)
+                watched = {(tier, attribute)} | {(read_tier, key) for _, read_tier, key in compiled.dependencies}
+                for resource in watched:
+                    self.triggers.setdefault(resource, []).append(index)
+        self.levels = {resource: sorted(costs) for resource, costs in fixed.items()}
+        self.cards_at = {resource: [fixed[resource][level] for level in levels] for resource, levels in self.levels.items()}
+
+        members = list(self.unmet)
+        self.buckets = {resource: {} for resource in self.levels}
+        self.formula_met = [{} for _ in self.formula_costs]
+        self.unmet, self.hands = {}, {}
+        self.players = {card_id: set() for card_id in self.card_ids}
+        self.track(members)
+
+    def _current(self):
+        """Rebuilds the index if the cards or the formulas of their costs were reloaded since it was built."""
+        compiled = self.agon.moirai.compiled
+        if self.agon.alembic.loaded_hyle.get("cards", {}) is not self.section or any(
+            compiled.get(formula) is not cost_formula
+            for (_, _, formula), cost_formula in zip(self.formula_costs, self.cost_formulas)
+        ):
+            self.rebuild()
+
+    def track(self, eidolons: Iterable[Eidolon]):
+        """Places Eidolons in the index; their hands then follow every write to them."""
+        self._current()
+        eidolons = [eidolon for eidolon in dict.fromkeys(eidolons) if eidolon not in self.unmet]
+        if not eidolons:
+            return
+        for eidolon in eidolons:
+            if eidolon.schema not in self.schemas:
+                self.schemas.append(eidolon.schema)
+                eidolon.schema.add_write_observer(self.on_write, self.on_column_write)
+        unmet = {eidolon: dict.fromkeys(self.card_ids, 0) for eidolon in eidolons}
+        for resource, levels in self.levels.items():
+            offset = self.offsets[resource]
+            values = [eidolon._numbers[offset] for eidolon in eidolons]
+            if np is not None:
+                reached = np.searchsorted(np.asarray(levels), np.asarray(values, dtype=float), side="right").tolist()
+            else:
+                reached = [bisect_right(levels, value) for value in values]
+            buckets = self.buckets[resource]
+            cards_at = self.cards_at[resource]
+            for eidolon, bucket in zip(eidolons, reached):
+                buckets[eidolon] = bucket
+                counts = unmet[eidolon]
+                for cards in cards_at[bucket:]:
+                    for card_id in cards:
+                        counts[card_id] += 1
+        for index, (card_id, offset, formula) in enumerate(self.formula_costs):
+            costs = self.agon.moirai.evaluate_formula_batch(formula, eidolons)
+            met = self.formula_met[index]
+            for eidolon, cost in zip(eidolons, costs):
+                met[eidolon] = can_pay = bool(eidolon._numbers[offset] >= cost)
+                if not can_pay:
+                    unmet[eidolon][card_id] += 1
+        for eidolon, counts in unmet.items():
+            self.unmet[eidolon] = counts
+            self.hands[eidolon] = hand = {card_id for card_id, count in counts.items() if count == 0}
+            for card_id in hand:
+                self.players[card_id].add(eidolon)
+
+    def close(self):
+        """Stops observing writes; the index is no longer kept up to date."""
+        for schema in self.schemas:
+            schema.remove_write_observer(self.on_write)
+        self.schemas = []
+
+    def untrack(self, eidolon: Eidolon):
+        if self.unmet.pop(eidolon, None) is None:
+            return
+        for card_id in self.hands.pop(eidolon):
+            self.players[card_id].discard(eidolon)
+        for buckets in self.buckets.values():
+            buckets.pop(eidolon, None)
+        for met in self.formula_met:
+            met.pop(eidolon, None)
+
+    def playable(self, card_id: str) -> Set[Eidolon]:
+        """The tracked Eidolons that can pay for the card right now. Don't modify the set returned."""
+        self._current()
+        players = self.players.get(card_id)
+        if players is None:
+            raise ValueError(f"Card '{card_id}' not found in The Hyle.")
+        return players
+
+    def hand(self, eidolon: Eidolon) -> Set[str]:
+        """The cards a tracked Eidolon can pay for right now. Don't modify the set returned."""
+        self._current()
+        hand = self.hands.get(eidolon)
+        if hand is None:
+            raise ValueError(f"{eidolon!r} is not tracked by The Kleros.")
+        return hand
+
+    def _pay(self, eidolon: Eidolon, counts: Dict[str, int], card_id: str):
+        count = counts[card_id] - 1
+        counts[card_id] = count
+        if count == 0:
+            self.hands[eidolon].add(card_id)
+            self.players[card_id].add(eidolon)
+
+    def _owe(self, eidolon: Eidolon, counts: Dict[str, int], card_id: str):
+        count = counts[card_id]
+        counts[card_id] = count + 1
+        if count == 0:
+            self.hands[eidolon].discard(card_id)
+            self.players[card_id].discard(eidolon)
+
+    def on_write(self, eidolon: Eidolon, tier: Optional[str], key: Optional[str], value: Any):
+        """Write observer: moves the Eidolon across the thresholds it crossed and checks the formula costs that read the write."""
+        counts = self.unmet.get(eidolon)
+        if counts is None:
+            return
+        if tier is None: # Every attribute may have changed
+            self.untrack(eidolon)
+            self.track([eidolon])
+            return
+        resource = (tier, key)
+        levels = self.levels.get(resource)
+        if levels is not None:
+            buckets = self.buckets[resource]
+            old = buckets[eidolon]
+            new = bisect_right(levels, value)
+            if new != old:
+                self.crossings += 1
+                buckets[eidolon] = new
+                cards_at = self.cards_at[resource]
+                if new > old:
+                    for level in range(old, new):
+                        for card_id in cards_at[level]:
+                            self._pay(eidolon, counts, card_id)
+                else:
+                    for level in range(new, old):
+                        for card_id in cards_at[level]:
+                            self._owe(eidolon, counts, card_id)
+        for watched in (resource, (tier, ANY_KEY)):
+            for index in self.triggers.get(watched, ()):
+                card_id, offset, formula = self.formula_costs[index]
+                # Called directly: a memoized result could predate this very write
+                can_pay = eidolon._numbers[offset] >= self.agon.moirai.compiled[formula].function(eidolon, None)
+                met = self.formula_met[index]
+                if met[eidolon] != can_pay:
+                    met[eidolon] = can_pay
+                    (self._pay if can_pay else self._owe)(eidolon, counts, card_id)
+
+    def on_column_write(self, eidolons: Sequence[Optional[Eidolon]], tier: str, key: str, values: Sequence[Any]):
+        """Column write observer: a column no cost depends on is passed over without visiting its rows."""
+        if (tier, key) not in self.levels and not self.triggers.get((tier, key)) and not self.triggers.get((tier, ANY_KEY)):
+            return
+        unmet = self.unmet
+        for eidolon, value in zip(eidolons, values):
+            if eidolon in unmet:
+                self.on_write(eidolon, tier, key, value)
+
+# Example Usage (for testing purposes)
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import time
+    from the_loom.the_agon import TheAgon
+    from the_loom.the_chorus import load_game_module
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        alembic, moirai = load_game_module("kismet_social", use_cache=False)
+        crowd = alembic.spawn_batch("town_gossip", 5000)
+    agon = TheAgon(alembic, moirai)
+    start = time.perf_counter()
+    kleros = agon.enable_hand_index(crowd)
+    print(f"Indexed {len(crowd)} Eidolons in {time.perf_counter() - start:.3f}s; "
+          f"{len(kleros.playable('intimidate'))} can play Intimidate, {len(kleros.playable('arcane_blast'))} Arcane Blast")
+
+    def scan(card_id: str) -> Set[Eidolon]:
+        """Every cost of the card checked against every Eidolon, as without the index."""
+        card = agon.card(card_id)
+        return {
+            eidolon for eidolon in crowd
+            if all(
+                eidolon._numbers[offset] >= (moirai.evaluate_formula(formula, eidolon) if formula else constant)
+                for _, _, offset, formula, constant in card.costs
+            )
+        }
+
+    # A tick of wear: every Eidolon's stamina and social battery drop, some below what cards cost
+    for i, eidolon in enumerate(crowd):
+        eidolon.dynamic_states["stamina"] = i % 5
+        eidolon.dynamic_states["social_battery"] = i % 40
+    start = time.perf_counter()
+    scanned = {card_id: scan(card_id) for card_id in kleros.card_ids}
+    scan_time = time.perf_counter() - start
+    start = time.perf_counter()
+    looked_up = {card_id: kleros.playable(card_id) for card_id in kleros.card_ids}
+    lookup_time = time.perf_counter() - start
+    print(f"After {kleros.crossings} threshold crossings the index agrees with a full scan: {looked_up == scanned} "
+          f"(scan {scan_time * 1000:.1f}ms, lookup {lookup_time * 1000:.3f}ms)")
+    print(f"{crowd[3].name}'s hand: {sorted(kleros.hand(crowd[3]))}; {crowd[39].name}'s hand: {sorted(kleros.hand(crowd[39]))}")
+    agon.disable_hand_index()
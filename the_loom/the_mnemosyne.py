@@ -0,0 +1,199 @@
+"""
+The Mnemosyne: Remembers the game modules already distilled.
+This module caches what loading a game module produces (its parsed Hyle, the Eidolon schema, the
+compiled formulas and the compiled character templates) in one binary file per module, keyed on a
+hash of the content of its TOML files. While the Hyle is unchanged, a module loads with
+one read and one unpickle instead of parsing and compiling every file; as soon as any source
+changes, the key no longer matches and the module is loaded from TOML (and cached) again.
+
+Loading the cache runs code (it is unpickled, and compiled formulas are marshalled bytecode), so
+caches live in a directory of the current user's, never in the game module: a module shipped with
+a crafted cache only gets its TOML read. A cache not owned by the user, or writable by others, is
+ignored.
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+from typing import Any, Dict, Optional
+from the_loom.the_alembic import TheAlembic
+from the_loom.the_hermes import LazySection, discover_hyle_files
+from the_loom.the_moirai import TheMoirai
+
+# The cache files are named after a hash of the module's path, with this suffix.
+CACHE_FILE_NAME = ".hyle_cache"
+
+# Bumped whenever the cached state changes shape, so caches written by older engines are ignored.
+CACHE_FORMAT = 2
+
+_MAGIC = b"LOOMHYLE"
+_KEY_SIZE = 32
+
+def cache_directory() -> str:
+    """The current user's directory of Hyle caches: $ANIMALOOM_CACHE_DIR, else animaloom in the user cache directory."""
+    directory = os.environ.get("ANIMALOOM_CACHE_DIR")
+    if directory:
+        return directory
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "animaloom")
+
+
+def _trusted_file(f: Any) -> bool:
+    """Whether an open cache file belongs to the current user and no one else can write to it."""
+    if not hasattr(os, "getuid"):
+        return True # Windows: the user's local app data is private already
+    stat = os.fstat(f.fileno())
+    return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
+
+
+class TheMnemosyne:
+    def __init__(self, module_path: str, cache_path: Optional[str] = None):
+        self.module_path = module_path
+        if cache_path is None:
+            path = os.path.abspath(module_path)
+            digest = hashlib.blake2b(path.encode("utf-8"), digest_size=8).hexdigest()
+            cache_path = os.path.join(cache_directory(), f"{os.path.basename(path)}-{digest}{CACHE_FILE_NAME}")
+        self.cache_path = cache_path
+        # The key of the sources as last hashed; remember() stores the state under it.
+        self.key: Optional[bytes] = None
+
+    def source_key(self) -> bytes:
+        """Hashes the names and content of the module's TOML files, the cache format and the Python version (for marshalled code)."""
+        digest = hashlib.blake2b(digest_size=_KEY_SIZE)
+        digest.update(f"{CACHE_FORMAT}:{sys.version_info[0]}.{sys.version_info[1]}".encode("utf-8"))
+        for file_name in discover_hyle_files(self.module_path):
+            with open(os.path.join(self.module_path, file_name), "rb") as f:
+                content = f.read()
+            digest.update(file_name.encode("utf-8") + b"\0")
+            digest.update(len(content).to_bytes(8, "little"))
+            digest.update(content)
+        self.key = digest.digest()
+        return self.key
+
+    def recall(self, alembic: TheAlembic, moirai: TheMoirai) -> bool:
+        """
+        Loads the module into the Alembic and Moirai from the cache if it was written from the Hyle
+        as it is now. Returns False (leaving both untouched) if there is no such cache.
+        """
+        key = self.source_key()
+        try:
+            with open(self.cache_path, "rb") as f:
+                if not _trusted_file(f):
+                    print(f"Warning: Ignoring Hyle cache {self.cache_path}: it may be written by other users.")
+                    return False
+                data = f.read()
+        except OSError:
+            return False
+        header = len(_MAGIC) + _KEY_SIZE
+        if data[:len(_MAGIC)] != _MAGIC or data[len(_MAGIC):header] != key:
+            return False
+        try:
+            state: Dict[str, Any] = pickle.loads(memoryview(data)[header:])
+        except Exception as e: # A truncated or foreign file is just a cache miss
+            print(f"Warning: Ignoring unreadable Hyle cache {self.cache_path}: {e}")
+            return False
+
+        moirai.constants = state["constants"]
+        moirai._detach_hooks()
+        moirai.schema = state["schema"]
+        moirai._attach_hooks()
+        moirai.formulas = state["formulas"]
+        moirai.inline_expressions = state["inline_expressions"]
+        moirai.compiled = state["compiled"]
+        if moirai.memo is not None:
+            moirai.memo.clear()
+        if moirai.derived is not None:
+            moirai.enable_derived_stats()
+        alembic.schema = state["schema"]
+        alembic.loaded_hyle = state["loaded_hyle"]
+        alembic.templates = state["templates"]
+        print(f"Loaded game module from the Hyle cache {self.cache_path}.")
+        return True
+
+    def remember(self, alembic: TheAlembic, moirai: TheMoirai):
+        """
+        Caches the state of an Alembic and Moirai that just loaded the module, under the key of the
+        sources they were loaded from (hashed by recall(), or now if it wasn't called). Definitions
+        left lazy by The Hermes are parsed, and character templates compiled, before they are cached.
+        """
+        key = self.key or self.source_key()
+        # Sections loaded lazily are parsed and compiled now, so later loads find them ready.
+        for section in alembic.loaded_hyle.values():
+            if isinstance(section, LazySection):
+                section.parse_all()
+        characters = alembic.loaded_hyle.get("characters", {})
+        for character_id in characters:
+            if not isinstance(characters, LazySection) or character_id in characters.entries:
+                alembic.compile_template(character_id)
+        state = {
+            "constants": moirai.constants,
+            "schema": alembic.schema,
+            "formulas": moirai.formulas,
+            "inline_expressions": moirai.inline_expressions,
+            "compiled": moirai.compiled,
+            "loaded_hyle": alembic.loaded_hyle,
+            "templates": alembic.templates,
+        }
+        # Written aside and swapped in, so concurrent loaders never read half a cache.
+        temporary_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", mode=0o700, exist_ok=True)
+            with open(os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+                f.write(_MAGIC)
+                f.write(key)
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, self.cache_path)
+        except (OSError, pickle.PicklingError) as e:
+            print(f"Warning: Could not write the Hyle cache {self.cache_path}: {e}")
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def forget(self):
+        """Deletes the cache file, if any."""
+        if os.path.exists(self.cache_path):
+            os.remove(self.cache_path)
+
+# Example Usage (for testing purposes)
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import shutil
+    import tempfile
+    import time
+    from the_loom.the_chorus import GAME_MODULES_DIR, load_game_module
+
+    # Work on a copy of kismet_social with many more characters, so the cache has something to save.
+    module_path = os.path.join(tempfile.mkdtemp(), "kismet_social")
+    shutil.copytree(os.path.join(GAME_MODULES_DIR, "kismet_social"), module_path)
+    with open(os.path.join(module_path, "characters.toml"), "a") as f:
+        for i in range(3000):
+            f.write(f'\n[characters.villager_{i}]\nname = "Villager {i}"\ngeneration_type = "template"\n'
+                    f'core.charisma = {{ type = "range", min = {i % 10}, max = {i % 10 + 10} }}\n'
+                    f'core.strength = {{ type = "normal", mean = 10, stddev = 2, round = true }}\n')
+
+    def timed_load():
+        start = time.perf_counter()
+        alembic, moirai = load_game_module(module_path)
+        return time.perf_counter() - start, alembic, moirai
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        cold, _, _ = timed_load()
+        warm, alembic, moirai = timed_load()
+    print(f"From TOML: {cold:.3f}s; from the Hyle cache: {warm:.3f}s")
+    print(f"Templates: {len(alembic.templates)}; formulas: {len(moirai.compiled)}; "
+          f"schema shared: {all(template.schema is alembic.schema for template in alembic.templates.values())}")
+    gossip = alembic.create_eidolon("town_gossip")
+    print(f"Tell joke score for {gossip.name}: {moirai.evaluate_formula('tell_joke_success_score', gossip):.2f}")
+
+    # Editing any Hyle file invalidates the cache
+    with open(os.path.join(module_path, "formulas.toml"), "a") as f:
+        f.write('\n[formulas.double_charisma]\nexpression = "actor.core.charisma * 2"\n')
+    mnemosyne = TheMnemosyne(module_path)
+    print(f"Cache still valid after editing formulas.toml: {mnemosyne.recall(TheAlembic(), TheMoirai())}")
+    print(f"The cache is kept outside the module: {not os.path.exists(os.path.join(module_path, CACHE_FILE_NAME))}")
+    mnemosyne.forget()
+    shutil.rmtree(os.path.dirname(module_path))
@@ -3,26 +3,893 @@ The Moirai: Determines the fate of interactions by evaluating configurable formu
 This module is responsible for parsing and executing the game's core logic defined in The Hyle.
 """
 
+import ast
+import copy
+import marshal
+import re
+import types
+import weakref
 import tomllib # Requires Python 3.11+
-from typing import Dict, Any
-from the_loom.the_eidolon import Eidolon
+from collections import OrderedDict
+from functools import reduce
+from typing import Dict, Any, Callable, FrozenSet, List, Optional, Sequence, Set, Tuple
+from the_loom.the_eidolon import (
+    DEFAULT_SCHEMA, HYLE_TIER_NAMES, RELATION_ATTRIBUTES, Eidolon, EidolonSchema, RelationView,
+)
+from the_loom.the_skein import EDGE_KEY_SHIFT
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional; batch evaluation falls back to pure Python without it.
+    np = None
+
+# The two agents a formula can refer to.
+FORMULA_ROLES = ("actor", "target")
+
+# Maps the tier names used in The Hyle to the Eidolon attribute holding that tier.
+TIER_ALIASES = HYLE_TIER_NAMES
+
+# Plain (non-tier) fields of an Eidolon that formulas may read, e.g. actor.name.
+ROLE_FIELDS = {"name", "eid"}
+
+# Affinity paths read as <owner>.affinity.<type>_towards.<other>, e.g. target.affinity.antagonistic_towards.actor.
+AFFINITY_TIER = "affinity"
+AFFINITY_SUFFIX = "_towards"
+
+# Eidolon methods that formulas may call directly, e.g. actor.get_affinity(target.name, 'platonic'),
+# mapped to the tier they read from (every key of that tier counts as read).
+ROLE_METHODS = {"get_affinity": "affinities"}
+
+# Relationship type -> the (tier, attribute) an Eidolon exposes it as; other types are affinities.
+RELATION_TIERS = {relation_type: key for key, relation_type in RELATION_ATTRIBUTES.items()}
+
+# Marks a dependency on every key of a tier.
+ANY_KEY = "*"
+
+# Methods that may be called on attribute values, e.g. actor.ledger.grievances.get(target.name, 0).
+VALUE_METHODS = {"get", "keys", "values", "items"}
+
+# Builtins available to every formula.
+SAFE_FUNCTIONS: Dict[str, Callable] = {
+    "abs": abs,
+    "min": min,
+    "max": max,
+    "round": round,
+    "sum": sum,
+    "len": len,
+    "int": int,
+    "float": float,
+}
+
+# Vectorized stand-ins for the constructs that NumPy arrays don't support natively.
+VECTOR_FUNCTIONS: Dict[str, Callable] = {} if np is None else {
+    "_where": np.where,
+    "_all": lambda *values: reduce(np.logical_and, values),
+    "_any": lambda *values: reduce(np.logical_or, values),
+    "_not": np.logical_not,
+    "_abs": np.abs,
+    "_min": lambda *values: reduce(np.minimum, values),
+    "_max": lambda *values: reduce(np.maximum, values),
+    "_round": np.round,
+}
+
+# The globals each compiled function of a CompiledFormula runs with.
+FUNCTION_GLOBALS: Dict[str, Dict[str, Any]] = {
+    "function": {"__builtins__": {}, "_RelationView": RelationView, **SAFE_FUNCTIONS},
+    "slot_function": {"__builtins__": {}, **SAFE_FUNCTIONS},
+    "vector_function": {"__builtins__": {}, **VECTOR_FUNCTIONS},
+}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp, ast.Call,
+    ast.Constant, ast.Name, ast.Attribute, ast.Tuple, ast.List, ast.Load,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.UAdd, ast.USub, ast.Not, ast.And, ast.Or,
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn,
+)
+
+_TERNARY_TOKENS = re.compile(r"""'(?:\\.|[^'\\])*'|"(?:\\.|[^"\\])*"|[()\[\]?:]|[^'"()\[\]?:]+""")
+
+
+def translate_ternary(expression: str) -> str:
+    """Rewrites C-style `cond ? a : b` (as used in The Hyle) into Python's `(a if cond else b)`."""
+    if "?" not in expression:
+        return expression
+    tokens = _TERNARY_TOKENS.findall(expression)
+    closers = {"(": ")", "[": "]"}
+
+    def render(items: List[str]) -> str:
+        if "?" not in items:
+            return "".join(items)
+        question = items.index("?")
+        depth = 0
+        for colon in range(question + 1, len(items)):
+            if items[colon] == "?":
+                depth += 1
+            elif items[colon] == ":":
+                if depth == 0:
+                    break
+                depth -= 1
+        else:
+            raise ValueError(f"Ternary '?' without matching ':' in expression: {expression}")
+        condition = "".join(items[:question])
+        when_true = render(items[question + 1:colon])
+        when_false = render(items[colon + 1:])
+        return f"(({when_true}) if ({condition}) else ({when_false}))"
+
+    def group(pos: int, closer: Optional[str]) -> Tuple[str, int]:
+        items: List[str] = []
+        while pos < len(tokens):
+            token = tokens[pos]
+            pos += 1
+            if token in closers:
+                inner, pos = group(pos, closers[token])
+                items.append(token + inner + closers[token])
+            elif token == closer:
+                return render(items), pos
+            else:
+                items.append(token)
+        if closer is not None:
+            raise ValueError(f"Unbalanced brackets in expression: {expression}")
+        return render(items), pos
+
+    return group(0, None)[0]
+
+
+def _attribute_path(node: ast.AST) -> Optional[List[str]]:
+    """Flattens `a.b.c` into ['a', 'b', 'c']; returns None if the chain is not rooted at a plain name."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return parts[::-1]
+
+
+class CompiledFormula:
+    """A formula parsed, validated and compiled once, ready to be called with (actor, target)."""
+
+    __slots__ = (
+        "name", "expression", "schema", "tree", "reads", "relations", "references", "dependencies",
+        "uses_target", "source", "function", "vector_slots", "vector_function", "slot_function",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        expression: str,
+        tree: ast.AST,
+        reads: Dict[str, Tuple[str, str, str]],
+        references: FrozenSet[str] = frozenset(),
+        relations: Optional[Dict[str, Tuple[str, str, str]]] = None,
+        schema: EidolonSchema = DEFAULT_SCHEMA,
+    ):
+        self.name = name
+        self.expression = expression
+        # The Eidolon layout the accessors were compiled against.
+        self.schema = schema
+        # Names of the formulas inlined into this one.
+        self.references = references
+        # Normalized expression tree; every attribute read is replaced by a Name node whose id is a key of `reads`.
+        self.tree = tree
+        # slot name -> (role, tier, attribute), e.g. "actor__core_attributes__charisma" -> ("actor", "core_attributes", "charisma")
+        self.reads = reads
+        # slot name -> (owner role, affinity type, other role), e.g. ("target", "antagonistic", "actor"),
+        # with other role None for the owner's total of that type, e.g. ("actor", "grievance", None)
+        self.relations = relations or {}
+        # The read-set: every (role, tier, key) this formula's result depends on.
+        dependencies = set(reads.values())
+        for owner, relation_type, _ in self.relations.values():
+            tier, key = RELATION_TIERS.get(relation_type, ("affinities", relation_type))
+            dependencies.add((owner, tier, key))
+        for node in ast.walk(tree):
+            if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                    and isinstance(node.func.value, ast.Name) and node.func.value.id in FORMULA_ROLES):
+                dependencies.add((node.func.value.id, ROLE_METHODS[node.func.attr], ANY_KEY))
+        self.dependencies: FrozenSet[Tuple[str, str, str]] = frozenset(dependencies)
+        self.uses_target = any(
+            isinstance(node, ast.Name) and (
+                node.id == "target"
+                or node.id in reads and reads[node.id][0] == "target"
+                or node.id in self.relations and "target" in self.relations[node.id][::2]
+            )
+            for node in ast.walk(tree)
+        )
+        body = _ReadResolver(reads, self.relations, schema).visit(copy.deepcopy(tree))
+        self.source = ast.unparse(body)
+        lambda_tree = ast.Expression(body=ast.Lambda(
+            args=ast.arguments(
+                posonlyargs=[], args=[ast.arg(arg=role) for role in FORMULA_ROLES],
+                kwonlyargs=[], kw_defaults=[], defaults=[],
+            ),
+            body=body,
+        ))
+        ast.fix_missing_locations(lambda_tree)
+        code = compile(lambda_tree, f"<formula {name}>", "eval")
+        self.function: Callable[[Eidolon, Optional[Eidolon]], Any] = eval(code, FUNCTION_GLOBALS["function"])
+
+        # Variant taking the value of each read slot (in vector_slots order) instead of Eidolons, for values
+        # that don't live in an Eidolon yet (e.g. attributes drawn while spawning). Formulas that use the
+        # roles themselves (e.g. actor.name) raise NameError through it.
+        self.vector_slots = sorted(reads) + sorted(self.relations)
+        slot_tree = ast.Expression(body=ast.Lambda(
+            args=ast.arguments(
+                posonlyargs=[], args=[ast.arg(arg=slot) for slot in self.vector_slots],
+                kwonlyargs=[], kw_defaults=[], defaults=[],
+            ),
+            body=copy.deepcopy(tree),
+        ))
+        ast.fix_missing_locations(slot_tree)
+        slot_code = compile(slot_tree, f"<slot formula {name}>", "eval")
+        self.slot_function: Callable[..., Any] = eval(slot_code, FUNCTION_GLOBALS["slot_function"])
+
+        # Column-wise variant taking one array per read slot, or None if the formula can't be vectorized.
+        self.vector_function: Optional[Callable[..., Any]] = None
+        if np is not None:
+            try:
+                vector_body = _Vectorizer().visit(copy.deepcopy(tree))
+            except _NotVectorizable:
+                pass
+            else:
+                vector_tree = ast.Expression(body=ast.Lambda(
+                    args=ast.arguments(
+                        posonlyargs=[], args=[ast.arg(arg=slot) for slot in self.vector_slots],
+                        kwonlyargs=[], kw_defaults=[], defaults=[],
+                    ),
+                    body=vector_body,
+                ))
+                ast.fix_missing_locations(vector_tree)
+                vector_code = compile(vector_tree, f"<vector formula {name}>", "eval")
+                self.vector_function = eval(vector_code, FUNCTION_GLOBALS["vector_function"])
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickles the compiled functions as their code objects, so loading a formula doesn't recompile it."""
+        state = {slot: getattr(self, slot) for slot in self.__slots__ if slot not in FUNCTION_GLOBALS}
+        state["code"] = {
+            slot: marshal.dumps(getattr(self, slot).__code__)
+            for slot in FUNCTION_GLOBALS if getattr(self, slot) is not None
+        }
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        code = state.pop("code")
+        for slot, value in state.items():
+            setattr(self, slot, value)
+        for slot, namespace in FUNCTION_GLOBALS.items():
+            setattr(self, slot, types.FunctionType(marshal.loads(code[slot]), namespace) if slot in code else None)
+
+    def __repr__(self):
+        return f"<CompiledFormula: {self.name}>"
+
+
+class _FormulaNormalizer(ast.NodeTransformer):
+    """Validates a parsed formula and replaces attribute paths like actor.core.charisma with read slots."""
+
+    def __init__(
+        self,
+        name: str,
+        formulas: Optional[Callable[[str], Optional["CompiledFormula"]]] = None,
+        constants: Optional[Dict[str, Any]] = None,
+        schema: EidolonSchema = DEFAULT_SCHEMA,
+    ):
+        self.name = name
+        self.formulas = formulas
+        self.constants = constants or {}
+        self.schema = schema
+        self.reads: Dict[str, Tuple[str, str, str]] = {}
+        self.relations: Dict[str, Tuple[str, str, str]] = {}
+        self.references: Set[str] = set()
+
+    def fail(self, message: str):
+        raise ValueError(f"Formula '{self.name}': {message}")
+
+    def generic_visit(self, node):
+        if not isinstance(node, _ALLOWED_NODES):
+            self.fail(f"'{type(node).__name__}' is not allowed in formulas.")
+        return super().generic_visit(node)
+
+    def visit_Name(self, node: ast.Name):
+        if node.id in FORMULA_ROLES:
+            return node
+        referenced = self.formulas(node.id) if self.formulas else None
+        if referenced is None:
+            self.fail(f"Unknown name '{node.id}'.")
+        # Inline the referenced formula; it shares this formula's actor and target.
+        self.references.add(node.id)
+        self.reads.update(referenced.reads)
+        self.relations.update(referenced.relations)
+        return ast.copy_location(copy.deepcopy(referenced.tree), node)
+
+    def visit_Subscript(self, node: ast.Subscript):
+        value = self.visit(node.value)
+        index = self.visit(node.slice)
+        if not (isinstance(value, ast.Constant) and isinstance(index, ast.Constant)):
+            self.fail(f"Only game constants can be indexed, not '{ast.unparse(node)}'.")
+        try:
+            return ast.copy_location(ast.Constant(value=value.value[index.value]), node)
+        except (IndexError, KeyError, TypeError):
+            self.fail(f"Invalid constant index '{ast.unparse(node)}'.")
+
+    def visit_Attribute(self, node: ast.Attribute):
+        path = _attribute_path(node)
+        if path is not None and path[0] not in FORMULA_ROLES and path[0] in self.constants:
+            return ast.copy_location(ast.Constant(value=self.constant(path)), node)
+        if path is None or path[0] not in FORMULA_ROLES:
+            self.fail(f"Unsupported attribute access '{ast.unparse(node)}'.")
+        role = path[0]
+        if len(path) == 2:
+            if path[1] not in ROLE_FIELDS:
+                self.fail(f"Unknown field '{ast.unparse(node)}'.")
+            return node
+        if path[1] == AFFINITY_TIER:
+            return self.affinity(node, path)
+        if len(path) != 3:
+            self.fail(f"Attribute path '{ast.unparse(node)}' is too deep.")
+        tier = TIER_ALIASES.get(path[1])
+        if tier is None:
+            self.fail(f"Unknown attribute tier '{path[1]}' in '{ast.unparse(node)}'.")
+        if not self.schema.has_attribute(tier, path[2]):
+            self.fail(f"Unknown attribute '{path[2]}' in '{ast.unparse(node)}'.")
+        slot = f"{role}__{tier}__{path[2]}"
+        self.reads[slot] = (role, tier, path[2])
+        # Attributes held in the Skein are read through a view (see _ReadResolver).
+        return ast.copy_location(ast.Name(id=slot, ctx=ast.Load()), node)
+
+    def affinity(self, node: ast.Attribute, path: List[str]) -> ast.Name:
+        if len(path) != 4 or path[3] not in FORMULA_ROLES:
+            self.fail(f"Affinity paths look like 'target.affinity.platonic_towards.actor', not '{ast.unparse(node)}'.")
+        owner, _, affinity_type, other = path
+        if affinity_type.endswith(AFFINITY_SUFFIX):
+            affinity_type = affinity_type[:-len(AFFINITY_SUFFIX)]
+        slot = f"{owner}__affinity__{affinity_type}__{other}"
+        self.relations[slot] = (owner, affinity_type, other)
+        return ast.copy_location(ast.Name(id=slot, ctx=ast.Load()), node)
+
+    def relation_lookup(self, receiver: ast.AST, method: str, args: List[ast.AST]) -> Optional[ast.Name]:
+        """
+        Turns owner.ledger.grievances.get(other.name, 0) into a relation slot, so it compiles to one
+        lookup in the owner's Skein like an affinity path. Returns None for any other call.
+        """
+        path = _attribute_path(receiver)
+        if method != "get" or path is None or len(path) != 3 or path[0] not in FORMULA_ROLES:
+            return None
+        tier = TIER_ALIASES.get(path[1])
+        relation_type = self.schema.relations.get(tier, {}).get(path[2])
+        if relation_type is None or len(args) != 2:
+            return None
+        other, default = _attribute_path(args[0]), args[1]
+        if other is None or len(other) != 2 or other[0] not in FORMULA_ROLES or other[1] != "name":
+            return None
+        if not (isinstance(default, ast.Constant) and default.value == 0):
+            return None
+        owner = path[0]
+        slot = f"{owner}__{relation_type}__{other[0]}"
+        self.relations[slot] = (owner, relation_type, other[0])
+        return ast.Name(id=slot, ctx=ast.Load())
+
+    def relation_total(self, node: ast.Call) -> Optional[ast.Name]:
+        """
+        Turns sum(owner.ledger.grievances.values()) into a relation slot read from the Skein's
+        running totals, so the sum costs one lookup however many grievances there are.
+        """
+        if not (isinstance(node.func, ast.Name) and node.func.id == "sum" and len(node.args) == 1):
+            return None
+        values = node.args[0]
+        if not (isinstance(values, ast.Call) and isinstance(values.func, ast.Attribute)
+                and values.func.attr == "values" and not values.args and not values.keywords):
+            return None
+        path = _attribute_path(values.func.value)
+        if path is None or len(path) != 3 or path[0] not in FORMULA_ROLES:
+            return None
+        relation_type = self.schema.relations.get(TIER_ALIASES.get(path[1]), {}).get(path[2])
+        if relation_type is None:
+            return None
+        owner = path[0]
+        slot = f"{owner}__{relation_type}__total"
+        self.relations[slot] = (owner, relation_type, None)
+        return ast.Name(id=slot, ctx=ast.Load())
+
+    def constant(self, path: List[str]) -> Any:
+        value: Any = self.constants
+        for part in path:
+            if not isinstance(value, dict) or part not in value:
+                self.fail(f"Unknown game constant '{'.'.join(path)}'.")
+            value = value[part]
+        if isinstance(value, list):
+            value = tuple(value)
+        if not isinstance(value, (int, float, str, bool, tuple)):
+            self.fail(f"Game constant '{'.'.join(path)}' is not a value.")
+        return value
+
+    def visit_Call(self, node: ast.Call):
+        if node.keywords:
+            self.fail("Keyword arguments are not allowed in formulas.")
+        total = self.relation_total(node)
+        if total is not None:
+            return ast.copy_location(total, node)
+        node.args = [self.visit(arg) for arg in node.args]
+        if isinstance(node.func, ast.Name):
+            if node.func.id not in SAFE_FUNCTIONS:
+                self.fail(f"Unknown function '{node.func.id}'.")
+            return node
+        if isinstance(node.func, ast.Attribute):
+            method = node.func.attr
+            receiver = node.func.value
+            if isinstance(receiver, ast.Name) and receiver.id in FORMULA_ROLES:
+                if method not in ROLE_METHODS:
+                    self.fail(f"Unknown method '{receiver.id}.{method}'.")
+                return node
+            if method not in VALUE_METHODS:
+                self.fail(f"Unknown method '{method}'.")
+            relation = self.relation_lookup(receiver, method, node.args)
+            if relation is not None:
+                return ast.copy_location(relation, node)
+            node.func.value = self.visit(receiver)
+            return node
+        self.fail(f"Unsupported call '{ast.unparse(node)}'.")
+
+
+class _ConstantFolder(ast.NodeTransformer):
+    """Pre-computes every sub-expression whose operands are all constants."""
+
+    _FOLDABLE = (ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.Tuple)
+
+    def generic_visit(self, node):
+        node = super().generic_visit(node)
+        if isinstance(node, ast.IfExp) and isinstance(node.test, ast.Constant):
+            return node.body if node.test.value else node.orelse
+        foldable = isinstance(node, self._FOLDABLE) or (
+            isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in SAFE_FUNCTIONS
+        )
+        if not foldable:
+            return node
+        operands = node.args if isinstance(node, ast.Call) else [
+            child for child in ast.iter_child_nodes(node) if isinstance(child, ast.expr)
+        ]
+        if not all(isinstance(operand, ast.Constant) for operand in operands):
+            return node
+        try:
+            expression = ast.fix_missing_locations(ast.Expression(body=node))
+            value = eval(compile(expression, "<fold>", "eval"), {"__builtins__": {}, **SAFE_FUNCTIONS})
+        except Exception: # e.g. a division by zero is left for evaluation time to report
+            return node
+        return ast.copy_location(ast.Constant(value=value), node)
+
+
+class _ReadResolver(ast.NodeTransformer):
+    """Turns read slots into direct accessors at the schema's fixed offsets, e.g. actor._numbers[3]."""
+
+    def __init__(
+        self,
+        reads: Dict[str, Tuple[str, str, str]],
+        relations: Dict[str, Tuple[str, str, str]],
+        schema: EidolonSchema,
+    ):
+        self.reads = reads
+        self.relations = relations
+        self.schema = schema
+
+    def visit_Name(self, node: ast.Name):
+        if node.id in self.relations:
+            # One lookup in the owner's Skein: owner.skein.edges[type].get((owner.eid << 32) | other.eid, 0)
+            owner, affinity_type, other = self.relations[node.id]
+            if other is None:
+                lookup = ast.parse(f"{owner}.skein.totals[{affinity_type!r}].get({owner}.eid, 0)", mode="eval").body
+                return ast.copy_location(lookup, node)
+            lookup = ast.parse(
+                f"{owner}.skein.edges[{affinity_type!r}].get(({owner}.eid << {EDGE_KEY_SHIFT}) | {other}.eid, 0)",
+                mode="eval",
+            ).body
+            return ast.copy_location(lookup, node)
+        if node.id not in self.reads:
+            return node
+        role, tier, attribute = self.reads[node.id]
+        relation_type = self.schema.relations[tier].get(attribute)
+        if relation_type is not None:
+            view = ast.parse(f"_RelationView({role}, {relation_type!r})", mode="eval").body
+            return ast.copy_location(view, node)
+        is_numeric, offset = self.schema.layout[tier][attribute]
+        accessor = ast.Subscript(
+            value=ast.Attribute(
+                value=ast.Name(id=role, ctx=ast.Load()), attr="_numbers" if is_numeric else "_objects", ctx=ast.Load(),
+            ),
+            slice=ast.Constant(value=offset),
+            ctx=ast.Load(),
+        )
+        return ast.copy_location(accessor, node)
+
+
+class _NotVectorizable(Exception):
+    pass
+
+
+class _Vectorizer(ast.NodeTransformer):
+    """Rewrites a normalized formula so that every read slot may be a NumPy array."""
+
+    _FUNCTIONS = {"abs": "_abs", "min": "_min", "max": "_max", "round": "_round"}
+
+    @staticmethod
+    def call(function: str, args: List[ast.AST]) -> ast.Call:
+        return ast.Call(func=ast.Name(id=function, ctx=ast.Load()), args=args, keywords=[])
+
+    def visit_IfExp(self, node: ast.IfExp):
+        self.generic_visit(node)
+        return self.call("_where", [node.test, node.body, node.orelse])
+
+    def visit_BoolOp(self, node: ast.BoolOp):
+        self.generic_visit(node)
+        return self.call("_all" if isinstance(node.op, ast.And) else "_any", node.values)
+
+    def visit_UnaryOp(self, node: ast.UnaryOp):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return self.call("_not", [node.operand])
+        return node
+
+    def visit_Compare(self, node: ast.Compare):
+        self.generic_visit(node)
+        if any(isinstance(op, (ast.In, ast.NotIn)) for op in node.ops):
+            raise _NotVectorizable()
+        if len(node.ops) == 1:
+            return node
+        operands = [node.left] + node.comparators
+        pairs = [
+            ast.Compare(left=operands[i], ops=[op], comparators=[operands[i + 1]])
+            for i, op in enumerate(node.ops)
+        ]
+        return self.call("_all", pairs)
+
+    def visit_Call(self, node: ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in self._FUNCTIONS:
+            raise _NotVectorizable()
+        node.args = [self.visit(arg) for arg in node.args]
+        node.func = ast.Name(id=self._FUNCTIONS[node.func.id], ctx=ast.Load())
+        return node
+
+    def visit_Attribute(self, node: ast.Attribute):
+        raise _NotVectorizable()
+
+
+def compile_formula(
+    name: str,
+    expression: str,
+    formulas: Optional[Callable[[str], Optional[CompiledFormula]]] = None,
+    constants: Optional[Dict[str, Any]] = None,
+    schema: EidolonSchema = DEFAULT_SCHEMA,
+) -> CompiledFormula:
+    """
+    Parses, validates and compiles a Hyle expression. Raises ValueError if the expression is not a valid formula.
+
+    `formulas` resolves a bare name to another compiled formula, which is inlined in place.
+    `constants` (usually game_config.toml) lets dotted paths like game_rules.max_affinity_value
+    be folded into the compiled expression. `schema` is the Eidolon layout attribute reads are
+    checked against and compiled for.
+    """
+    try:
+        tree = ast.parse(translate_ternary(expression.strip()), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Formula '{name}': invalid syntax: {e.msg}") from e
+    normalizer = _FormulaNormalizer(name, formulas, constants, schema)
+    body = _ConstantFolder().visit(normalizer.visit(tree).body)
+    return CompiledFormula(
+        name, expression, body, normalizer.reads, frozenset(normalizer.references), normalizer.relations, schema,
+    )
+
+
+class FormulaMemo:
+    """
+    Bounded LRU cache of formula results keyed by (formula, actor, target).
+
+    Each entry remembers which (eidolon, tier, key) reads it depended on and is dropped as soon
+    as one of them is written through the Eidolon (its update_* methods or tier views). Mutating a
+    container value in place, or writing to a Skein directly, bypasses this and must be followed
+    by clear().
+    """
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self.entries: "OrderedDict[Tuple[str, Eidolon, Optional[Eidolon]], Tuple[Any, Tuple]]" = OrderedDict()
+        self.watchers: Dict[Tuple[Eidolon, str, str], Set[Tuple[str, Eidolon, Optional[Eidolon]]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def put(self, key: Tuple[str, Eidolon, Optional[Eidolon]], value: Any, watches: Tuple[Tuple[Eidolon, str, str], ...]):
+        if key in self.entries:
+            self.discard(key)
+        self.entries[key] = (value, watches)
+        for watch in watches:
+            self.watchers.setdefault(watch, set()).add(key)
+        while len(self.entries) > self.max_size:
+            self.discard(next(iter(self.entries)))
+            self.evictions += 1
+
+    def discard(self, key: Tuple[str, Eidolon, Optional[Eidolon]]):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for watch in entry[1]:
+            keys = self.watchers.get(watch)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.watchers[watch]
+
+    def on_write(self, eidolon: Eidolon, tier: str, key: str, value: Any):
+        """Write observer: drops every cached result that read the written attribute."""
+        for watch in ((eidolon, tier, key), (eidolon, tier, ANY_KEY)):
+            stale = self.watchers.pop(watch, None)
+            if stale:
+                for memo_key in list(stale):
+                    self.discard(memo_key)
+                    self.invalidations += 1
+
+    def on_column_write(self, eidolons: Sequence[Optional[Eidolon]], tier: str, key: str, values: Sequence[Any]):
+        """Column write observer: drops every cached result that read the attribute, without visiting each row."""
+        stale = [watch for watch in self.watchers if watch[1] == tier and watch[2] in (key, ANY_KEY)]
+        for watch in stale:
+            for memo_key in list(self.watchers.pop(watch, ())):
+                self.discard(memo_key)
+                self.invalidations += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.watchers.clear()
+
+    def discard_formulas(self, formula_names: Set[str]):
+        """Drops every cached result of the given formulas (e.g. after they were recompiled)."""
+        for key in [key for key in self.entries if key[0] in formula_names]:
+            self.discard(key)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class DerivedStats:
+    """
+    Derived attributes declared in The Hyle (the [derived_stats] table of game_config.toml), kept
+    up to date incrementally.
+
+    Each stat is computed by an actor-only formula whose read-set is the stat's input dependencies.
+    Writes to an input (observed like FormulaMemo's) only mark the stat dirty for that Eidolon;
+    refresh() recomputes just the dirty stats, in dependency order, and refresh_all() only visits
+    the Eidolons with dirty stats. Sums over relationships, e.g. sum(actor.ledger.grievances.values()),
+    read the Skein's running totals instead of rescanning them.
+    """
+
+    def __init__(self, moirai: "TheMoirai"):
+        self.moirai = moirai
+        # stat -> (tier, formula name); the stat is also the name of the attribute it is stored in
+        self.stats: Dict[str, Tuple[str, str]] = {}
+        # (tier, key) read by a formula -> the stats reading it
+        self.inputs: Dict[Tuple[str, str], Set[str]] = {}
+        # Stats ordered so that every stat comes after the derived stats it reads.
+        self.order: List[str] = []
+        # Eidolon -> its stats awaiting recomputation; an Eidolon dropped by the simulation drops out
+        self.dirty: "weakref.WeakKeyDictionary[Eidolon, Set[str]]" = weakref.WeakKeyDictionary()
+        self.recomputations = 0
+
+    def load(self, declarations: Dict[str, Dict[str, str]]):
+        """Declares stats from {stat: {"tier": ..., "formula": ...}}, as read from game_config.toml."""
+        for stat, declaration in declarations.items():
+            if not isinstance(declaration, dict) or "tier" not in declaration or "formula" not in declaration:
+                raise ValueError(f"Derived stat '{stat}' needs a 'tier' and a 'formula'.")
+            tier = TIER_ALIASES.get(declaration["tier"])
+            if tier is None:
+                raise ValueError(f"Derived stat '{stat}' has unknown tier '{declaration['tier']}'.")
+            self.stats[stat] = (tier, declaration["formula"])
+        self.rebuild()
+
+    def rebuild(self):
+        """Re-derives the inputs and order of every stat from the currently compiled formulas."""
+        inputs: Dict[Tuple[str, str], Set[str]] = {}
+        for stat, (tier, formula_name) in self.stats.items():
+            compiled = self.moirai.compiled.get(formula_name)
+            if compiled is None:
+                raise ValueError(f"Derived stat '{stat}': formula '{formula_name}' not found in The Moirai's repertoire.")
+            if compiled.uses_target:
+                raise ValueError(f"Derived stat '{stat}': formula '{formula_name}' must not read a target.")
+            if not self.moirai.schema.has_attribute(tier, stat):
+                raise ValueError(f"Derived stat '{stat}' is not an attribute of the '{tier}' tier.")
+            for _, read_tier, key in compiled.dependencies:
+                inputs.setdefault((read_tier, key), set()).add(stat)
+
+        order: List[str] = []
+        in_progress: List[str] = []
+
+        def visit(stat: str):
+            if stat in order:
+                return
+            if stat in in_progress:
+                cycle = in_progress[in_progress.index(stat):] + [stat]
+                raise ValueError(f"Derived stat cycle detected: {' -> '.join(cycle)}")
+            in_progress.append(stat)
+            formula_name = self.stats[stat][1]
+            for _, read_tier, key in self.moirai.compiled[formula_name].dependencies:
+                if key in self.stats and self.stats[key][0] == read_tier:
+                    visit(key)
+            in_progress.pop()
+            order.append(stat)
+
+        for stat in self.stats:
+            visit(stat)
+        self.inputs = inputs
+        self.order = order
+
+    def on_write(self, eidolon: Eidolon, tier: Optional[str], key: Optional[str], value: Any):
+        """Write observer: marks the stats reading the written attribute dirty for that Eidolon."""
+        if tier is None:
+            stale = set(self.stats)
+        else:
+            stale = self.inputs.get((tier, key), set()) | self.inputs.get((tier, ANY_KEY), set())
+        if stale:
+            self.dirty.setdefault(eidolon, set()).update(stale)
+
+    def on_column_write(self, eidolons: Sequence[Optional[Eidolon]], tier: str, key: str, values: Sequence[Any]):
+        """Column write observer: marks the stats reading the attribute dirty for every Eidolon of the column."""
+        stale = self.inputs.get((tier, key), set()) | self.inputs.get((tier, ANY_KEY), set())
+        if stale:
+            self.mark_dirty([eidolon for eidolon in eidolons if eidolon is not None], stale)
+
+    def mark_dirty(self, eidolons: Sequence[Eidolon], stats: Optional[Set[str]] = None):
+        """Forces the given stats (every stat by default) of the given Eidolons to be recomputed (e.g. after formulas changed)."""
+        stale = set(self.stats) if stats is None else stats & self.stats.keys()
+        if not stale:
+            return
+        for eidolon in eidolons:
+            self.dirty.setdefault(eidolon, set()).update(stale)
+
+    def stats_using(self, formula_names: Set[str]) -> Set[str]:
+        """The stats computed by any of the given formulas."""
+        return {stat for stat, (_, formula_name) in self.stats.items() if formula_name in formula_names}
+
+    def refresh(self, eidolon: Eidolon) -> bool:
+        """Recomputes the dirty stats of one Eidolon. Returns False if none were dirty."""
+        stale = self.dirty.pop(eidolon, None)
+        if not stale:
+            return False
+        for stat in self.order:
+            # Writing a stat may dirty the ones derived from it, which come later in the order.
+            stale.update(self.dirty.pop(eidolon, ()))
+            if stat not in stale:
+                continue
+            tier, formula_name = self.stats[stat]
+            value = self.moirai.evaluate_formula(formula_name, eidolon)
+            self.recomputations += 1
+            if value is not None and getattr(eidolon, tier)[stat] != value:
+                eidolon._write(tier, stat, value)
+        self.dirty.pop(eidolon, None)
+        return True
+
+    def refresh_all(self, members: Optional[Dict[str, Eidolon]] = None) -> int:
+        """
+        Refreshes every Eidolon with dirty stats (only those in members, a {name: Eidolon} map such
+        as The Nexus's, if given). Returns the number of Eidolons refreshed.
+        """
+        refreshed = 0
+        for eidolon in list(self.dirty):
+            if members is not None and members.get(eidolon.name) is not eidolon:
+                continue
+            refreshed += self.refresh(eidolon)
+        return refreshed
+
 
 class TheMoirai:
     def __init__(self):
         self.formulas: Dict[str, str] = {}
+        self.compiled: Dict[str, CompiledFormula] = {}
+        # Game configuration (game_config.toml); dotted paths into it are folded into formulas as constants.
+        self.constants: Dict[str, Any] = {}
+        # Raw expressions used in place of a formula name (cards may embed these), compiled under their own text.
+        self.inline_expressions: Set[str] = set()
+        # The Eidolon layout formulas are compiled against; Eidolons evaluated must share it.
+        self.schema: EidolonSchema = DEFAULT_SCHEMA
+        self.memo: Optional[FormulaMemo] = None
+        self.derived: Optional[DerivedStats] = None
+        # Set once The Canon has validated the loaded Hyle; evaluate_formula then skips its defensive checks.
+        self.trusted = False
+
+    def set_schema(self, schema: EidolonSchema):
+        """Switches to a game module's Eidolon layout and recompiles every formula for it."""
+        self._detach_hooks()
+        self.schema = schema
+        self._attach_hooks()
+        if self.formulas or self.inline_expressions:
+            self.compile_library()
+
+    def enable_memoization(self, max_size: int = 4096):
+        """Caches formula results until one of the attributes they read is written."""
+        if self.memo is None:
+            self.memo = FormulaMemo(max_size)
+            self.schema.add_write_observer(self.memo.on_write, self.memo.on_column_write)
+        else:
+            self.memo.max_size = max_size
+
+    def disable_memoization(self):
+        if self.memo is not None:
+            self.schema.remove_write_observer(self.memo.on_write)
+            self.memo = None
+
+    def enable_derived_stats(self) -> Optional[DerivedStats]:
+        """
+        Tracks the derived stats declared under [derived_stats] in the game configuration, so that
+        Eidolon.calculate_derived_stats only recomputes stats whose inputs changed. Eidolons created
+        before this call should be passed to derived.mark_dirty once.
+        """
+        self.disable_derived_stats()
+        derived = DerivedStats(self)
+        try:
+            derived.load(self.constants.get("derived_stats", {}))
+        except ValueError as e:
+            print(f"Error loading derived stats: {e}")
+            return None
+        self.derived = derived
+        self.schema.add_write_observer(derived.on_write, derived.on_column_write)
+        self.schema.derived_stats_refresher = derived.refresh
+        return derived
+
+    def disable_derived_stats(self):
+        if self.derived is not None:
+            self.schema.remove_write_observer(self.derived.on_write)
+            if self.schema.derived_stats_refresher == self.derived.refresh:
+                self.schema.derived_stats_refresher = None
+            self.derived = None
+
+    def _attach_hooks(self):
+        """Hooks the memo and the derived stats, if enabled, into the schema, which relays the writes of its Eidolons."""
+        if self.memo is not None:
+            self.schema.add_write_observer(self.memo.on_write, self.memo.on_column_write)
+        if self.derived is not None:
+            self.schema.add_write_observer(self.derived.on_write, self.derived.on_column_write)
+            self.schema.derived_stats_refresher = self.derived.refresh
+
+    def _detach_hooks(self):
+        if self.memo is not None:
+            self.schema.remove_write_observer(self.memo.on_write)
+        if self.derived is not None:
+            self.schema.remove_write_observer(self.derived.on_write)
+            if self.schema.derived_stats_refresher == self.derived.refresh:
+                self.schema.derived_stats_refresher = None
+
+    def read_set(self, formula_name: str) -> FrozenSet[Tuple[str, str, str]]:
+        """Returns the (role, tier, key) reads of a formula, e.g. ("actor", "core_attributes", "charisma")."""
+        compiled = self.compiled.get(formula_name)
+        if compiled is None:
+            raise ValueError(f"Formula '{formula_name}' not found in The Moirai's repertoire.")
+        return compiled.dependencies
+
+    def load_constants_from_hyle(self, hyle_path: str):
+        """Loads the game configuration whose values formulas may reference, e.g. game_rules.max_affinity_value."""
+        try:
+            with open(hyle_path, 'rb') as f: # tomllib requires binary mode
+                self.constants = tomllib.load(f)
+        except FileNotFoundError:
+            print(f"Error: Hyle file not found at {hyle_path}")
+            return
+        except tomllib.TOMLDecodeError as e:
+            print(f"Error decoding TOML from {hyle_path}: {e}")
+            return
+        if self.formulas:
+            self.compile_library()
 
     def load_formulas_from_hyle(self, hyle_path: str):
-        """Loads formulas from a specified TOML file (The Hyle)."""
+        """Loads formulas from a specified TOML file (The Hyle) and compiles them."""
         try:
             with open(hyle_path, 'rb') as f: # tomllib requires binary mode
                 hyle_data = tomllib.load(f)
             
             if 'formulas' in hyle_data:
-                for formula_name, formula_data in hyle_data['formulas'].items():
-                    if 'expression' in formula_data:
-                        self.formulas[formula_name] = formula_data['expression']
-                    else:
-                        print(f"Warning: Formula '{formula_name}' in {hyle_path} is missing 'expression'.")
+                self.load_formulas(hyle_data['formulas'], hyle_path)
             else:
                 print(f"Warning: No 'formulas' section found in {hyle_path}.")
 
@@ -31,101 +898,229 @@ class TheMoirai:
         except tomllib.TOMLDecodeError as e: # Updated exception name
             print(f"Error decoding TOML from {hyle_path}: {e}")
 
+    def load_formulas(self, formulas: Dict[str, Dict[str, Any]], source: str = "The Hyle"):
+        """Adds the formulas of an already read [formulas] section and recompiles the library."""
+        for formula_name, formula_data in formulas.items():
+            if 'expression' in formula_data:
+                self.formulas[formula_name] = formula_data['expression']
+            else:
+                print(f"Warning: Formula '{formula_name}' in {source} is missing 'expression'.")
+        self.compile_library()
+
+    def add_formula(self, formula_name: str, expression: str) -> bool:
+        """Registers a single formula and recompiles the library. Returns False if it failed to compile."""
+        self.formulas[formula_name] = expression
+        self.compile_library()
+        return formula_name in self.compiled
+
+    def compile_library(self, names: Optional[Set[str]] = None):
+        """
+        (Re)compiles every formula, or only the formulas and inline expressions in `names` (the rest
+        are kept as compiled). References to other formulas are inlined and game constants folded,
+        so a chain of small formulas costs the same as one flat expression. Cycles and invalid formulas
+        are reported and left out.
+        """
+        compiled: Dict[str, CompiledFormula] = {} if names is None else {
+            name: formula for name, formula in self.compiled.items() if name not in names
+        }
+        in_progress: List[str] = []
+
+        def resolve(formula_name: str) -> Optional[CompiledFormula]:
+            if formula_name in compiled:
+                return compiled[formula_name]
+            if formula_name not in self.formulas:
+                return None
+            if formula_name in in_progress:
+                cycle = in_progress[in_progress.index(formula_name):] + [formula_name]
+                raise ValueError(f"Formula cycle detected: {' -> '.join(cycle)}")
+            in_progress.append(formula_name)
+            try:
+                compiled[formula_name] = compile_formula(
+                    formula_name, self.formulas[formula_name], resolve, self.constants, self.schema,
+                )
+            finally:
+                in_progress.pop()
+            return compiled[formula_name]
+
+        for formula_name in self.formulas:
+            if names is not None and formula_name not in names:
+                continue
+            try:
+                resolve(formula_name)
+            except ValueError as e:
+                print(f"Error compiling formula '{formula_name}': {e}")
+        for expression in self.inline_expressions:
+            if names is not None and expression not in names:
+                continue
+            try:
+                compiled[expression] = compile_formula(expression, expression, resolve, self.constants, self.schema)
+            except ValueError as e:
+                print(f"Error compiling expression '{expression}': {e}")
+
+        self.compiled = compiled
+        if self.memo is not None:
+            if names is None:
+                self.memo.clear()
+            else:
+                self.memo.discard_formulas(names)
+        if self.derived is not None:
+            try:
+                self.derived.rebuild()
+            except ValueError as e:
+                print(f"Error rebuilding derived stats: {e}")
+                self.disable_derived_stats()
+
+    def dependents(self, formula_names: Set[str]) -> Set[str]:
+        """The given formulas plus every compiled formula or inline expression inlining one of them, directly or not."""
+        affected = set(formula_names)
+        grew = True
+        while grew:
+            grew = False
+            for name, compiled in self.compiled.items():
+                if name not in affected and compiled.references & affected:
+                    affected.add(name)
+                    grew = True
+        return affected
+
+    def reload_formulas(self, formulas: Dict[str, str]) -> Set[str]:
+        """
+        Replaces the formula library with `formulas` (name -> expression), recompiling only the
+        formulas whose expression changed and those inlining them; the others keep their compiled
+        code and memoized results. Returns the names recompiled (or removed).
+        """
+        changed = {name for name in self.formulas.keys() | formulas.keys() if self.formulas.get(name) != formulas.get(name)}
+        if not changed:
+            return set()
+        # Formulas that failed to compile may compile now (e.g. a formula they reference was added).
+        affected = self.dependents(changed) | {name for name in self.formulas if name not in self.compiled}
+        self.formulas = dict(formulas)
+        self.compile_library(affected)
+        return affected
+
+    def ensure_formula(self, reference: str) -> str:
+        """
+        Accepts either a formula name or a raw expression (as a card's effect may embed) and returns
+        the key to pass to evaluate_formula. Raises ValueError if the expression doesn't compile.
+        """
+        if reference in self.compiled:
+            return reference
+        if reference in self.formulas:
+            raise ValueError(f"Formula '{reference}' failed to compile.")
+        self.compiled[reference] = compile_formula(reference, reference, self.compiled.get, self.constants, self.schema)
+        self.inline_expressions.add(reference)
+        return reference
+
     def evaluate_formula(self, formula_name: str, actor: Eidolon, target: Eidolon = None) -> Any:
         """Evaluates a loaded formula using the provided Eidolon(s)."""
-        if formula_name not in self.formulas:
+        memo = self.memo
+        if self.trusted and memo is None:
+            # Validated Hyle: the formula exists and is given the target it needs. The Eidolons may
+            # still come from another module, which the compiled accessors would misread.
+            compiled = self.compiled[formula_name]
+            if actor.schema is not compiled.schema or (target is not None and target.schema is not compiled.schema):
+                raise ValueError(f"Formula '{formula_name}' was compiled for a different Eidolon schema.")
+            return compiled.function(actor, target)
+        compiled = self.compiled.get(formula_name)
+        if compiled is None:
             raise ValueError(f"Formula '{formula_name}' not found in The Moirai's repertoire.")
+        if not self.trusted and target is None and compiled.uses_target:
+            raise ValueError(f"Formula '{formula_name}' requires a target.")
+        if actor.schema is not compiled.schema or (target is not None and target.schema is not compiled.schema):
+            raise ValueError(f"Formula '{formula_name}' was compiled for a different Eidolon schema.")
 
-        expression = self.formulas[formula_name]
-
-        # Create a safe execution environment for eval()
-        # WARNING: Using eval() with untrusted input is a security risk.
-        # For a production system, a custom, secure expression parser is highly recommended.
-        # This is used for rapid prototyping based on the user's request for configurable formulas.
-        
-        # Provide access to Eidolon attributes via 'actor' and 'target' objects
-        # This maps the dot notation in TOML (e.g., actor.core.strength) to Python object access
-        local_vars = {
-            'actor': actor,
-            'target': target, # Target can be None for self-affecting formulas
-            # Add any other global functions or constants needed in formulas here
-        }
+        if memo is not None:
+            key = (formula_name, actor, target)
+            entry = memo.entries.get(key)
+            if entry is not None:
+                memo.hits += 1
+                memo.entries.move_to_end(key)
+                return entry[0]
+            memo.misses += 1
 
         try:
-            # Replace dot notation with attribute access for eval
-            # This is a very basic replacement and needs to be more robust for production
-            # For example, 'actor.core.strength' becomes 'actor.core_attributes["strength"]'
-            # This simple approach assumes a fixed structure for accessing attributes.
-            # A more advanced parser would handle arbitrary depth and types.
-            processed_expression = expression
-            
-            # Simple replacements for common access patterns based on Eidolon structure
-            processed_expression = processed_expression.replace('actor.core.', 'actor.core_attributes["')
-            processed_expression = processed_expression.replace('actor.personality.', 'actor.personality["')
-            processed_expression = processed_expression.replace('actor.dynamic_states.', 'actor.dynamic_states["')
-            processed_expression = processed_expression.replace('actor.ledger.', 'actor.ledger["')
-            
-            if target:
-                processed_expression = processed_expression.replace('target.core.', 'target.core_attributes["')
-                processed_expression = processed_expression.replace('target.personality.', 'target.personality["')
-                processed_expression = processed_expression.replace('target.dynamic_states.', 'target.dynamic_states["')
-                processed_expression = processed_expression.replace('target.ledger.', 'target.ledger["')
-                
-            # Close the bracket for the dictionary access
-            processed_expression = processed_expression.replace('strength', 'strength"]')
-            processed_expression = processed_expression.replace('agility', 'agility"]')
-            processed_expression = processed_expression.replace('intellect', 'intellect"]')
-            processed_expression = processed_expression.replace('charisma', 'charisma"]')
-            processed_expression = processed_expression.replace('resilience', 'resilience"]')
-            processed_expression = processed_expression.replace('passion', 'passion"]')
-            processed_expression = processed_expression.replace('perception', 'perception"]')
-            processed_expression = processed_expression.replace('composure', 'composure"]')
-            
-            processed_expression = processed_expression.replace('openness', 'openness"]')
-            processed_expression = processed_expression.replace('conscientiousness', 'conscientiousness"]')
-            processed_expression = processed_expression.replace('extraversion', 'extraversion"]')
-            processed_expression = processed_expression.replace('agreeableness', 'agreeableness"]')
-            processed_expression = processed_expression.replace('neuroticism', 'neuroticism"]')
-
-            processed_expression = processed_expression.replace('health', 'health"]')
-            processed_expression = processed_expression.replace('stamina', 'stamina"]')
-            processed_expression = processed_expression.replace('social_battery', 'social_battery"]')
-            processed_expression = processed_expression.replace('emotional_state', 'emotional_state"]')
-            processed_expression = processed_expression.replace('sanity', 'sanity"]')
-
-            processed_expression = processed_expression.replace('trauma', 'trauma"]')
-            processed_expression = processed_expression.replace('secrets', 'secrets"]')
-            processed_expression = processed_expression.replace('grievances', 'grievances"]')
-            processed_expression = processed_expression.replace('reputation', 'reputation"]')
-
-            # Handle affinity access: target.affinity.platonic_towards.actor
-            # This is more complex and will require a more sophisticated parser for full implementation.
-            # For now, we'll assume direct access to affinity values if they are stored as simple attributes
-            # or require a specific function call like actor.get_affinity(target.name, 'platonic')
-            # For this prototype, let's assume affinity is accessed via a method call for simplicity.
-            # Example: actor.get_affinity(target.name, 'platonic')
-            # This means formulas would need to be written like: actor.get_affinity(target.name, 'platonic')
-            # instead of target.affinity.platonic_towards.actor
-            # Let's add a placeholder for this in the local_vars for now.
-            
-            # For now, let's simplify and assume direct access to affinity values if they were stored as attributes
-            # or that the formula explicitly calls a method like get_affinity.
-            # If the formula uses 'target.affinity.platonic_towards.actor', it will fail with this simple eval.
-            # A more robust solution would involve a custom parser or a more complex string replacement.
-            
-            # For the purpose of this prototype, let's assume formulas will use direct attribute access or simple arithmetic.
-            # If affinity is needed, it would be something like: actor.get_affinity(target.name, 'platonic')
-            # We need to make sure the Eidolon class has a get_affinity method that works with this.
-            # (It does, from the_eidolon.py)
-
-            result = eval(processed_expression, {"__builtins__": {}}, local_vars)
-            return result
+            result = compiled.function(actor, target)
         except Exception as e:
             print(f"Error evaluating formula '{formula_name}': {e}")
-            print(f"Expression: {expression}")
-            print(f"Processed Expression: {processed_expression}")
-            print(f"Local Vars: {local_vars}")
+            print(f"Expression: {compiled.expression}")
+            print(f"Compiled Expression: {compiled.source}")
             raise
+        if memo is not None:
+            watches = tuple(
+                (actor if role == "actor" else target, tier, attribute)
+                for role, tier, attribute in compiled.dependencies
+            )
+            memo.put(key, result, watches)
+        return result
+
+    def evaluate_formula_batch(
+        self,
+        formula_name: str,
+        actors: Sequence[Eidolon],
+        targets: Optional[Sequence[Eidolon]] = None,
+        pairwise: bool = False,
+    ) -> Any:
+        """
+        Evaluates a formula for many Eidolons at once.
+
+        With targets, the result is an N x M grid scoring every actor against every target,
+        or, with pairwise=True, one score per (actors[i], targets[i]) pair. Without targets it
+        is one score per actor. Returns a NumPy array when NumPy is available, otherwise
+        (nested) lists. Formulas that can't be vectorized are evaluated pair by pair.
+        """
+        compiled = self.compiled.get(formula_name)
+        if compiled is None:
+            raise ValueError(f"Formula '{formula_name}' not found in The Moirai's repertoire.")
+        if targets is None and compiled.uses_target:
+            raise ValueError(f"Formula '{formula_name}' requires targets.")
+        if pairwise and targets is not None and len(targets) != len(actors):
+            raise ValueError("Pairwise evaluation requires as many targets as actors.")
+
+        grid = targets is not None and not pairwise
+        if compiled.vector_function is None:
+            function = compiled.function
+            if targets is None:
+                results = [function(actor, None) for actor in actors]
+            elif pairwise:
+                results = [function(actor, target) for actor, target in zip(actors, targets)]
+            else:
+                results = [[function(actor, target) for target in targets] for actor in actors]
+            return results if np is None else np.array(results)
+
+        columns = []
+        for slot in compiled.vector_slots:
+            if slot in compiled.relations:
+                columns.append(self._relation_column(compiled.relations[slot], actors, targets, grid))
+                continue
+            role, tier, attribute = compiled.reads[slot]
+            agents = actors if role == "actor" else targets
+            is_numeric, offset = compiled.schema.layout[tier][attribute]
+            if is_numeric:
+                column = np.fromiter((agent._numbers[offset] for agent in agents), dtype=float, count=len(agents))
+            else:
+                column = np.asarray([agent._objects[offset] for agent in agents])
+            if grid:
+                column = column.reshape((-1, 1)) if role == "actor" else column.reshape((1, -1))
+            columns.append(column)
+        shape = (len(actors), len(targets)) if grid else (len(actors),)
+        return np.broadcast_to(compiled.vector_function(*columns), shape).copy()
+
+    @staticmethod
+    def _relation_column(relation: Tuple[str, str, str], actors: Sequence[Eidolon], targets: Optional[Sequence[Eidolon]], grid: bool):
+        """Gathers one affinity value per (actor, target) cell for evaluate_formula_batch."""
+        owner_role, affinity_type, other_role = relation
+
+        def lookup(actor: Eidolon, target: Optional[Eidolon]) -> int:
+            owner = actor if owner_role == "actor" else target
+            if other_role is None:
+                return owner.skein.total(owner.eid, affinity_type)
+            other = actor if other_role == "actor" else target
+            return owner.skein.edges[affinity_type].get((owner.eid << EDGE_KEY_SHIFT) | other.eid, 0)
+
+        if targets is None:
+            return np.asarray([lookup(actor, None) for actor in actors])
+        if grid:
+            return np.asarray([[lookup(actor, target) for target in targets] for actor in actors]).reshape((len(actors), len(targets)))
+        return np.asarray([lookup(actor, target) for actor, target in zip(actors, targets)])
 
 # Example Usage (for testing purposes)
 if __name__ == "__main__":
@@ -146,11 +1141,47 @@ if __name__ == "__main__":
     [formulas.target_resistance]
     description = "Calculates target's resistance to social actions."
     expression = "target.core.resilience + target.personality.agreeableness"
+
+    [formulas.joke_margin]
+    description = "Composes two formulas; both are inlined when compiled."
+    expression = "tell_joke_success - target_resistance"
+
+    [formulas.capped_joke_margin]
+    description = "Caps the margin at a value from the game configuration."
+    expression = "min(joke_margin, game_rules.max_affinity_value / 2)"
+
+    [formulas.tangled_joke]
+    description = "A joke told to someone who resents the actor lands badly."
+    expression = "tell_joke_success - (target.affinity.antagonistic_towards.actor * 2.0)"
+
+    [formulas.angry_intimidate_power]
+    description = "Intimidation power with a bonus when the actor is angry."
+    expression = "actor.core.strength + (actor.dynamic_states.emotional_state == 'angry' ? 10 : 0)"
+
+    [formulas.reputation_derived]
+    description = "Reputation from charisma and extraversion, less every grievance held."
+    expression = "actor.core.charisma + actor.personality.extraversion - sum(actor.ledger.grievances.values())"
+
+    [formulas.sanity_derived]
+    description = "Sanity from resilience and composure."
+    expression = "(actor.core.resilience + actor.core.composure) / 2"
+    """
+
+    dummy_config_content = """
+    [game_rules]
+    max_affinity_value = 100
+
+    [derived_stats]
+    reputation = { tier = "ledger", formula = "reputation_derived" }
+    sanity = { tier = "dynamic_states", formula = "sanity_derived" }
     """
 
     with open("dummy_formulas.toml", "w") as f:
         f.write(dummy_hyle_content)
+    with open("dummy_game_config.toml", "w") as f:
+        f.write(dummy_config_content)
 
+    moirai.load_constants_from_hyle("dummy_game_config.toml")
     moirai.load_formulas_from_hyle("dummy_formulas.toml")
 
     # Create some Eidolons
@@ -170,8 +1201,49 @@ if __name__ == "__main__":
         bob_resistance = moirai.evaluate_formula("target_resistance", actor=alice, target=bob)
         print(f"Bob's resistance: {bob_resistance}")
 
+        alice.update_dynamic_state("emotional_state", "angry")
+        angry_score = moirai.evaluate_formula("angry_intimidate_power", actor=alice)
+        print(f"Alice's angry intimidate power: {angry_score}")
+        print(f"Compiled: {moirai.compiled['angry_intimidate_power'].source}")
+
+        print(f"Joke score reads: {sorted(attribute for _, _, attribute in moirai.read_set('tell_joke_success'))}")
+        moirai.enable_memoization(max_size=128)
+        moirai.evaluate_formula("tell_joke_success", actor=alice)
+        moirai.evaluate_formula("tell_joke_success", actor=alice)
+        alice.update_core_attribute("strength", 12) # Not read by the joke formula; the cached result survives.
+        moirai.evaluate_formula("tell_joke_success", actor=alice)
+        alice.update_core_attribute("charisma", 16) # Read by the joke formula; the cached result is dropped.
+        print(f"Alice's joke score after charisma change: {moirai.evaluate_formula('tell_joke_success', actor=alice)}")
+        print(f"Memo stats: {moirai.memo.stats()}")
+        moirai.disable_memoization()
+
+        print(f"Alice's capped joke margin against Bob: {moirai.evaluate_formula('capped_joke_margin', actor=alice, target=bob)}")
+        print(f"Compiled: {moirai.compiled['capped_joke_margin'].source}")
+        arcane_blast = moirai.ensure_formula("(actor.core.intellect * 0.5) + 3")
+        print(f"Alice's inline arcane blast: {moirai.evaluate_formula(arcane_blast, actor=alice)}")
+
+        bob.update_affinity(alice.name, "antagonistic", 10)
+        print(f"Alice's tangled joke against Bob: {moirai.evaluate_formula('tangled_joke', actor=alice, target=bob)}")
+        print(f"Compiled: {moirai.compiled['tangled_joke'].source}")
+
+        crowd = [alice, bob]
+        print(f"Crowd resistance grid: {moirai.evaluate_formula_batch('target_resistance', crowd, crowd)}")
+        print(f"Crowd joke scores: {moirai.evaluate_formula_batch('tell_joke_success', crowd)}")
+
+        derived = moirai.enable_derived_stats()
+        derived.mark_dirty(crowd) # Created before derived stats were tracked
+        print(f"Derived stats refreshed: {sum(derived.refresh(eidolon) for eidolon in crowd)} Eidolons")
+        alice.update_grievance(bob.name, 4) # Only Alice's reputation is now stale
+        alice.calculate_derived_stats()
+        bob.calculate_derived_stats()
+        print(f"Alice's reputation: {alice.ledger['reputation']}, sanity: {alice.dynamic_states['sanity']}")
+        print(f"Recomputations: {derived.recomputations}")
+        print(f"Compiled: {moirai.compiled['reputation_derived'].source}")
+        moirai.disable_derived_stats()
+
     except ValueError as e:
         print(e)
 
     import os
     os.remove("dummy_formulas.toml")
+    os.remove("dummy_game_config.toml")
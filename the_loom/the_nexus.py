@@ -3,49 +3,181 @@ The Nexus: Manages the world state and all active Eidolons within the AnimaLoom
 This module acts as the central hub for the simulation, holding all instantiated agents and their relationships.
 """
 
-from typing import Dict, Optional
-from the_loom.the_eidolon import Eidolon
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence
+from the_loom.the_eidolon import DEFAULT_SCHEMA, Eidolon, EidolonSchema, WriteObserver
+from the_loom.the_heddles import TheHeddles
+from the_loom.the_horae import TheHorae
+from the_loom.the_skein import TheSkein
+from the_loom.the_warp import TheWarp
+
+if TYPE_CHECKING:
+    from the_loom.the_moirai import TheMoirai
 
 class TheNexus:
+    # The process-wide Nexus handed out by TheNexus.shared()
     _instance: Optional["TheNexus"] = None
 
-    def __new__(cls):
+    def __init__(self):
+        # Each TheNexus() is an independent world; use TheNexus.shared() for one process-wide Nexus.
+        self.eidolons: Dict[str, Eidolon] = {}
+        # Keeps the world's time and runs everything scheduled as it advances
+        self.horae = TheHorae()
+        # Every affinity and grievance between the Eidolons of The Nexus
+        self.skein = TheSkein()
+        # Optional columnar store (see use_columnar_store); None keeps each Eidolon's own storage.
+        self.warp: Optional[TheWarp] = None
+        # Optional multi-process sharded store (see use_sharded_store)
+        self.heddles: Optional[TheHeddles] = None
+        # Write observers of this world (see add_write_observer), and the schemas of its Eidolons they are registered with
+        self.write_observers: List[WriteObserver] = []
+        self.schemas: List[EidolonSchema] = []
+        # Add other global world state variables here
+
+    @classmethod
+    def shared(cls) -> "TheNexus":
+        """The process-wide Nexus (the same instance on every call), for code that wants a single world."""
         if cls._instance is None:
-            cls._instance = super(TheNexus, cls).__new__(cls)
-            cls._instance.eidolons: Dict[str, Eidolon] = {}
-            cls._instance.time = 0 # Simple time counter
-            # Add other global world state variables here
+            cls._instance = cls()
         return cls._instance
 
+    @property
+    def time(self) -> int:
+        return self.horae.tick
+
+    def use_columnar_store(self, schema: Optional[EidolonSchema] = None) -> TheWarp:
+        """
+        Switches to columnar storage: every Eidolon's attributes move into The Warp's shared columns.
+        The columns are laid out by the schema of the Eidolons, unless another one is given.
+        """
+        if self.heddles is not None:
+            raise ValueError("The Nexus is sharded; it can't also use a columnar store.")
+        if self.warp is None:
+            self.warp = TheWarp(schema)
+            for eidolon in self.eidolons.values():
+                self.warp.adopt(eidolon)
+        return self.warp
+
+    def use_sharded_store(self, shards: Optional[int] = None, schema: Optional[EidolonSchema] = None) -> TheHeddles:
+        """
+        Partitions every Eidolon across worker processes (see The Heddles). Register the systems to
+        run on the returned Heddles; from then on each tick of The Horae ticks every shard in parallel.
+        The shards are laid out by the schema of the Eidolons, unless another one is given.
+        """
+        if self.warp is not None:
+            raise ValueError("The Nexus uses a columnar store; it can't also be sharded.")
+        if self.heddles is None:
+            if schema is None:
+                schema = next((eidolon.schema for eidolon in self.eidolons.values()), DEFAULT_SCHEMA)
+            self.heddles = TheHeddles(schema, shards)
+            self.heddles.adopt(list(self.eidolons.values()))
+            self.horae.add_phase("heddles", lambda tick: self.heddles.advance())
+        return self.heddles
+
+    def add_write_observer(self, observer: WriteObserver):
+        """
+        Registers an Eidolon write observer (see EidolonSchema.add_write_observer) with the schema of
+        every Eidolon of the Nexus, now and later. Eidolons outside the Nexus sharing a schema with
+        one inside are heard too, so observers check membership.
+        """
+        if observer not in self.write_observers:
+            self.write_observers.append(observer)
+            for schema in self.schemas:
+                schema.add_write_observer(observer)
+
+    def remove_write_observer(self, observer: WriteObserver):
+        if observer in self.write_observers:
+            self.write_observers.remove(observer)
+            for schema in self.schemas:
+                schema.remove_write_observer(observer)
+
+    def _observe(self, eidolons: Iterable[Eidolon]):
+        for schema in dict.fromkeys(eidolon.schema for eidolon in eidolons):
+            if schema not in self.schemas:
+                self.schemas.append(schema)
+                for observer in self.write_observers:
+                    schema.add_write_observer(observer)
+
     def add_eidolon(self, eidolon: Eidolon):
         if eidolon.name in self.eidolons:
             raise ValueError(f"Eidolon with name {eidolon.name} already exists in The Nexus.")
+        if self.heddles is not None:
+            self.heddles.adopt([eidolon])
+        self.skein.adopt(eidolon)
+        if self.warp is not None:
+            self.warp.adopt(eidolon)
+        self._observe([eidolon])
         self.eidolons[eidolon.name] = eidolon
 
+    def add_eidolons(self, eidolons: Sequence[Eidolon], numbers: Optional[Dict[int, Any]] = None, objects: Optional[Dict[int, Any]] = None):
+        """
+        Adds many Eidolons at once (e.g. a spawned crowd); columnar and sharded stores adopt them in bulk.
+        numbers and objects may supply their values column by column to The Warp (see TheWarp.adopt_many).
+        """
+        names = [eidolon.name for eidolon in eidolons]
+        if len(set(names)) != len(names) or not self.eidolons.keys().isdisjoint(names):
+            taken = next(name for i, name in enumerate(names) if name in self.eidolons or name in names[:i])
+            raise ValueError(f"Eidolon with name {taken} already exists in The Nexus.")
+        for eidolon in eidolons:
+            if eidolon.skein is not self.skein:
+                self.skein.adopt(eidolon)
+        if self.heddles is not None:
+            self.heddles.adopt(eidolons)
+        if self.warp is not None:
+            self.warp.adopt_many(eidolons, numbers, objects)
+        self._observe(eidolons)
+        self.eidolons.update(zip(names, eidolons))
+
     def get_eidolon(self, name: str) -> Optional[Eidolon]:
         return self.eidolons.get(name)
 
     def remove_eidolon(self, name: str):
         if name in self.eidolons:
+            if self.heddles is not None:
+                raise ValueError("Eidolons can't be removed from a sharded Nexus.")
+            if self.warp is not None:
+                self.warp.release(self.eidolons[name])
+            self.horae.wake(self.eidolons[name], notify=False)
+            self.skein.release(self.eidolons[name].eid)
             del self.eidolons[name]
 
-    def advance_time(self, steps: int = 1):
-        self.time += steps
+    def calculate_derived_stats(self, moirai: "TheMoirai") -> int:
+        """
+        Brings every Eidolon's derived stats up to date. With The Moirai tracking derived stats, only
+        Eidolons whose inputs changed are visited. Returns the number of Eidolons updated.
+        """
+        if moirai.derived is not None:
+            return moirai.derived.refresh_all(self.eidolons)
+        for eidolon in self.eidolons.values():
+            eidolon.calculate_derived_stats()
+        return len(self.eidolons)
+
+    def advance_time(self, steps: int = 1) -> int:
+        """Advances time, running The Horae's update phases and due events. Returns the number of events fired."""
+        fired = self.horae.advance(steps)
         print(f"Time advanced to: {self.time}")
-        # In a real game, this would trigger updates for all eidolons, world events, etc.
+        return fired
 
     def get_all_eidolons(self) -> Dict[str, Eidolon]:
         return self.eidolons
 
     def reset(self):
         """Resets the Nexus to its initial state. Useful for starting new simulations."""
+        if self.warp is not None:
+            for eidolon in self.eidolons.values():
+                self.warp.release(eidolon)
+            self.warp = TheWarp()
+        if self.heddles is not None:
+            self.heddles.close()
+            self.heddles = None
         self.eidolons = {}
-        self.time = 0
+        self.skein = TheSkein()
+        self.horae = TheHorae()
 
 # Example Usage (for testing purposes)
 if __name__ == "__main__":
-    nexus = TheNexus()
+    nexus = TheNexus.shared()
     print(f"Initial Nexus time: {nexus.time}")
+    print(f"Shared Nexus is a singleton: {TheNexus.shared() is nexus}; TheNexus() is a new world: {TheNexus() is not nexus}")
 
     # Create some Eidolons
     alice = Eidolon("Alice", strength=10, charisma=15, openness=80)
@@ -64,9 +196,22 @@ if __name__ == "__main__":
     print(f"Alice's platonic affinity for Bob: {alice.get_affinity(bob.name, 'platonic')}")
     print(f"Bob's rivalrous affinity for Alice: {bob.get_affinity(alice.name, 'rivalrous')}")
 
-    # Advance time
+    # Grievances live in the same graph; ask who holds one against Alice
+    bob.update_grievance(alice.name, 3)
+    print(f"Bob's grievances: {bob.ledger['grievances']}")
+    holders = nexus.skein.incoming(alice.eid, "grievance")
+    print(f"Grievances against Alice: {[(nexus.skein.name_of(source), value) for source, _, value in holders]}")
+
+    # Move to columnar storage and regenerate everyone's stamina in one column operation
+    alice.update_dynamic_state("stamina", 40)
+    nexus.use_columnar_store().regenerate("dynamic_states", "stamina", 25, maximum=100)
+    print(f"Stamina after regen: {[e.dynamic_states['stamina'] for e in nexus.get_all_eidolons().values()]}")
+
+    # Schedule a recurring event and put Bob to sleep, then advance time
+    nexus.horae.schedule(2, lambda: print(f"Gossip spreads at tick {nexus.time}"), every=3)
+    nexus.horae.sleep(bob, 4, on_wake=lambda eidolon: print(f"{eidolon.name} wakes at tick {nexus.time}"))
     nexus.advance_time()
-    nexus.advance_time(5)
+    print(f"Events fired: {nexus.advance_time(5)}")
 
     # Reset Nexus
     nexus.reset()
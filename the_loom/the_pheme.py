@@ -0,0 +1,137 @@
+"""
+The Pheme: Spreads the word of everything that happens in The Nexus.
+This module turns a running simulation into a stream of events: one "tick" event per tick, then the
+"card_play" events of the cards The Agon resolved during it, the "affinity" changes those plays made,
+and the "state" of every attribute written during the tick. Events are produced by a generator, tick
+by tick, and can be written as JSON Lines as they come, so a run of any length holds no more than one
+tick's events in memory. Several writes to the same attribute within a tick are reported once, with
+the last value.
+"""
+
+import json
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from the_loom.the_agon import CardPlay, TheAgon
+from the_loom.the_eidolon import Eidolon
+from the_loom.the_nexus import TheNexus
+
+EVENT_KINDS = ("tick", "card_play", "affinity", "state")
+
+# Writes reported by the affinity events instead (the write itself doesn't say towards whom)
+RELATION_WRITES = {"affinities", "ledger"}
+
+def _plain(value: Any) -> Any:
+    """JSON fallback for NumPy scalars."""
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def write_jsonl(events: Iterable[Dict[str, Any]], stream: IO[str]) -> int:
+    """Writes events to a text stream as they come, flushing after every tick. Returns the number written."""
+    written = 0
+    for event in events:
+        stream.write(json.dumps(event, default=_plain) + "\n")
+        written += 1
+        if event["event"] == "tick":
+            stream.flush()
+    stream.flush()
+    return written
+
+
+class ThePheme:
+    def __init__(self, nexus: TheNexus, agon: Optional[TheAgon] = None, kinds: Iterable[str] = EVENT_KINDS):
+        self.nexus = nexus
+        self.agon = agon
+        self.kinds = set(kinds)
+        unknown = self.kinds - set(EVENT_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown event kinds {sorted(unknown)}, expected some of {list(EVENT_KINDS)}")
+        # Plays queued in The Agon this tick, filled in as it resolves them
+        self.plays: List[CardPlay] = []
+        # (Eidolon, tier, attribute) -> the last value written this tick
+        self.changes: Dict[Tuple[Eidolon, str, str], Any] = {}
+        self.events_emitted = 0
+
+    def _on_write(self, eidolon: Eidolon, tier: Optional[str], key: Optional[str], value: Any):
+        # Eidolons outside the Nexus may share its schema, and so be heard too
+        if tier is not None and tier not in RELATION_WRITES and self.nexus.eidolons.get(eidolon.name) is eidolon:
+            self.changes[(eidolon, tier, key)] = value
+
+    def _capture(self, tick: int):
+        self.plays.extend(self.agon.queued)
+
+    def events(self, ticks: int) -> Iterator[Dict[str, Any]]:
+        """Advances time `ticks` ticks, yielding the events of each tick once it is over."""
+        watch_writes = "state" in self.kinds
+        watch_plays = self.agon is not None and bool(self.kinds & {"card_play", "affinity"})
+        if watch_writes:
+            self.nexus.add_write_observer(self._on_write)
+        if watch_plays:
+            phases = [name for name, _ in self.nexus.horae.phases]
+            self.nexus.horae.add_phase("pheme", self._capture, before="agon" if "agon" in phases else None)
+        try:
+            for _ in range(ticks):
+                fired = self.nexus.advance_time(1)
+                tick = self.nexus.time
+                if "tick" in self.kinds:
+                    self.events_emitted += 1
+                    yield {"event": "tick", "tick": tick, "events_fired": fired}
+                plays, self.plays = self.plays, []
+                for play in plays:
+                    yield from self._play_events(tick, play)
+                changes, self.changes = self.changes, {}
+                for (eidolon, tier, key), value in changes.items():
+                    self.events_emitted += 1
+                    yield {"event": "state", "tick": tick, "eidolon": eidolon.name, "tier": tier, "attribute": key, "value": value}
+        finally:
+            if watch_writes:
+                self.nexus.remove_write_observer(self._on_write)
+            if watch_plays:
+                self.nexus.horae.remove_phase("pheme")
+
+    def _play_events(self, tick: int, play: CardPlay) -> Iterator[Dict[str, Any]]:
+        if play.outcome is None: # Not resolved this tick
+            return
+        target = play.target.name if play.target is not None else None
+        if "card_play" in self.kinds:
+            self.events_emitted += 1
+            yield {
+                "event": "card_play", "tick": tick, "card": play.card_id, "actor": play.actor.name, "target": target,
+                "outcome": play.outcome, "roll": play.roll, "total": play.total, "difficulty": play.difficulty, "value": play.value,
+            }
+        if "affinity" not in self.kinds or play.value is None:
+            return
+        effect = self.agon.card(play.card_id).effect(play.outcome)
+        if effect is None or effect.affinity is None or play.target is None:
+            return
+        subject, other = (play.target, play.actor) if effect.subject == "target" else (play.actor, play.target)
+        self.events_emitted += 1
+        yield {
+            "event": "affinity", "tick": tick, "eidolon": subject.name, "towards": other.name, "type": effect.affinity,
+            "delta": play.value, "value": subject.get_affinity(other.eid, effect.affinity),
+        }
+
+# Example Usage (for testing purposes)
+if __name__ == "__main__":
+    import contextlib
+    import io
+    from collections import Counter
+    from the_loom.the_chorus import load_game_module
+    from the_loom.the_daimon import TheDaimon
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        alembic, moirai = load_game_module("kismet_social", use_cache=False)
+        nexus = TheNexus()
+        crowd = alembic.spawn_batch("town_gossip", 50, nexus=nexus)
+    agon = TheAgon(alembic, moirai)
+    agon.enable_hand_index(crowd)
+    agon.attach(nexus)
+    TheDaimon(agon, top_k=1).attach(nexus)
+    pheme = ThePheme(nexus, agon)
+    lines = io.StringIO()
+    with contextlib.redirect_stdout(io.StringIO()):
+        written = write_jsonl(pheme.events(5), lines)
+    events = [json.loads(line) for line in lines.getvalue().splitlines()]
+    print(f"{written} events over 5 ticks: {dict(Counter(event['event'] for event in events))}")
+    for kind in EVENT_KINDS:
+        print(next(line for line, event in zip(lines.getvalue().splitlines(), events) if event["event"] == kind))
+    print(f"Phases after the run: {[name for name, _ in nexus.horae.phases]}")
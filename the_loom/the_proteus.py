@@ -0,0 +1,189 @@
+"""
+The Proteus: Reshapes a loaded game module while it runs, as its Hyle is edited.
+This module watches a game module's TOML files (polling their size and modification time) and,
+when one changes, diffs the new Hyle against the loaded one and applies only the difference:
+changed formulas and the formulas inlining them are recompiled and their memoized results dropped,
+derived stats computed by them are recomputed for the Eidolons in The Nexus, and changed character
+definitions are recompiled into templates. The world itself is never reloaded.
+"""
+
+import os
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional, Set, Tuple
+from the_loom.the_alembic import TheAlembic
+from the_loom.the_canon import CanonError, TheCanon
+from the_loom.the_hermes import CONFIG_FILE, LazySection, TheHermes, discover_hyle_files
+from the_loom.the_moirai import TheMoirai
+
+if TYPE_CHECKING:
+    from the_loom.the_horae import TimedEvent
+    from the_loom.the_nexus import TheNexus
+
+# Configuration tables that can't change under a live world: they define the Eidolon layout.
+LAYOUT_TABLES = ("default_eidolon_attributes",)
+
+def changed_entries(old: Mapping[str, Any], new: Mapping[str, Any]) -> Set[str]:
+    """
+    The ids of entries added, removed or changed between two versions of a section. Entries of
+    LazySections are compared by their TOML text, without parsing them.
+    """
+    changed = set(old.keys() ^ new.keys())
+    lazy = isinstance(old, LazySection) and isinstance(new, LazySection)
+    for entry_id in old.keys() & new.keys():
+        if lazy:
+            if old.sources[entry_id] != new.sources[entry_id]:
+                changed.add(entry_id)
+            elif entry_id in old.entries: # Unchanged: keep the definition already parsed
+                new.entries.setdefault(entry_id, old.entries[entry_id])
+        elif old[entry_id] != new[entry_id]:
+            changed.add(entry_id)
+    return changed
+
+
+def _constants(config: Dict[str, Any]) -> Dict[str, Any]:
+    """The tables of a game configuration that formulas may fold in as constants."""
+    return {table: value for table, value in config.items() if table not in LAYOUT_TABLES and table != "derived_stats"}
+
+
+class TheProteus:
+    def __init__(self, module_path: str, alembic: TheAlembic, moirai: TheMoirai, nexus: Optional["TheNexus"] = None):
+        self.module_path = module_path
+        self.alembic = alembic
+        self.moirai = moirai
+        # The live world whose derived stats follow formula changes, if any.
+        self.nexus = nexus
+        # file name -> (size, modification time) when last loaded
+        self.stamps = self.stamp()
+        self.reloads = 0
+
+    def stamp(self) -> Dict[str, Tuple[int, int]]:
+        stamps = {}
+        for file_name in discover_hyle_files(self.module_path):
+            try:
+                status = os.stat(os.path.join(self.module_path, file_name))
+            except FileNotFoundError: # Deleted since it was listed
+                continue
+            stamps[file_name] = (status.st_size, status.st_mtime_ns)
+        return stamps
+
+    def poll(self) -> Optional[Dict[str, Any]]:
+        """Reloads the module if any of its TOML files was added, removed or modified. Returns the reload report, or None."""
+        stamps = self.stamp()
+        if stamps == self.stamps:
+            return None
+        self.stamps = stamps
+        return self.reload()
+
+    def watch(self, every: int = 1) -> "TimedEvent":
+        """Polls for changes every `every` ticks of The Nexus's Horae, so a running simulation picks them up between ticks."""
+        if self.nexus is None:
+            raise ValueError("The Proteus needs a Nexus to watch a running simulation.")
+        return self.nexus.horae.schedule(every, self.poll, every=every)
+
+    def reload(self) -> Dict[str, Any]:
+        """
+        Reads the module's Hyle again and applies what changed. Returns a report: the formulas
+        recompiled, the characters and cards changed, whether game constants changed, and the
+        number of Eidolons whose derived stats were recomputed. If any file fails to parse,
+        nothing is applied. A trusted Moirai stays trusted only if the new Hyle still follows The Canon.
+        """
+        report: Dict[str, Any] = {"formulas": set(), "characters": set(), "cards": set(), "constants": False, "refreshed": 0}
+        hermes = TheHermes(self.module_path)
+        hyle = hermes.load()
+        if len(hyle) < len(hermes.discover()):
+            print(f"Warning: Keeping the loaded Hyle of {self.module_path} until every file parses again.")
+            return report
+        self.reloads += 1
+        moirai = self.moirai
+        stale_stats: Set[str] = set()
+
+        config = hyle.get(CONFIG_FILE, {})
+        if config != moirai.constants:
+            for table in LAYOUT_TABLES:
+                if config.get(table) != moirai.constants.get(table):
+                    print(f"Warning: [{table}] changed; the Eidolon layout only changes when the module is loaded again.")
+            declarations_changed = config.get("derived_stats") != moirai.constants.get("derived_stats")
+            constants_changed = _constants(config) != _constants(moirai.constants)
+            moirai.constants = config
+            if constants_changed: # Constants are folded into formulas, so any formula may have changed
+                report["constants"] = True
+                moirai.compile_library()
+                report["formulas"] = set(moirai.compiled)
+            if declarations_changed:
+                if "derived_stats" in config:
+                    moirai.enable_derived_stats()
+                else:
+                    moirai.disable_derived_stats()
+                if moirai.derived is not None:
+                    stale_stats.update(moirai.derived.stats)
+
+        sections = hermes.sections(hyle)
+        formulas = {}
+        for formula_name, formula_data in sections.get("formulas", {}).items():
+            if "expression" in formula_data:
+                formulas[formula_name] = formula_data["expression"]
+            else:
+                print(f"Warning: Formula '{formula_name}' in {self.module_path} is missing 'expression'.")
+        report["formulas"] |= moirai.reload_formulas(formulas)
+        if moirai.derived is not None:
+            stale_stats |= moirai.derived.stats_using(report["formulas"])
+
+        for section_name in ("characters", "cards"):
+            new = sections.get(section_name, {})
+            report[section_name] = changed_entries(self.alembic.loaded_hyle.get(section_name, {}), new)
+            self.alembic.loaded_hyle[section_name] = new
+        for definition_id in report["characters"]:
+            self.alembic.templates.pop(definition_id, None)
+            if not isinstance(sections.get("characters"), LazySection) and definition_id in sections.get("characters", {}):
+                self.alembic.compile_template(definition_id)
+
+        if stale_stats and self.nexus is not None:
+            moirai.derived.mark_dirty(list(self.nexus.eidolons.values()), stale_stats)
+            report["refreshed"] = self.nexus.calculate_derived_stats(moirai)
+        if moirai.trusted:
+            try:
+                TheCanon(self.alembic.schema, moirai).enforce(self.alembic)
+            except CanonError as e:
+                print(f"Warning: The Moirai is no longer trusted. {e}")
+        changes = [f"{len(report[kind])} {kind}" for kind in ("formulas", "characters", "cards") if report[kind]]
+        print(f"Reloaded {self.module_path}: {', '.join(changes) or 'no changes'}"
+              f"{' (game constants changed)' if report['constants'] else ''}.")
+        return report
+
+# Example Usage (for testing purposes)
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+    from the_loom.the_chorus import GAME_MODULES_DIR, load_game_module
+    from the_loom.the_nexus import TheNexus
+
+    module_path = os.path.join(tempfile.mkdtemp(), "kismet_social")
+    shutil.copytree(os.path.join(GAME_MODULES_DIR, "kismet_social"), module_path)
+    alembic, moirai = load_game_module(module_path, use_cache=False)
+    moirai.enable_memoization()
+    nexus = TheNexus()
+    gregor = alembic.create_eidolon("gregor_the_guard")
+    nexus.add_eidolon(gregor)
+    nexus.calculate_derived_stats(moirai)
+
+    proteus = TheProteus(module_path, alembic, moirai, nexus)
+    proteus.watch(every=5)
+    untouched = moirai.compiled["intimidate_power"]
+    print(f"Joke score: {moirai.evaluate_formula('tell_joke_success_score', gregor):.2f}; reputation: {gregor.ledger['reputation']}")
+
+    def edit(file_name: str, old: str, new: str):
+        path = os.path.join(module_path, file_name)
+        with open(path) as f:
+            text = f.read()
+        with open(path, "w") as f:
+            f.write(text.replace(old, new))
+
+    # Balance pass while the simulation runs: a formula, a derived stat's formula and a template
+    edit("formulas.toml", "(actor.core.charisma * 1.5)", "(actor.core.charisma * 3)")
+    edit("formulas.toml", "actor.core.charisma + actor.core.passion", "actor.core.charisma * 2 + actor.core.passion")
+    edit("characters.toml", "charisma = { type = \"range\", min = 12, max = 18 }", "charisma = { type = \"range\", min = 30, max = 30 }")
+    nexus.advance_time(5) # The Proteus polls on tick 5
+    print(f"Joke score: {moirai.evaluate_formula('tell_joke_success_score', gregor):.2f}; reputation: {gregor.ledger['reputation']}")
+    print(f"Untouched formula kept: {moirai.compiled['intimidate_power'] is untouched}; "
+          f"new gossip charisma: {alembic.create_eidolon('town_gossip').core_attributes['charisma']}")
+    print(f"Nothing changed since: {proteus.poll() is None}")
+    shutil.rmtree(os.path.dirname(module_path))
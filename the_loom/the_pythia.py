@@ -0,0 +1,171 @@
+"""
+The Pythia: The oracle who foretells how a card will go.
+This module answers "what are the odds of each outcome if this actor plays this card on that target?"
+without rolling a single die. Chance enters a play (see The Agon) only through the die of the challenge
+roll; the actor and the target only through the costs, and through one number, the margin: challenge
+attribute + modifiers - difficulty. The outcome of every face of the die is therefore known for every
+margin, and so are the odds:
+
+- per die (the game rules' dice roll range), a table of the odds of each outcome by margin is built
+  once, by resolving every face of the die against every margin at once. The margin is quantized to
+  the die's whole steps, which loses nothing: two margins reaching the same faces have the same odds.
+- per card, the modifiers and the difficulty are compiled into one margin formula, compiled again
+  when the card or the formulas it names are reloaded.
+
+A lookup evaluates the margin (in bulk, for many plays) and reads its row of the table.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from the_loom.the_agon import DEFAULT_CHALLENGE_DIFFICULTY, DEFAULT_DICE_ROLL_RANGE, OUTCOMES, CompiledCard, TheAgon
+from the_loom.the_eidolon import Eidolon
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional; odds are then looked up with Python lists.
+    np = None
+
+_UNAFFORDABLE = OUTCOMES.index("unaffordable")
+_CRITICAL_FAILURE = OUTCOMES.index("critical_failure")
+_FAILURE = OUTCOMES.index("failure")
+_SUCCESS = OUTCOMES.index("success")
+_CRITICAL_SUCCESS = OUTCOMES.index("critical_success")
+
+class OddsTable:
+    """
+    The odds of each outcome (in the order of OUTCOMES) for a die from low to high. Row i holds the odds
+    for the margins needing a roll of at least low + 1 + i to succeed; the last row, for those that
+    no roll but the critical one reaches.
+    """
+
+    def __init__(self, low: int, high: int):
+        if high <= low:
+            raise ValueError(f"Dice roll range [{low}, {high}] needs at least two faces")
+        self.low = low
+        self.high = high
+        faces = list(range(low, high + 1))
+        needed = list(range(low + 1, high + 1))
+        # Every face against every roll needed, resolved as The Agon does
+        self.rows: List[List[float]] = []
+        for roll_needed in needed:
+            row = [0.0] * len(OUTCOMES)
+            for face in faces:
+                code = (
+                    _CRITICAL_SUCCESS if face == high else _CRITICAL_FAILURE if face == low
+                    else _SUCCESS if face >= roll_needed else _FAILURE
+                )
+                row[code] += 1 / len(faces)
+            self.rows.append(row)
+        self.unaffordable = [1.0 if code == _UNAFFORDABLE else 0.0 for code in range(len(OUTCOMES))]
+        self.array = np.asarray(self.rows + [self.unaffordable]) if np is not None else None
+
+    def row(self, margin: float) -> int:
+        """The row of the table for a margin: a total reaches the difficulty when roll + margin >= 0."""
+        return min(max(math.ceil(-margin) - self.low - 1, 0), len(self.rows) - 1)
+
+
+class ThePythia:
+    def __init__(self, agon: TheAgon):
+        self.agon = agon
+        self.moirai = agon.moirai
+        # (low, high) -> the odds table of that die
+        self.tables: Dict[Tuple[int, int], OddsTable] = {}
+        # card id -> (the compiled card, its margin formula without the challenge attribute)
+        self.margins: Dict[str, Tuple[CompiledCard, str]] = {}
+
+    def table(self) -> OddsTable:
+        low, high = self.moirai.constants.get("game_rules", {}).get("default_dice_roll_range", DEFAULT_DICE_ROLL_RANGE)
+        table = self.tables.get((low, high))
+        if table is None:
+            table = self.tables[(low, high)] = OddsTable(low, high)
+        return table
+
+    def margin_formula(self, card_id: str) -> str:
+        """The card's modifiers minus its difficulty, as one formula."""
+        card = self.agon.card(card_id)
+        cached = self.margins.get(card_id)
+        if cached is not None and cached[0] is card and cached[1] in self.moirai.compiled:
+            return cached[1]
+        difficulty = card.difficulty
+        if difficulty is None:
+            difficulty = self.moirai.constants.get("game_rules", {}).get("default_challenge_difficulty", DEFAULT_CHALLENGE_DIFFICULTY)
+        terms = [f"({modifier})" for modifier in card.modifiers]
+        expression = f"{' + '.join(terms) or '0'} - ({difficulty})"
+        formula = self.moirai.ensure_formula(expression)
+        self.margins[card_id] = (card, formula)
+        return formula
+
+    def odds_batch(self, card_id: str, actors: Sequence[Eidolon], targets: Optional[Sequence[Eidolon]] = None) -> Any:
+        """
+        The odds of each outcome (columns in the order of OUTCOMES) of every play of the card by actors[i]
+        on targets[i], as an array (a list of rows without NumPy).
+        """
+        card = self.agon.card(card_id)
+        if card.needs_target and targets is None:
+            raise ValueError(f"Card '{card_id}' needs a target.")
+        actors = list(actors)
+        table = self.table()
+        margins = self.moirai.evaluate_formula_batch(self.margin_formula(card_id), actors, targets, pairwise=targets is not None)
+        if np is not None:
+            margins = np.asarray(margins, dtype=float)
+            if card.challenge is not None:
+                margins = margins + np.fromiter((actor._numbers[card.challenge[2]] for actor in actors), dtype=float, count=len(actors))
+            rows = np.clip(np.ceil(-margins).astype(int) - table.low - 1, 0, len(table.rows) - 1)
+        else:
+            if card.challenge is not None:
+                margins = [margin + actor._numbers[card.challenge[2]] for margin, actor in zip(margins, actors)]
+            rows = [table.row(margin) for margin in margins]
+        for _, _, offset, formula, constant in card.costs:
+            costs = (
+                self.moirai.evaluate_formula_batch(formula, actors, targets, pairwise=targets is not None)
+                if formula is not None else [constant] * len(actors)
+            )
+            if np is not None:
+                short = np.fromiter((actor._numbers[offset] for actor in actors), dtype=float, count=len(actors)) < np.asarray(costs, dtype=float)
+                rows[short] = len(table.rows) # The unaffordable row
+            else:
+                rows = [len(table.rows) if actor._numbers[offset] < cost else row for row, actor, cost in zip(rows, actors, costs)]
+        if np is not None:
+            return table.array[rows]
+        return [table.rows[row] if row < len(table.rows) else table.unaffordable for row in rows]
+
+    def odds(self, card_id: str, actor: Eidolon, target: Optional[Eidolon] = None) -> Dict[str, float]:
+        """The odds of each outcome of one play, by outcome name."""
+        row = self.odds_batch(card_id, [actor], [target] if target is not None else None)[0]
+        return {outcome: float(p) for outcome, p in zip(OUTCOMES, row)}
+
+# Example Usage (for testing purposes)
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import time
+    from collections import Counter
+    from the_loom.the_chorus import load_game_module
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        alembic, moirai = load_game_module("kismet_social", use_cache=False)
+        gregor = alembic.create_eidolon("gregor_the_guard")
+        gossip = alembic.create_eidolon("town_gossip")
+    agon = TheAgon(alembic, moirai)
+    pythia = ThePythia(agon)
+    for card_id in ("tell_a_joke", "intimidate", "arcane_blast"):
+        odds = pythia.odds(card_id, gregor, gossip)
+        print(f"{card_id} by {gregor.name} on {gossip.name}: " + ", ".join(f"{o} {p:.0%}" for o, p in odds.items() if p))
+
+    # The odds against what actually happens over many plays (with a battery that never runs out)
+    gregor.dynamic_states["social_battery"] = 1e9
+    expected = pythia.odds("tell_a_joke", gregor, gossip)
+    plays = 5000
+    for _ in range(plays):
+        agon.queue("tell_a_joke", gregor, gossip)
+    with contextlib.redirect_stdout(io.StringIO()):
+        seen = Counter(play.outcome for play in agon.resolve_queued())
+    print(f"Over {plays} plays of Tell a Joke: " + ", ".join(f"{o} {seen[o] / plays:.1%} (foretold {p:.1%})" for o, p in expected.items() if p))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        crowd = alembic.spawn_batch("town_gossip", 20000)
+    start = time.perf_counter()
+    table = pythia.odds_batch("intimidate", crowd, crowd[1:] + crowd[:1])
+    elapsed = time.perf_counter() - start
+    success = table[:, _SUCCESS] + table[:, _CRITICAL_SUCCESS] if np is not None else [row[_SUCCESS] + row[_CRITICAL_SUCCESS] for row in table]
+    print(f"Odds of {len(crowd)} Intimidate plays in {elapsed * 1000:.1f}ms; mean chance of success {sum(success) / len(crowd):.1%}")
@@ -0,0 +1,417 @@
+"""
+The Skein: Holds the threads of affinity that bind Eidolons to one another.
+This module stores directed, typed relationships (affinities and grievances) as a sparse graph keyed
+by integer Eidolon ids. Each relationship type is one edge table: a hash index from packed
+(source, target) ids to values answers single lookups in one dictionary access (e.g. from a compiled
+formula), while sorted CSR-style arrays answer neighbor queries such as "who likes X" without
+scanning every edge. Writes keep the arrays current through a small delta, merged by a lazy rebuild
+once it grows. Per-Eidolon totals of each type (e.g. the sum of an
+Eidolon's grievances) are kept up to date on every write.
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from itertools import count, islice
+from typing import Any, Callable, DefaultDict, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional; bulk updates fall back to pure Python without it.
+    np = None
+
+# Edges are keyed by (source_id << EDGE_KEY_SHIFT) | target_id, packing both ids into one int.
+# Ids must therefore stay below 2 ** 31.
+EDGE_KEY_SHIFT = 32
+_TARGET_MASK = (1 << EDGE_KEY_SHIFT) - 1
+
+# The relationship type grievances (ledger["grievances"]) are stored under.
+GRIEVANCE = "grievance"
+
+# Ids are unique across every Skein so Eidolons can move between them.
+_next_id = count()
+
+# Called as observer(skein, source_id, target_id, relationship type, value) after every relationship
+# write to the Skein it is registered with (see TheSkein.add_relation_observer); value is None when
+# the relationship was removed.
+RelationObserver = Callable[["TheSkein", int, int, str, Any], None]
+
+
+def edge_key(source_id: int, target_id: int) -> int:
+    return (source_id << EDGE_KEY_SHIFT) | target_id
+
+
+def split_edge_key(key: int) -> Tuple[int, int]:
+    return key >> EDGE_KEY_SHIFT, key & _TARGET_MASK
+
+
+class _AdjacencyIndex:
+    """
+    Neighbor index over one relationship type: edge keys sorted by (source, target) and by
+    (target, source), so the edges of one Eidolon are a contiguous range. Values are read from the
+    live edge table, so rewriting a relationship leaves the index as it is. Edges created since the
+    index was built are kept per Eidolon and merged into each query; removed ones are skipped.
+    """
+
+    __slots__ = ("table", "out_keys", "in_keys", "out_added", "in_added", "changes")
+
+    def __init__(self, table: Dict[int, Any]):
+        self.table = table
+        self.out_keys = array("q", sorted(table))
+        self.in_keys = array("q", sorted((key & _TARGET_MASK) << EDGE_KEY_SHIFT | key >> EDGE_KEY_SHIFT for key in table))
+        # source id -> targets of the edges created since the build, and target id -> their sources
+        self.out_added: Dict[int, Set[int]] = {}
+        self.in_added: Dict[int, Set[int]] = {}
+        # Edges created or removed since the build
+        self.changes = 0
+
+    @property
+    def stale(self) -> bool:
+        """Whether enough edges changed that rebuilding beats merging them into every query."""
+        return self.changes > 64 + len(self.out_keys) // 8
+
+    def created(self, key: int):
+        self.changes += 1
+        keys = self.out_keys
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key: # Removed since the build and created again
+            return
+        source_id, target_id = key >> EDGE_KEY_SHIFT, key & _TARGET_MASK
+        self.out_added.setdefault(source_id, set()).add(target_id)
+        self.in_added.setdefault(target_id, set()).add(source_id)
+
+    def removed(self):
+        self.changes += 1
+
+    @staticmethod
+    def _keys(keys: array, added: Dict[int, Set[int]], eidolon_id: int) -> Iterable[int]:
+        low = bisect_left(keys, eidolon_id << EDGE_KEY_SHIFT)
+        high = bisect_left(keys, (eidolon_id + 1) << EDGE_KEY_SHIFT)
+        others = added.get(eidolon_id)
+        if not others:
+            return keys[low:high]
+        return heapq.merge(keys[low:high], sorted(eidolon_id << EDGE_KEY_SHIFT | other for other in others))
+
+    def outgoing(self, source_id: int) -> Iterator[Tuple[int, Any]]:
+        table = self.table
+        for key in self._keys(self.out_keys, self.out_added, source_id):
+            value = table.get(key)
+            if value is not None:
+                yield key & _TARGET_MASK, value
+
+    def incoming(self, target_id: int) -> Iterator[Tuple[int, Any]]:
+        table = self.table
+        for key in self._keys(self.in_keys, self.in_added, target_id):
+            source_id = key & _TARGET_MASK
+            value = table.get(source_id << EDGE_KEY_SHIFT | target_id)
+            if value is not None:
+                yield source_id, value
+
+
+class TheSkein:
+    def __init__(self):
+        # relationship type -> {edge key: value}. Read freely (compiled formulas do); write through set().
+        self.edges: DefaultDict[str, Dict[int, Any]] = defaultdict(dict)
+        # relationship type -> {source id: sum of the values it holds}, maintained on every write
+        self.totals: DefaultDict[str, Dict[int, Any]] = defaultdict(dict)
+        # relationship type -> neighbor index, built on the first neighbor query and kept current by writes
+        self._indexes: Dict[str, _AdjacencyIndex] = {}
+        self.ids_by_name: Dict[str, int] = {}
+        self.names_by_id: Dict[int, str] = {}
+        # Ids handed out for names that no Eidolon has claimed yet.
+        self._unclaimed: Dict[str, int] = {}
+        # Names claimed by more than one Eidolon -> their ids. Such names resolve to no one (see find).
+        self.shared_names: Dict[str, Set[int]] = {}
+        # Released ids still named because others hold relationships towards them
+        self._departed: Set[int] = set()
+        self.relation_observers: List[RelationObserver] = []
+
+    def add_relation_observer(self, observer: RelationObserver):
+        if observer not in self.relation_observers:
+            self.relation_observers.append(observer)
+
+    def remove_relation_observer(self, observer: RelationObserver):
+        if observer in self.relation_observers:
+            self.relation_observers.remove(observer)
+
+    def notify_relation(self, source_id: int, target_id: int, affinity_type: str, value: Any):
+        for observer in self.relation_observers:
+            observer(self, source_id, target_id, affinity_type, value)
+
+    def _claim(self, name: str, eidolon_id: int):
+        holder = self.ids_by_name.get(name)
+        if holder is not None and holder != eidolon_id and self._unclaimed.get(name) != holder:
+            self.shared_names.setdefault(name, {holder}).add(eidolon_id)
+        self._unclaimed.pop(name, None)
+        self._departed.discard(eidolon_id)
+        self.ids_by_name[name] = eidolon_id
+        self.names_by_id[eidolon_id] = name
+
+    def register(self, name: str) -> int:
+        """Allocates the id of a new Eidolon, claiming the id already used for its name in affinities if there is one."""
+        eidolon_id = self._unclaimed.get(name)
+        if eidolon_id is None:
+            eidolon_id = next(_next_id)
+        self._claim(name, eidolon_id)
+        return eidolon_id
+
+    def register_many(self, names: Sequence[str]) -> List[int]:
+        """Allocates the ids of many new Eidolons at once (see register)."""
+        if not self.ids_by_name.keys().isdisjoint(names) or len(set(names)) != len(names):
+            return [self.register(name) for name in names]
+        ids = list(islice(_next_id, len(names)))
+        self.ids_by_name.update(zip(names, ids))
+        self.names_by_id.update(zip(ids, names))
+        return ids
+
+    def release(self, eidolon_id: int):
+        """
+        Forgets an Eidolon that left this Skein: the relationships it holds are removed and its name no
+        longer resolves to it. The id keeps its name while others still hold relationships towards it,
+        so they can be listed, and loses it with the last of them.
+        """
+        for target_id, kind, _ in list(self.outgoing(eidolon_id)):
+            self.remove(eidolon_id, target_id, kind)
+        name = self.names_by_id.get(eidolon_id)
+        if name is None:
+            return
+        holders = self.shared_names.get(name)
+        if holders is not None:
+            holders.discard(eidolon_id)
+            self.ids_by_name[name] = next(iter(holders))
+            if len(holders) == 1:
+                del self.shared_names[name]
+        elif self.ids_by_name.get(name) == eidolon_id:
+            del self.ids_by_name[name]
+        if next(self.incoming(eidolon_id), None) is None:
+            del self.names_by_id[eidolon_id]
+        else:
+            self._departed.add(eidolon_id)
+
+    def resolve(self, eidolon: Union[str, int]) -> int:
+        """
+        Returns the id for an Eidolon name (or passes an id through). Unknown names get a placeholder
+        id; names several Eidolons share raise ValueError.
+        """
+        if isinstance(eidolon, int):
+            return eidolon
+        if self.shared_names and eidolon in self.shared_names:
+            raise ValueError(f"Several Eidolons are named '{eidolon}' in this Skein; refer to them by id.")
+        eidolon_id = self.ids_by_name.get(eidolon)
+        if eidolon_id is None:
+            eidolon_id = next(_next_id)
+            self._unclaimed[eidolon] = eidolon_id
+            self.ids_by_name[eidolon] = eidolon_id
+            self.names_by_id[eidolon_id] = eidolon
+        return eidolon_id
+
+    def find(self, eidolon: Union[str, int]) -> Optional[int]:
+        """Like resolve, but returns None for unknown names instead of allocating an id."""
+        if isinstance(eidolon, int):
+            return eidolon
+        if self.shared_names and eidolon in self.shared_names:
+            raise ValueError(f"Several Eidolons are named '{eidolon}' in this Skein; refer to them by id.")
+        return self.ids_by_name.get(eidolon)
+
+    def name_of(self, eidolon_id: int) -> Optional[str]:
+        return self.names_by_id.get(eidolon_id)
+
+    # --- Single edges ---
+
+    def set(self, source_id: int, target_id: int, affinity_type: str, value: Any):
+        key = edge_key(source_id, target_id)
+        table = self.edges[affinity_type]
+        totals = self.totals[affinity_type]
+        previous = table.get(key)
+        totals[source_id] = totals.get(source_id, 0) + value - (previous or 0)
+        table[key] = value
+        if previous is None and affinity_type in self._indexes:
+            self._created(affinity_type, key)
+        if self.relation_observers:
+            self.notify_relation(source_id, target_id, affinity_type, value)
+
+    def add(self, source_id: int, target_id: int, affinity_type: str, delta: Any) -> Any:
+        """Adds delta to a relationship (starting from 0) and returns the new value."""
+        key = edge_key(source_id, target_id)
+        table = self.edges[affinity_type]
+        previous = table.get(key)
+        value = (previous or 0) + delta
+        table[key] = value
+        totals = self.totals[affinity_type]
+        totals[source_id] = totals.get(source_id, 0) + delta
+        if previous is None and affinity_type in self._indexes:
+            self._created(affinity_type, key)
+        if self.relation_observers:
+            self.notify_relation(source_id, target_id, affinity_type, value)
+        return value
+
+    def get(self, source_id: int, target_id: int, affinity_type: str, default: Any = 0) -> Any:
+        table = self.edges.get(affinity_type)
+        if table is None:
+            return default
+        return table.get(edge_key(source_id, target_id), default)
+
+    def remove(self, source_id: int, target_id: int, affinity_type: str):
+        table = self.edges.get(affinity_type)
+        if table is None:
+            return
+        value = table.pop(edge_key(source_id, target_id), None)
+        if value is not None:
+            totals = self.totals[affinity_type]
+            totals[source_id] -= value
+            if not totals[source_id]:
+                del totals[source_id]
+            index = self._indexes.get(affinity_type)
+            if index is not None:
+                index.removed()
+            if self.relation_observers:
+                self.notify_relation(source_id, target_id, affinity_type, None)
+            if target_id in self._departed and next(self.incoming(target_id), None) is None:
+                self._departed.discard(target_id)
+                del self.names_by_id[target_id]
+
+    def _created(self, affinity_type: str, key: int):
+        """Adds a new edge to the neighbor index of its type, or drops the index once rebuilding it is cheaper."""
+        index = self._indexes[affinity_type]
+        if index.stale:
+            del self._indexes[affinity_type]
+        else:
+            index.created(key)
+
+    def total(self, source_id: int, affinity_type: str) -> Any:
+        """The sum of every relationship of one type source_id holds, without visiting them."""
+        totals = self.totals.get(affinity_type)
+        return 0 if totals is None else totals.get(source_id, 0)
+
+    # --- Bulk edges ---
+
+    def _keys(self, source_ids: Iterable[int], target_ids: Iterable[int]) -> List[int]:
+        if np is not None:
+            sources = np.asarray(source_ids, dtype=np.int64)
+            targets = np.asarray(target_ids, dtype=np.int64)
+            return ((sources << EDGE_KEY_SHIFT) | targets).tolist()
+        return [edge_key(source, target) for source, target in zip(source_ids, target_ids)]
+
+    def set_many(self, affinity_type: str, source_ids: Iterable[int], target_ids: Iterable[int], values: Iterable[Any]):
+        """Sets many relationships of one type at once (parallel sequences of sources, targets and values)."""
+        table = self.edges[affinity_type]
+        totals = self.totals[affinity_type]
+        for key, value in zip(self._keys(source_ids, target_ids), values):
+            source_id = key >> EDGE_KEY_SHIFT
+            previous = table.get(key)
+            totals[source_id] = totals.get(source_id, 0) + value - (previous or 0)
+            table[key] = value
+            if previous is None and affinity_type in self._indexes:
+                self._created(affinity_type, key)
+            if self.relation_observers:
+                self.notify_relation(source_id, key & _TARGET_MASK, affinity_type, value)
+
+    def add_many(self, affinity_type: str, source_ids: Iterable[int], target_ids: Iterable[int], deltas: Iterable[Any]):
+        """Adds deltas to many relationships of one type at once."""
+        table = self.edges[affinity_type]
+        totals = self.totals[affinity_type]
+        for key, delta in zip(self._keys(source_ids, target_ids), deltas):
+            previous = table.get(key)
+            table[key] = value = (previous or 0) + delta
+            source_id = key >> EDGE_KEY_SHIFT
+            totals[source_id] = totals.get(source_id, 0) + delta
+            if previous is None and affinity_type in self._indexes:
+                self._created(affinity_type, key)
+            if self.relation_observers:
+                self.notify_relation(source_id, key & _TARGET_MASK, affinity_type, value)
+
+    # --- Neighbor queries ---
+
+    def _index(self, affinity_type: str) -> Optional[_AdjacencyIndex]:
+        index = self._indexes.get(affinity_type)
+        if index is None or index.stale:
+            table = self.edges.get(affinity_type)
+            if not table:
+                self._indexes.pop(affinity_type, None)
+                return None
+            index = self._indexes[affinity_type] = _AdjacencyIndex(table)
+        return index
+
+    def _types(self, affinity_type: Optional[str]) -> List[str]:
+        return list(self.edges) if affinity_type is None else [affinity_type]
+
+    def outgoing(self, source_id: int, affinity_type: Optional[str] = None) -> Iterator[Tuple[int, str, Any]]:
+        """Yields (target_id, affinity_type, value) for the relationships source_id holds towards others."""
+        for kind in self._types(affinity_type):
+            index = self._index(kind)
+            if index is not None:
+                for target_id, value in index.outgoing(source_id):
+                    yield target_id, kind, value
+
+    def incoming(self, target_id: int, affinity_type: Optional[str] = None) -> Iterator[Tuple[int, str, Any]]:
+        """Yields (source_id, affinity_type, value) for the relationships others hold towards target_id."""
+        for kind in self._types(affinity_type):
+            index = self._index(kind)
+            if index is not None:
+                for source_id, value in index.incoming(target_id):
+                    yield source_id, kind, value
+
+    def strongest(self, eidolon_id: int, affinity_type: str, k: int, incoming: bool = False) -> List[Tuple[int, Any]]:
+        """The k strongest (other_id, value) relationships of one type held by (or, with incoming=True, towards) an Eidolon."""
+        index = self._index(affinity_type)
+        if index is None:
+            return []
+        neighbors = index.incoming(eidolon_id) if incoming else index.outgoing(eidolon_id)
+        return heapq.nlargest(k, neighbors, key=lambda neighbor: neighbor[1])
+
+    # --- Membership ---
+
+    def adopt(self, eidolon: Any):
+        """Moves an Eidolon (with the relationships it holds) from its current Skein into this one."""
+        previous = eidolon.skein
+        if self.names_by_id.get(eidolon.eid) != eidolon.name or self.ids_by_name.get(eidolon.name) != eidolon.eid:
+            self._claim(eidolon.name, eidolon.eid) # Also rejoining after a release
+        if previous is self:
+            return
+        for target_id, kind, value in list(previous.outgoing(eidolon.eid)):
+            name = previous.name_of(target_id)
+            if name is not None and target_id not in self.names_by_id:
+                self.names_by_id[target_id] = name
+                self.ids_by_name.setdefault(name, target_id)
+            self.set(eidolon.eid, target_id, kind, value)
+            previous.remove(eidolon.eid, target_id, kind)
+        previous.release(eidolon.eid)
+        eidolon.skein = self
+
+
+# The Skein used by Eidolons that haven't joined a Nexus (or been given one of their own). Eidolons
+# release their names in it as they move to another Skein.
+DEFAULT_SKEIN = TheSkein()
+
+# Example Usage (for testing purposes)
+if __name__ == "__main__":
+    skein = TheSkein()
+    alice_id = skein.register("Alice")
+    bob_id = skein.register("Bob")
+
+    skein.set(alice_id, bob_id, "platonic", 50)
+    skein.set(bob_id, alice_id, "rivalrous", 20)
+    skein.set(alice_id, skein.resolve("Carol"), "admired", 10) # Carol doesn't exist yet
+
+    print(f"Alice -> Bob platonic: {skein.get(alice_id, bob_id, 'platonic')}")
+    print(f"Bob -> Alice platonic: {skein.get(bob_id, alice_id, 'platonic')}")
+    carol_id = skein.register("Carol")
+    print(f"Alice -> Carol admired: {skein.get(alice_id, carol_id, 'admired')}")
+    print(f"Alice's relationships: {[(skein.name_of(t), kind, v) for t, kind, v in skein.outgoing(alice_id)]}")
+
+    # Bulk update: everyone in a crowd warms to Carol
+    crowd = [skein.register(f"Villager {i}") for i in range(5)]
+    skein.set_many("platonic", crowd, [carol_id] * len(crowd), [10 * i for i in range(len(crowd))])
+    skein.add_many("platonic", crowd[:2], [carol_id] * 2, [100, 100])
+    print(f"Who likes Carol: {sorted(skein.name_of(s) for s, _, _ in skein.incoming(carol_id, 'platonic'))}")
+    print(f"Villager 1's total platonic affinity: {skein.total(crowd[1], 'platonic')}")
+    print(f"Carol's top 2 admirers: {[(skein.name_of(s), v) for s, v in skein.strongest(carol_id, 'platonic', 2, incoming=True)]}")
+
+    # Villager 0 leaves: the relationships it held go with it, and its name with the last one held towards it
+    skein.set(carol_id, crowd[0], "platonic", 5)
+    skein.release(crowd[0])
+    print(f"Who likes Carol now: {sorted(skein.name_of(s) for s, _, _ in skein.incoming(carol_id, 'platonic'))}")
+    print(f"Villager 0 still named: {skein.name_of(crowd[0])}")
+    skein.remove(carol_id, crowd[0], "platonic")
+    print(f"Villager 0 named after Carol forgets them: {skein.name_of(crowd[0])}")
@@ -0,0 +1,170 @@
+"""
+The Tyche: Dispenses fortune to the AnimaLoom engine, reproducibly.
+From one master seed, this module derives any number of independent random streams, named e.g.
+after an Eidolon, a template attribute or a system. Streams are counter-based: draw n of a stream
+is a pure function of (master seed, stream name, n), so it doesn't depend on which other streams
+were drawn from first, or in which batch, shard or process. Blocks of draws are generated
+column-wise with NumPy when it is available, bit-identical to drawing them one at a time.
+"""
+
+import hashlib
+import math
+from typing import Any, Dict, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional; blocks of draws fall back to pure Python without it.
+    np = None
+
+_MASK = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+_MIX_1 = 0xBF58476D1CE4E5B9
+_MIX_2 = 0x94D049BB133111EB
+_TO_UNIT = 2.0 ** -53
+
+def _mix(key: int, counter: int) -> int:
+    """The SplitMix64 output function applied to draw `counter` of stream `key`."""
+    z = (key + (counter + 1) * _GOLDEN) & _MASK
+    z = ((z ^ (z >> 30)) * _MIX_1) & _MASK
+    z = ((z ^ (z >> 27)) * _MIX_2) & _MASK
+    return z ^ (z >> 31)
+
+def _mix_block(key: int, start: int, n: int) -> Any:
+    """Draws start .. start + n - 1 of stream `key` as a NumPy uint64 array (arithmetic wraps mod 2 ** 64)."""
+    z = (np.arange(start + 1, start + n + 1, dtype=np.uint64) * np.uint64(_GOLDEN)) + np.uint64(key)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(_MIX_1)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(_MIX_2)
+    return z ^ (z >> np.uint64(31))
+
+
+class TycheStream:
+    """One named stream of draws. Its counter is the index of the next draw; seek() moves it."""
+
+    __slots__ = ("key", "counter")
+
+    def __init__(self, key: int, counter: int = 0):
+        self.key = key
+        self.counter = counter
+
+    def seek(self, counter: int) -> "TycheStream":
+        self.counter = counter
+        return self
+
+    def next_u64(self) -> int:
+        value = _mix(self.key, self.counter)
+        self.counter += 1
+        return value
+
+    def random(self) -> float:
+        """A float in [0, 1)."""
+        return (self.next_u64() >> 11) * _TO_UNIT
+
+    def randint(self, low: int, high: int) -> int:
+        """An integer in [low, high], both included."""
+        if high < low:
+            raise ValueError(f"Empty range for randint: [{low}, {high}]")
+        return low + ((self.next_u64() * (high - low + 1)) >> 64)
+
+    def uniform(self, low: float, high: float) -> float:
+        return low + (high - low) * self.random()
+
+    def gauss(self, mu: float = 0.0, sigma: float = 1.0) -> float:
+        """A normally distributed float (Box-Muller; uses two draws)."""
+        if np is not None:
+            # Share the block path's floating-point functions so single draws match blocks exactly.
+            return float(self.gausses(mu, sigma, 1)[0])
+        u1 = 1.0 - self.random() # (0, 1], so the log is finite
+        u2 = self.random()
+        return mu + sigma * math.sqrt(-2.0 * math.log(u1)) * math.cos(2.0 * math.pi * u2)
+
+    def choice(self, options: Sequence[Any]) -> Any:
+        if not options:
+            raise ValueError("Cannot choose from an empty sequence.")
+        return options[self.randint(0, len(options) - 1)]
+
+    # --- Blocks of draws: the next n draws at once, identical to n single draws ---
+
+    def u64s(self, n: int) -> Any:
+        start = self.counter
+        self.counter += n
+        if np is not None:
+            return _mix_block(self.key, start, n)
+        return [_mix(self.key, counter) for counter in range(start, start + n)]
+
+    def randoms(self, n: int) -> Any:
+        values = self.u64s(n)
+        if np is not None:
+            return (values >> np.uint64(11)).astype(np.float64) * _TO_UNIT
+        return [(value >> 11) * _TO_UNIT for value in values]
+
+    def randints(self, low: int, high: int, n: int) -> Any:
+        if high < low:
+            raise ValueError(f"Empty range for randints: [{low}, {high}]")
+        span = high - low + 1
+        values = self.u64s(n)
+        if np is not None:
+            # (value * span) >> 64, computed from 32-bit halves to stay within uint64
+            hi, lo = values >> np.uint64(32), values & np.uint64(0xFFFFFFFF)
+            span64 = np.uint64(span)
+            if span < (1 << 32):
+                product = (hi * span64) + ((lo * span64) >> np.uint64(32))
+                return (product >> np.uint64(32)).astype(np.int64) + low
+            values = values.tolist()
+        return [low + ((value * span) >> 64) for value in values]
+
+    def uniforms(self, low: float, high: float, n: int) -> Any:
+        values = self.randoms(n)
+        if np is not None:
+            return low + (high - low) * values
+        return [low + (high - low) * value for value in values]
+
+    def gausses(self, mu: float, sigma: float, n: int) -> Any:
+        """n normally distributed floats; draws are paired as in gauss()."""
+        values = self.randoms(2 * n)
+        if np is not None:
+            u1, u2 = 1.0 - values[0::2], values[1::2]
+            return mu + sigma * np.sqrt(-2.0 * np.log(u1)) * np.cos(2.0 * np.pi * u2)
+        return [
+            mu + sigma * math.sqrt(-2.0 * math.log(1.0 - values[i])) * math.cos(2.0 * math.pi * values[i + 1])
+            for i in range(0, 2 * n, 2)
+        ]
+
+
+class TheTyche:
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        # stream name -> its stream, so sequential draws continue where they left off
+        self.streams: Dict[Tuple[Any, ...], TycheStream] = {}
+
+    def key(self, *names: Any) -> int:
+        """The 64-bit key of the stream with the given name under this master seed (stable across processes)."""
+        text = "\x1f".join(str(part) for part in (self.seed,) + names)
+        return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+    def stream(self, *names: Any) -> TycheStream:
+        """The stream named e.g. ("eidolon", "Gregor the Guard") or ("system", "weather")."""
+        stream = self.streams.get(names)
+        if stream is None:
+            stream = self.streams[names] = TycheStream(self.key(*names))
+        return stream
+
+    def reseed(self, seed: int):
+        self.seed = seed
+        self.streams.clear()
+
+# Example Usage (for testing purposes)
+if __name__ == "__main__":
+    tyche = TheTyche(seed=42)
+    weather = tyche.stream("system", "weather")
+    print(f"Weather rolls: {[weather.randint(1, 10) for _ in range(5)]}")
+
+    # Another Tyche with the same seed gives the same rolls, whatever is drawn first
+    again = TheTyche(seed=42)
+    again.stream("eidolon", "Gregor the Guard").random()
+    print(f"Reproduced: {[again.stream('system', 'weather').randint(1, 10) for _ in range(5)]}")
+
+    # A block of draws matches the same draws made one at a time
+    block = list(tyche.stream("alembic", "town_gossip", "charisma").randints(1, 20, 6))
+    single = TycheStream(tyche.key("alembic", "town_gossip", "charisma"))
+    print(f"Block: {[int(value) for value in block]}; one at a time: {[single.randint(1, 20) for _ in range(6)]}")
+    print(f"Gauss: {tyche.stream('system', 'mood').gauss(50, 10):.3f}")
@@ -0,0 +1,262 @@
+"""
+The Warp: A columnar (struct-of-arrays) store for the Eidolons of The Nexus.
+Each attribute lives in one contiguous column indexed by a dense row, so population-wide updates
+(stamina regeneration, derived-stat recomputation, filtering) run as whole-column operations.
+Eidolons adopted by The Warp become lightweight row proxies over those columns.
+"""
+
+from array import array
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence
+from the_loom.the_eidolon import DEFAULT_SCHEMA, Eidolon, EidolonSchema
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional; column operations fall back to pure Python without it.
+    np = None
+
+if TYPE_CHECKING:
+    from the_loom.the_moirai import TheMoirai
+
+class _RowView:
+    """Stands in for an Eidolon's private value storage, reading and writing one row of The Warp's columns."""
+
+    __slots__ = ("columns", "row")
+
+    def __init__(self, columns: List[Any], row: int):
+        self.columns = columns
+        self.row = row
+
+    def __getitem__(self, offset: int) -> Any:
+        return self.columns[offset][self.row]
+
+    def __setitem__(self, offset: int, value: Any):
+        self.columns[offset][self.row] = value
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+
+class TheWarp:
+    def __init__(self, schema: Optional[EidolonSchema] = None):
+        # Without a schema, The Warp takes the schema of the first Eidolon it adopts.
+        self.schema = schema if schema is not None else DEFAULT_SCHEMA
+        self.schema_fixed = schema is not None
+        # One column per schema offset: doubles for numeric attributes, lists for everything else.
+        self.numbers: List[array] = [array("d") for _ in self.schema.numeric_defaults]
+        self.objects: List[List[Any]] = [[] for _ in self.schema.object_defaults]
+        # row -> Eidolon, or None for a removed row awaiting compaction
+        self.rows: List[Optional[Eidolon]] = []
+        # Eidolon id -> row; ids never change, rows only move on compact().
+        self.row_of: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.row_of)
+
+    def _take_schema(self, eidolon: Eidolon):
+        """Lays the columns out for the first Eidolon adopted, if The Warp was given no schema."""
+        if self.schema_fixed:
+            return
+        self.schema = eidolon.schema
+        self.schema_fixed = True
+        self.numbers = [array("d") for _ in self.schema.numeric_defaults]
+        self.objects = [[] for _ in self.schema.object_defaults]
+
+    def adopt(self, eidolon: Eidolon) -> int:
+        """Moves an Eidolon's values into new rows of the columns and makes it a proxy over them."""
+        self._take_schema(eidolon)
+        if eidolon.schema is not self.schema:
+            raise ValueError(f"Eidolon {eidolon.name} uses a different schema than The Warp.")
+        if eidolon.eid in self.row_of:
+            raise ValueError(f"Eidolon {eidolon.name} is already in The Warp.")
+        row = len(self.rows)
+        for offset, column in enumerate(self.numbers):
+            column.append(eidolon._numbers[offset])
+        for offset, column in enumerate(self.objects):
+            column.append(eidolon._objects[offset])
+        self.rows.append(eidolon)
+        self.row_of[eidolon.eid] = row
+        eidolon._numbers = _RowView(self.numbers, row)
+        eidolon._objects = _RowView(self.objects, row)
+        return row
+
+    def adopt_many(self, eidolons: Sequence[Eidolon], numbers: Optional[Dict[int, Any]] = None, objects: Optional[Dict[int, Any]] = None):
+        """
+        Adopts many Eidolons at once. numbers and objects may supply their values column by column
+        ({offset: values in the order of eidolons}, NumPy arrays welcome); any column not supplied
+        is read from the Eidolons' own storage.
+        """
+        if eidolons:
+            self._take_schema(eidolons[0])
+        for eidolon in eidolons:
+            if eidolon.schema is not self.schema:
+                raise ValueError(f"Eidolon {eidolon.name} uses a different schema than The Warp.")
+        ids = [eidolon.eid for eidolon in eidolons]
+        if len(set(ids)) != len(ids) or not self.row_of.keys().isdisjoint(ids):
+            raise ValueError("Some of the Eidolons are already in The Warp.")
+        numbers = numbers or {}
+        objects = objects or {}
+        for offset, column in enumerate(self.numbers):
+            values = numbers.get(offset)
+            if values is None:
+                column.extend(eidolon._numbers[offset] for eidolon in eidolons)
+            elif np is not None:
+                column.frombytes(np.ascontiguousarray(values, dtype=float).tobytes())
+            else:
+                column.extend(values)
+        for offset, column in enumerate(self.objects):
+            values = objects.get(offset)
+            column.extend((eidolon._objects[offset] for eidolon in eidolons) if values is None else values)
+        start = len(self.rows)
+        self.rows.extend(eidolons)
+        self.row_of.update(zip(ids, range(start, start + len(ids))))
+        numbers, objects = self.numbers, self.objects
+        for row, eidolon in enumerate(eidolons, start):
+            eidolon._numbers = _RowView(numbers, row)
+            eidolon._objects = _RowView(objects, row)
+
+    def release(self, eidolon: Eidolon):
+        """Copies an Eidolon's values back into private storage and frees its row (until compact())."""
+        row = self.row_of.pop(eidolon.eid, None)
+        if row is None:
+            return
+        eidolon._numbers = array("d", (column[row] for column in self.numbers))
+        eidolon._objects = [column[row] for column in self.objects]
+        self.rows[row] = None
+        for column in self.objects:
+            column[row] = None # Don't keep the released Eidolon's containers alive
+
+    def compact(self):
+        """Closes the gaps left by released Eidolons. Ids are unchanged; only rows move."""
+        write = 0
+        for read, eidolon in enumerate(self.rows):
+            if eidolon is None:
+                continue
+            if read != write:
+                for column in self.numbers:
+                    column[write] = column[read]
+                for column in self.objects:
+                    column[write] = column[read]
+                self.rows[write] = eidolon
+                self.row_of[eidolon.eid] = write
+                eidolon._numbers.row = write
+                eidolon._objects.row = write
+            write += 1
+        for column in self.numbers:
+            del column[write:]
+        for column in self.objects:
+            del column[write:]
+        del self.rows[write:]
+
+    def eidolons(self) -> List[Eidolon]:
+        return [eidolon for eidolon in self.rows if eidolon is not None]
+
+    def column(self, tier: str, attribute: str) -> Any:
+        """The raw column for an attribute (removed rows included until compact())."""
+        is_numeric, offset = self.schema.layout[tier][attribute]
+        return self.numbers[offset] if is_numeric else self.objects[offset]
+
+    def _notify(self, tier: str, attribute: str):
+        """Column writes bypass Eidolon._write, so tell the write observers about the whole column."""
+        if self.schema.write_observers:
+            self.schema.notify_column_write(self.rows, tier, attribute, self.column(tier, attribute))
+
+    def apply(self, tier: str, attribute: str, function: Callable[[Any], Any]):
+        """
+        Replaces a whole numeric column with function(column). With NumPy the function receives the
+        column as an array; without it, it is called once per value, so plain arithmetic works for both.
+        """
+        is_numeric, offset = self.schema.layout[tier][attribute]
+        if not is_numeric:
+            raise ValueError(f"'{attribute}' is not a numeric attribute.")
+        column = self.numbers[offset]
+        if not column:
+            return
+        if np is not None:
+            values = np.frombuffer(column, dtype=float)
+            values[:] = function(values)
+        else:
+            for row, value in enumerate(column):
+                column[row] = function(value)
+        self._notify(tier, attribute)
+
+    def regenerate(self, tier: str, attribute: str, amount: float, maximum: Optional[float] = None):
+        """Adds amount to every Eidolon's attribute, capped at maximum (e.g. per-tick stamina regen)."""
+        is_numeric, offset = self.schema.layout[tier][attribute]
+        column = self.numbers[offset]
+        if not column:
+            return
+        if np is not None:
+            values = np.frombuffer(column, dtype=float)
+            values += amount
+            if maximum is not None:
+                np.minimum(values, maximum, out=values)
+        else:
+            for row, value in enumerate(column):
+                value += amount
+                column[row] = value if maximum is None or value < maximum else maximum
+        self._notify(tier, attribute)
+
+    def where(self, tier: str, attribute: str, predicate: Callable[[Any], Any]) -> List[Eidolon]:
+        """Returns the Eidolons whose attribute satisfies predicate, e.g. lambda stamina: stamina < 20."""
+        column = self.column(tier, attribute)
+        rows = self.rows
+        if np is not None and isinstance(column, array) and column:
+            matches = np.flatnonzero(predicate(np.frombuffer(column, dtype=float)))
+            return [rows[row] for row in matches if rows[row] is not None]
+        return [rows[row] for row, value in enumerate(column) if rows[row] is not None and predicate(value)]
+
+    def recompute(self, moirai: "TheMoirai", formula_name: str, tier: str, attribute: str):
+        """Evaluates an actor-only formula for every Eidolon at once and stores the results in an attribute."""
+        compiled = moirai.compiled.get(formula_name)
+        if compiled is None:
+            raise ValueError(f"Formula '{formula_name}' not found in The Moirai's repertoire.")
+        if compiled.uses_target:
+            raise ValueError(f"Formula '{formula_name}' needs a target and can't be recomputed per Eidolon.")
+        if compiled.schema is not self.schema:
+            raise ValueError(f"Formula '{formula_name}' was compiled for a different Eidolon schema.")
+        is_numeric, offset = self.schema.layout[tier][attribute]
+        if not self.rows:
+            return
+        if np is not None and is_numeric and compiled.vector_function is not None and not compiled.relations:
+            columns = []
+            for slot in compiled.vector_slots:
+                _, read_tier, read_attribute = compiled.reads[slot]
+                read_numeric, read_offset = self.schema.layout[read_tier][read_attribute]
+                if read_numeric:
+                    columns.append(np.frombuffer(self.numbers[read_offset], dtype=float))
+                else:
+                    columns.append(np.asarray(self.objects[read_offset], dtype=object))
+            results = compiled.vector_function(*columns)
+            np.frombuffer(self.numbers[offset], dtype=float)[:] = results
+        else:
+            column = self.numbers[offset] if is_numeric else self.objects[offset]
+            for row, eidolon in enumerate(self.rows):
+                if eidolon is not None:
+                    column[row] = compiled.function(eidolon, None)
+        self._notify(tier, attribute)
+
+# Example Usage (for testing purposes)
+if __name__ == "__main__":
+    from the_loom.the_moirai import TheMoirai
+
+    warp = TheWarp()
+    crowd = [Eidolon(f"Villager {i}", stamina=10 * i, resilience=i, composure=2 * i) for i in range(6)]
+    for villager in crowd:
+        warp.adopt(villager)
+
+    warp.regenerate("dynamic_states", "stamina", 15, maximum=50)
+    print(f"Stamina after regen: {list(warp.column('dynamic_states', 'stamina'))}")
+
+    moirai = TheMoirai()
+    moirai.add_formula("sanity_derived", "(actor.core.resilience + actor.core.composure) / 2")
+    warp.recompute(moirai, "sanity_derived", "dynamic_states", "sanity")
+    print(f"Villager 4 sanity: {crowd[4].dynamic_states['sanity']}")
+
+    tired = warp.where("dynamic_states", "stamina", lambda stamina: stamina < 40)
+    print(f"Tired villagers: {[villager.name for villager in tired]}")
+
+    warp.release(crowd[1])
+    warp.release(crowd[2])
+    warp.compact()
+    print(f"Rows after compaction: {len(warp.rows)}; Villager 5 is now row {warp.row_of[crowd[5].eid]}")
+    print(f"Villager 5 stamina: {crowd[5].dynamic_states['stamina']}; released Villager 1 stamina: {crowd[1].dynamic_states['stamina']}")
@@ -11,11 +11,16 @@ from the_loom.the_alembic import TheAlembic
 from the_loom.the_moirai import TheMoirai
 from the_loom.the_nexus import TheNexus
 from the_loom.the_eidolon import Eidolon
+from the_loom.the_chorus import load_game_module_into, resolve_game_module
+from the_loom.the_proteus import TheProteus
 
 from .ui_components.the_loomwright_ui_builder import TheLoomwrightUIBuilder
 from .ui_components.the_loomwright_handlers import TheLoomwrightHandlers
 from .ui_components import dynamic_ui_builders # Import the new module
 
+# How often the loaded module's Hyle is checked for edits.
+HYLE_POLL_INTERVAL_MS = 1000
+
 class TheLoomwrightApp:
     def __init__(self, master):
         self.master = master
@@ -24,8 +29,11 @@ class TheLoomwrightApp:
 
         self.alembic = TheAlembic()
         self.moirai = TheMoirai()
-        self.nexus = TheNexus()
+        self.nexus = TheNexus.shared()
         self.game_hyle = {}
+        # Watches the loaded module's Hyle and applies edits in place (see The Proteus).
+        self.proteus: Optional[TheProteus] = None
+        self._hyle_poll = None
 
         self.ui_builder = TheLoomwrightUIBuilder(master)
         self.ui_builder.pack(fill="both", expand=True)
@@ -53,44 +61,39 @@ class TheLoomwrightApp:
         self.ui_builder.build_ui(view_filename, dynamic_data=self.game_hyle)
 
     def load_game_module(self, module_name: str) -> bool:
-        game_module_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'game_modules', module_name))
-        
-        if not os.path.exists(game_module_path):
-            print(f"Error: Game module '{module_name}' not found at {game_module_path}")
+        try:
+            game_module_path = resolve_game_module(module_name)
+        except ValueError as e:
+            print(f"Error: {e}")
             return False
 
         print(f"Loading game module: {module_name} from {game_module_path}")
-
-        # Load game_config.toml
-        config_path = os.path.join(game_module_path, "game_config.toml")
         try:
-            with open(config_path, 'rb') as f: # tomllib requires binary mode
-                self.game_hyle["game_config"] = tomllib.load(f)
-            print("game_config.toml loaded.")
-        except FileNotFoundError:
-            print(f"Warning: game_config.toml not found in {game_module_path}")
-        except tomllib.TOMLDecodeError as e:
-            print(f"Error decoding game_config.toml: {e}")
+            load_game_module_into(self.alembic, self.moirai, game_module_path)
+        except ValueError as e:
+            print(f"Error: {e}")
             return False
-
-        # Load formulas (The Moirai's Hyle)
-        formulas_path = os.path.join(game_module_path, "formulas.toml")
-        self.moirai.load_formulas_from_hyle(formulas_path)
-        print("formulas.toml loaded.")
-
-        # Load characters (The Alembic's Hyle)
-        characters_path = os.path.join(game_module_path, "characters.toml")
-        self.alembic.load_hyle_file(characters_path, "characters")
-        print("characters.toml loaded.")
-
-        # Load cards (The Alembic's Hyle)
-        cards_path = os.path.join(game_module_path, "cards.toml")
-        self.alembic.load_hyle_file(cards_path, "cards")
-        print("cards.toml loaded.")
+        if self.moirai.constants:
+            self.game_hyle["game_config"] = self.moirai.constants
+        for section_name in ("characters", "cards"):
+            if section_name in self.alembic.loaded_hyle:
+                print(f"{len(self.alembic.loaded_hyle[section_name])} {section_name} found.")
 
         print(f"Module '{module_name}' loaded successfully.")
+        self.watch_hyle(game_module_path)
         return True
 
+    def watch_hyle(self, game_module_path: str):
+        """Starts polling the loaded module's TOML files, so edits show up without restarting."""
+        self.proteus = TheProteus(game_module_path, self.alembic, self.moirai, self.nexus)
+        if self._hyle_poll is None:
+            self._hyle_poll = self.master.after(HYLE_POLL_INTERVAL_MS, self._poll_hyle)
+
+    def _poll_hyle(self):
+        if self.proteus.poll() is not None and self.moirai.constants:
+            self.game_hyle["game_config"] = self.moirai.constants
+        self._hyle_poll = self.master.after(HYLE_POLL_INTERVAL_MS, self._poll_hyle)
+
 
     # Placeholder for dynamic content builder functions (will be moved to a separate module later)
     # def _build_character_properties_section(self, parent_frame, properties_config, builder_instance):
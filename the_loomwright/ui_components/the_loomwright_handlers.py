@@ -2,7 +2,8 @@ import os
 import random
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog # Import simpledialog
-from typing import TYPE_CHECKING, Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from the_loom.the_agon import TheAgon
 
 # Type checking for circular dependency
 if TYPE_CHECKING:
@@ -27,6 +28,8 @@ class TheLoomwrightHandlers:
         self.moirai = moirai
         self.nexus = nexus
         self.game_hyle = game_hyle
+        # Resolves the cards played from the UI; created on the first simulated interaction.
+        self.agon: Optional[TheAgon] = None
 
     def _log(self, message):
         self.builder._log(f"[Handlers] {message}")
@@ -102,8 +105,45 @@ class TheLoomwrightHandlers:
 
     def handle_simulate_interaction_button_click(self, event=None, widget_name=None):
         self._log("Simulate Interaction button clicked.")
-        # This will trigger interaction simulation logic in the main Loomwright application.
-        messagebox.showinfo("Simulate Interaction", "This button will trigger interaction simulation.")
+        cards = self.alembic.loaded_hyle.get("cards", {})
+        if not cards:
+            messagebox.showwarning("Simulate Interaction", "Load a game module with cards first.")
+            return
+        card_id = simpledialog.askstring(
+            "Simulate Interaction", f"Card to play ({', '.join(cards)}):", initialvalue=next(iter(cards))
+        )
+        if not card_id:
+            return
+        # Two Eidolons take part; characters of the module step in while The Nexus has fewer.
+        for character_id in self.alembic.loaded_hyle.get("characters", {}):
+            if len(self.nexus.eidolons) >= 2:
+                break
+            eidolon = self.alembic.create_eidolon(character_id)
+            if eidolon is not None and eidolon.name not in self.nexus.eidolons:
+                self.nexus.add_eidolon(eidolon)
+        if len(self.nexus.eidolons) < 2:
+            messagebox.showwarning("Simulate Interaction", "An interaction needs two Eidolons in The Nexus.")
+            return
+        actor, target = random.sample(list(self.nexus.eidolons.values()), 2)
+        if self.agon is None:
+            self.agon = TheAgon(self.alembic, self.moirai)
+        try:
+            play = self.agon.play(card_id, actor, target)
+        except ValueError as e:
+            messagebox.showerror("Simulate Interaction", str(e))
+            return
+        self.nexus.calculate_derived_stats(self.moirai)
+        self._log(f"Resolved {play!r}")
+        card_name = cards[card_id].get("name", card_id)
+        if play.outcome == "unaffordable":
+            summary = f"{actor.name} can't afford to play {card_name}."
+        else:
+            summary = (f"{actor.name} plays {card_name} on {target.name}.\n"
+                       f"Rolled {play.roll} for a total of {play.total:.1f} against {play.difficulty:g}: "
+                       f"{play.outcome.replace('_', ' ')}.")
+            if play.value is not None:
+                summary += f"\nEffect: {play.value:g}"
+        messagebox.showinfo("Simulate Interaction", summary)
 
     def handle_character_creator_button_click(self, event=None, widget_name=None):
         self._log("Character Creator button clicked.")
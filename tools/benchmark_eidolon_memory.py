@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Compares the memory used per Eidolon by the schema-driven, array-backed layout against the
+original layout of four attribute dictionaries plus an affinity dictionary per Eidolon.
+
+Usage: python3 tools/benchmark_eidolon_memory.py [count]
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from the_loom.the_eidolon import Eidolon
+from the_loom.the_skein import TheSkein
+
+class DictEidolon:
+    """The original Eidolon layout, kept here only as the benchmark baseline."""
+    def __init__(self, name: str, **kwargs):
+        self.name = name
+        self.core_attributes = {
+            "strength": kwargs.get("strength", 0), "agility": kwargs.get("agility", 0),
+            "intellect": kwargs.get("intellect", 0), "charisma": kwargs.get("charisma", 0),
+            "resilience": kwargs.get("resilience", 0), "passion": kwargs.get("passion", 0),
+            "perception": kwargs.get("perception", 0), "composure": kwargs.get("composure", 0),
+        }
+        self.personality = {
+            "openness": kwargs.get("openness", 0), "conscientiousness": kwargs.get("conscientiousness", 0),
+            "extraversion": kwargs.get("extraversion", 0), "agreeableness": kwargs.get("agreeableness", 0),
+            "neuroticism": kwargs.get("neuroticism", 0),
+        }
+        self.dynamic_states = {
+            "health": kwargs.get("health", 100), "stamina": kwargs.get("stamina", 100),
+            "social_battery": kwargs.get("social_battery", 100),
+            "emotional_state": kwargs.get("emotional_state", "neutral"), "sanity": kwargs.get("sanity", 100),
+        }
+        self.affinities = {}
+        self.ledger = {
+            "trauma": kwargs.get("trauma", 0), "secrets": kwargs.get("secrets", []),
+            "grievances": kwargs.get("grievances", {}), "reputation": kwargs.get("reputation", 0),
+        }
+
+def measure(factory, count: int) -> float:
+    """Returns the bytes allocated per object created by factory(i)."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [factory(i) for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del objects
+    return allocated / count
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    # Both layouts get names and a few non-default values, as spawned Eidolons would.
+    attributes = {"strength": 11, "charisma": 14, "extraversion": 70, "trauma": 3}
+
+    dict_bytes = measure(lambda i: DictEidolon(f"eidolon_{i}", **attributes), count)
+    skein = TheSkein()
+    array_bytes = measure(lambda i: Eidolon(f"eidolon_{i}", skein=skein, **attributes), count)
+
+    print(f"Eidolons measured: {count}")
+    print(f"Dictionary layout: {dict_bytes:,.0f} bytes per Eidolon")
+    print(f"Array layout:      {array_bytes:,.0f} bytes per Eidolon (including its Skein registration)")
+    print(f"Saving:            {100 * (1 - array_bytes / dict_bytes):.0f}%")
@@ -28,6 +28,23 @@ def generate_test_report():
         {"name": "The Nexus (World State Manager)", "command": "python3 -m the_loom.the_nexus"},
         {"name": "The Moirai (Formula Engine)", "command": "python3 -m the_loom.the_moirai"},
         {"name": "The Alembic (Hyle Distiller)", "command": "python3 -m the_loom.the_alembic"},
+        {"name": "The Skein (Relationship Store)", "command": "python3 -m the_loom.the_skein"},
+        {"name": "The Warp (Columnar Eidolon Store)", "command": "python3 -m the_loom.the_warp"},
+        {"name": "The Horae (Tick Scheduler)", "command": "python3 -m the_loom.the_horae"},
+        {"name": "The Heddles (Sharded Eidolon Store)", "command": "python3 -m the_loom.the_heddles"},
+        {"name": "The Chorus (Ensemble Runner)", "command": "python3 -m the_loom.the_chorus"},
+        {"name": "The Tyche (Seeded Random Streams)", "command": "python3 -m the_loom.the_tyche"},
+        {"name": "The Hermes (Parallel, Lazy Module Loader)", "command": "python3 -m the_loom.the_hermes"},
+        {"name": "The Mnemosyne (Compiled Hyle Cache)", "command": "python3 -m the_loom.the_mnemosyne"},
+        {"name": "The Proteus (Hot Reload)", "command": "python3 -m the_loom.the_proteus"},
+        {"name": "The Canon (Hyle Validation)", "command": "python3 -m the_loom.the_canon"},
+        {"name": "The Agon (Card Resolution)", "command": "python3 -m the_loom.the_agon"},
+        {"name": "The Kleros (Playable-Hand Index)", "command": "python3 -m the_loom.the_kleros"},
+        {"name": "The Daimon (Utility Action Selection)", "command": "python3 -m the_loom.the_daimon"},
+        {"name": "The Pythia (Card Outcome Odds)", "command": "python3 -m the_loom.the_pythia"},
+        {"name": "The Pheme (Event Stream)", "command": "python3 -m the_loom.the_pheme"},
+        {"name": "Headless Runner (JSON Lines)", "command": "python3 -m the_loom.run --ticks 3 --population 20 --quiet --output /dev/null"},
+        {"name": "The Chronicle (Journal and Replay)", "command": "python3 -m the_loom.the_chronicle"},
         {"name": "The Loomwright (GUI Application)", "command": "python3 -c \"import tkinter as tk; from the_loomwright.main import TheLoomwrightApp; root = tk.Tk(); app = TheLoomwrightApp(root); root.destroy();\"", "note": "This test attempts to initialize the Tkinter GUI application and immediately destroy it to confirm basic startup without errors."}
     ]
 